@@ -1,25 +1,344 @@
 
-from scipy.integrate import nquad
+import numpy as np
+from perezoso import importar_perezoso
+sp = importar_perezoso('sympy')
+integrate = importar_perezoso('scipy.integrate')
+from instrumentacion import instrumentado
 
-def Accion_LocInt(T, f_test_, n, limites):
+@instrumentado('cuadratura')
+def Accion_LocInt(T, f_test_, n, limites, metodo='gauss', variables=None, orden=8,
+                  epsabs=1.49e-8, epsrel=1.49e-8, max_niveles=12, max_puntos=2_000_000,
+                  singularidades=None):
     """
     Calcula la acción de una distribución localmente integrable T sobre una función test f_test_,
-    usando cuadratura gaussiana en n dimensiones de la biblioteca scipy.
+    usando cuadratura gaussiana en n dimensiones.
+
+    Con metodo='gauss' (por defecto) se usa cuadratura de Gauss-Legendre en producto tensorial,
+    evaluando todos los nodos de un nivel en una sola llamada vectorizada y refinando solo las
+    celdas que no convergen. Con metodo='qmc' se usa cuasi-Monte Carlo (Sobol aleatorizado),
+    útil en dimensiones altas. Con metodo='nquad' se usa scipy.integrate.nquad punto por punto,
+    como antes; también se usa nquad si algún límite es una función.
+
+    Si se conocen los puntos singulares de T (por ejemplo FuncionTestCartesiana.x0 para el
+    núcleo 1/|x - x0|), se pasan en singularidades: el dominio se parte en celdas que tienen
+    a cada singularidad como vértice y en ellas se aplica la transformación de Duffy, cuyo
+    jacobiano t^(n-1) cancela la singularidad 1/r en 2 y 3 dimensiones.
 
     Args:
-        T (function): La distribución localmente integrable, representada como una función matemática.
-        f_test_ (function): La función test con soporte compacto.
+        T (function o sympy.Expr): La distribución localmente integrable, representada como una
+                                   función matemática o como expresión simbólica.
+        f_test_ (function o sympy.Expr): La función test con soporte compacto.
         n (int): Número de dimensiones del espacio.
         limites (list): Lista de límites de integración para cada dimensión.
                         Ejemplo: [[xmin, xmax], [ymin, ymax], ...].
-                        
+        metodo (str): 'gauss', 'qmc' o 'nquad'.
+        variables (list): Variables simbólicas en el orden de los límites. Si no se dan, se usan
+                          los símbolos libres de T y f_test_ ordenados por nombre.
+        orden (int): Número de nodos de Gauss-Legendre por dimensión en cada celda.
+        epsabs (float): Tolerancia absoluta.
+        epsrel (float): Tolerancia relativa.
+        max_niveles (int): Número máximo de refinamientos de las celdas.
+        max_puntos (int): Número máximo de puntos evaluados en una sola llamada.
+        singularidades (list): Punto o lista de puntos singulares de T (solo con metodo='gauss').
+
     Returns:
-        float: El resultado de la acción integral.
+        tuple: El resultado de la acción integral y una estimación del error.
+    """
+    if singularidades is not None and (metodo != 'gauss' or any(callable(lim) for lim in limites)):
+        raise ValueError("Las singularidades solo se tratan con metodo='gauss' y límites numéricos.")
+
+    if metodo == 'nquad' or any(callable(lim) for lim in limites):
+        #definir la función producto de T y f_test_
+        T_, f_ = _funcion_escalar(T, n, variables, f_test_), _funcion_escalar(f_test_, n, variables, T)
+
+        def integrando(*args):
+            return T_(*args) * f_(*args)
+
+        #calcular la integral múltiple
+        resultado, error = integrate.nquad(integrando, limites)
+        return resultado, error
+
+    integrando = _integrando_vectorizado(T, f_test_, n, variables)
+    a = np.array([lim[0] for lim in limites], dtype=float)
+    b = np.array([lim[1] for lim in limites], dtype=float)
+
+    if singularidades is not None:
+        return _gauss_singular(integrando, a, b, singularidades, orden, epsabs, epsrel,
+                               max_niveles, max_puntos)
+    elif metodo == 'gauss':
+        return _gauss_adaptativo(integrando, a[None, :], b[None, :], orden, epsabs, epsrel,
+                                 max_niveles, max_puntos)
+    elif metodo == 'qmc':
+        return _cuasi_monte_carlo(integrando, a, b)
+    else:
+        raise ValueError("El método debe ser 'gauss', 'qmc' o 'nquad'.")
+
+
+def _variables(T, f_test_, n, variables):
+    """
+    Devuelve las variables de integración de las expresiones simbólicas.
+    """
+    if variables is not None:
+        return list(variables)
+    simbolos = set()
+    for g in (T, f_test_):
+        if isinstance(g, sp.Basic):
+            simbolos |= g.free_symbols
+    simbolos = sorted(simbolos, key=lambda s: s.name)
+    if len(simbolos) != n:
+        raise ValueError("No se pudieron deducir las variables; páselas en 'variables'.")
+    return simbolos
+
+
+def _constante(g):
+    """
+    Valor numérico de g si es una constante (número o expresión sin símbolos libres), o None.
+    """
+    if callable(g) and not isinstance(g, sp.Basic):
+        return None
+    g = sp.sympify(g)
+    if g.free_symbols:
+        return None
+    return float(g)
+
+
+def _funcion_escalar(g, n, variables, otra):
+    """
+    Convierte g en una función de Python que recibe n números.
+    """
+    valor = _constante(g)
+    if valor is not None:
+        return lambda *args: valor
+    if not callable(g):
+        g = sp.sympify(g)
+    if isinstance(g, sp.Basic):
+        return sp.lambdify(_variables(g, otra, n, variables), g, 'math')
+    return g
+
+
+def _funcion_vectorizada(g, variables):
+    """
+    Convierte g (expresión simbólica o función) en una función que recibe n arreglos.
+    Si la función no acepta arreglos se envuelve con np.vectorize.
+    """
+    valor = _constante(g)
+    if valor is not None:
+        return lambda *coords: valor
+    if not callable(g):
+        g = sp.sympify(g)
+    if isinstance(g, sp.Basic):
+        return sp.lambdify(variables, g, 'numpy')
+
+    vectorizada = np.vectorize(g, otypes=[float])
+
+    def h(*coords):
+        try:
+            valor = np.asarray(g(*coords), dtype=float)
+            if valor.shape in ((), coords[0].shape):
+                return valor
+        except Exception:
+            pass
+        return vectorizada(*coords)
+    return h
+
+
+def _integrando_vectorizado(T, f_test_, n, variables):
+    """
+    Construye el producto T·f_test_ evaluado sobre un arreglo de puntos de forma (..., n).
+    """
+    if any(isinstance(g, sp.Basic) and _constante(g) is None for g in (T, f_test_)):
+        variables = _variables(T, f_test_, n, variables)
+    T_ = _funcion_vectorizada(T, variables)
+    f_ = _funcion_vectorizada(f_test_, variables)
+
+    def integrando(puntos):
+        coords = [puntos[..., i] for i in range(n)]
+        valor = np.asarray(T_(*coords), dtype=float) * np.asarray(f_(*coords), dtype=float)
+        return np.broadcast_to(valor, puntos.shape[:-1])
+    return integrando
+
+
+def _integrar_celdas(integrando, a, b, nodos, pesos, max_puntos):
+    """
+    Integra con la regla (nodos, pesos) sobre [-1, 1]^n en cada celda [a_i, b_i].
+    Las celdas se procesan por lotes para que cada llamada tenga a lo más max_puntos puntos.
+    """
+    semi = (b - a) / 2
+    centro = (b + a) / 2
+    lote = max(1, max_puntos // len(nodos))
+    resultado = np.empty(len(a))
+    for i in range(0, len(a), lote):
+        s, c = semi[i:i + lote], centro[i:i + lote]
+        puntos = c[:, None, :] + s[:, None, :] * nodos[None, :, :]
+        valores = integrando(puntos)
+        resultado[i:i + lote] = (valores @ pesos) * np.prod(s, axis=1)
+    return resultado
+
+
+def _subdividir(a, b):
+    """
+    Divide cada celda a la mitad en todas sus dimensiones (2^n hijas por celda).
+    """
+    n = a.shape[1]
+    medio = (a + b) / 2
+    esquinas = np.array(np.meshgrid(*[[0, 1]] * n, indexing='ij')).reshape(n, -1).T
+    a_hijas = np.where(esquinas[None, :, :] == 0, a[:, None, :], medio[:, None, :])
+    b_hijas = np.where(esquinas[None, :, :] == 0, medio[:, None, :], b[:, None, :])
+    return a_hijas.reshape(-1, n), b_hijas.reshape(-1, n)
+
+
+def _gauss_adaptativo(integrando, a, b, orden, epsabs, epsrel, max_niveles, max_puntos):
+    """
+    Cuadratura de Gauss-Legendre en producto tensorial con refinamiento adaptativo por celda.
+    El error de una celda se estima como la diferencia entre su integral y la suma de las
+    integrales de sus 2^n hijas; las celdas que no cumplen la tolerancia se refinan. La
+    tolerancia se reparte entre las celdas según su volumen.
+    """
+    if max_niveles < 1:
+        raise ValueError("max_niveles debe ser al menos 1 para estimar el error.")
+    n = a.shape[1]
+    x, w = np.polynomial.legendre.leggauss(orden)
+    nodos = np.array(np.meshgrid(*[x] * n, indexing='ij')).reshape(n, -1).T
+    pesos = np.prod(np.array(np.meshgrid(*[w] * n, indexing='ij')).reshape(n, -1), axis=0)
+    hijas = 2 ** n
+
+    volumen_total = np.prod(b - a, axis=1).sum()
+    valores = _integrar_celdas(integrando, a, b, nodos, pesos, max_puntos)
+    aceptado, error = 0.0, 0.0
+
+    for nivel in range(max_niveles):
+        a_h, b_h = _subdividir(a, b)
+        valores_h = _integrar_celdas(integrando, a_h, b_h, nodos, pesos, max_puntos)
+        suma_h = valores_h.reshape(-1, hijas).sum(axis=1)
+        errores = np.abs(valores - suma_h)
+
+        total = aceptado + suma_h.sum()
+        tol = max(epsabs, epsrel * abs(total))
+        volumen = np.prod(b - a, axis=1)
+        converge = errores <= tol * volumen / volumen_total
+
+        aceptado += suma_h[converge].sum()
+        error += errores[converge].sum()
+        if converge.all():
+            return float(aceptado), float(error)
+
+        activas = np.repeat(~converge, hijas)
+        a, b, valores = a_h[activas], b_h[activas], valores_h[activas]
+        if len(a) * len(nodos) * hijas > 50 * max_puntos:
+            break
+
+    #no convergió: se aceptan las celdas activas con su error estimado
+    return float(aceptado + suma_h[~converge].sum()), float(error + errores[~converge].sum())
+
+
+def _celdas_singulares(a, b, puntos, tol=1e-12):
+    """
+    Parte la caja [a, b] en celdas tales que cada punto singular es vértice de las celdas que
+    lo contienen y ninguna celda tiene más de un punto singular.
+
+    Returns:
+        list: Tuplas (a_celda, b_celda, esquina) donde esquina es el punto singular de la
+              celda o None.
+    """
+    cortes = [np.unique(np.concatenate(([a[i], b[i]], puntos[:, i]))) for i in range(len(a))]
+    celdas = []
+    for indice in np.ndindex(*[len(c) - 1 for c in cortes]):
+        a_c = np.array([c[j] for c, j in zip(cortes, indice)])
+        b_c = np.array([c[j + 1] for c, j in zip(cortes, indice)])
+        celdas.extend(_separar_singularidades(a_c, b_c, puntos, tol))
+    return celdas
+
+
+def _separar_singularidades(a, b, puntos, tol):
+    """
+    Subdivide recursivamente una celda hasta que cada subcelda tenga a lo más un punto singular
+    (que por construcción queda en una de sus esquinas).
+    """
+    escala = tol * max(1.0, np.abs(b - a).max())
+    dentro = np.all((puntos >= a - escala) & (puntos <= b + escala), axis=1)
+    en_celda = puntos[dentro]
+    if len(en_celda) == 0:
+        return [(a, b, None)]
+    if len(en_celda) == 1:
+        return [(a, b, en_celda[0])]
+    a_h, b_h = _subdividir(a[None, :], b[None, :])
+    celdas = []
+    for a_c, b_c in zip(a_h, b_h):
+        celdas.extend(_separar_singularidades(a_c, b_c, en_celda, tol))
+    return celdas
+
+
+def _integrando_duffy(integrando, esquina, opuesta, k):
+    """
+    Integrando sobre [0, 1]^n de la pirámide k de la transformación de Duffy de la celda con
+    vértice singular esquina y vértice opuesto opuesta:
+    u_k = t, u_j = t·v_j (j != k), x = esquina + (opuesta - esquina)·u, jacobiano t^(n-1).
+    """
+    n = len(esquina)
+    lado = opuesta - esquina
+    jacobiano_celda = abs(np.prod(lado))
+    otros = [j for j in range(n) if j != k]
+
+    def g(tv):
+        t = tv[..., 0]
+        u = np.empty_like(tv)
+        u[..., k] = t
+        for i, j in enumerate(otros):
+            u[..., j] = t * tv[..., i + 1]
+        puntos = esquina + lado * u
+        return integrando(puntos) * t ** (n - 1) * jacobiano_celda
+    return g
+
+
+def _gauss_singular(integrando, a, b, singularidades, orden, epsabs, epsrel, max_niveles,
+                    max_puntos):
+    """
+    Integra en las celdas regulares con _gauss_adaptativo (todas en un solo lote) y en las
+    celdas con vértice singular mediante la transformación de Duffy.
+    """
+    n = len(a)
+    puntos = np.asarray(singularidades, dtype=float).reshape(-1, n)
+    puntos = puntos[np.all((puntos >= a) & (puntos <= b), axis=1)]
+    celdas = _celdas_singulares(a, b, puntos)
+
+    regulares = [(a_c, b_c) for a_c, b_c, esquina in celdas if esquina is None]
+    singulares = [(a_c, b_c, esquina) for a_c, b_c, esquina in celdas if esquina is not None]
+    piezas = len(singulares) * n + (1 if regulares else 0)
+    epsabs = epsabs / max(piezas, 1)
+
+    resultado, error = 0.0, 0.0
+    if regulares:
+        a_r = np.array([c[0] for c in regulares])
+        b_r = np.array([c[1] for c in regulares])
+        resultado, error = _gauss_adaptativo(integrando, a_r, b_r, orden, epsabs, epsrel,
+                                             max_niveles, max_puntos)
+
+    cubo_a, cubo_b = np.zeros((1, n)), np.ones((1, n))
+    for a_c, b_c, esquina in singulares:
+        #el vértice opuesto a la singularidad
+        opuesta = np.where(np.isclose(esquina, a_c), b_c, a_c)
+        for k in range(n):
+            g = _integrando_duffy(integrando, esquina, opuesta, k)
+            valor, err = _gauss_adaptativo(g, cubo_a, cubo_b, orden, epsabs, epsrel,
+                                           max_niveles, max_puntos)
+            resultado += valor
+            error += err
+    return resultado, error
+
+
+def _cuasi_monte_carlo(integrando, a, b, m=14, repeticiones=8):
+    """
+    Cuasi-Monte Carlo con secuencias de Sobol aleatorizadas. El error es la desviación estándar
+    de la media entre repeticiones independientes.
     """
-    #definir la función producto de T y f_test_
-    def integrando(*args):
-        return T(*args) * f_test_(*args)
+    from scipy.stats import qmc
 
-    #calcular la integral múltiple
-    resultado, error = nquad(integrando, limites)
-    return resultado, error
\ No newline at end of file
+    n = len(a)
+    volumen = np.prod(b - a)
+    estimaciones = []
+    for semilla in range(repeticiones):
+        muestra = qmc.Sobol(d=n, scramble=True, seed=semilla).random_base2(m)
+        puntos = a + (b - a) * muestra
+        estimaciones.append(volumen * integrando(puntos).mean())
+    estimaciones = np.array(estimaciones)
+    return float(estimaciones.mean()), float(estimaciones.std(ddof=1) / np.sqrt(repeticiones))
@@ -0,0 +1,165 @@
+
+import os
+import warnings
+from perezoso import importar_perezoso
+sp = importar_perezoso('sympy')
+from cache_simbolico import en_cache
+from instrumentacion import instrumentado
+
+class BackendSympy:
+    """
+    Backend simbólico por defecto: usa SymPy directamente.
+    """
+    nombre = 'sympy'
+
+    def diff(self, expr, var, n=1):
+        return sp.diff(expr, var, n)
+
+    def subs(self, expr, sustituciones):
+        return sp.sympify(expr).subs(sustituciones)
+
+    def free_symbols(self, expr):
+        return sp.sympify(expr).free_symbols
+
+    def evaluar(self, expr, sustituciones):
+        return sp.sympify(expr).subs(sustituciones).evalf()
+
+
+class BackendSymEngine:
+    """
+    Backend opcional que deriva, sustituye y evalúa con SymEngine (en C++). Las expresiones
+    entran y salen como objetos de SymPy; si una expresión no se puede convertir (funciones que
+    SymEngine no conoce) la operación se hace con SymPy.
+    """
+    nombre = 'symengine'
+
+    def __init__(self):
+        try:
+            import symengine
+        except ImportError as error:
+            raise ImportError("El backend 'symengine' requiere instalar symengine.") from error
+        self.se = symengine
+        self.sympy = BackendSympy()
+
+    def diff(self, expr, var, n=1):
+        try:
+            resultado = self.se.diff(self.se.sympify(expr), self.se.sympify(var), n)
+        except Exception:
+            return self.sympy.diff(expr, var, n)
+        return self._a_sympy(resultado, expr, var)
+
+    def subs(self, expr, sustituciones):
+        try:
+            se_sust = {self.se.sympify(k): self.se.sympify(v) for k, v in dict(sustituciones).items()}
+            resultado = self.se.sympify(expr).subs(se_sust)
+        except Exception:
+            return self.sympy.subs(expr, sustituciones)
+        return self._a_sympy(resultado, expr, *dict(sustituciones).values())
+
+    def free_symbols(self, expr):
+        try:
+            nombres = {str(s) for s in self.se.sympify(expr).free_symbols}
+        except Exception:
+            return self.sympy.free_symbols(expr)
+        return {s for s in sp.sympify(expr).free_symbols if s.name in nombres}
+
+    def evaluar(self, expr, sustituciones):
+        try:
+            return sp.Float(float(self.se.sympify(self.subs(expr, sustituciones)).n()))
+        except Exception:
+            return self.sympy.evaluar(expr, sustituciones)
+
+    def _a_sympy(self, resultado, *originales):
+        """
+        Convierte a SymPy y recupera los símbolos originales (SymEngine pierde sus supuestos,
+        como positive=True).
+        """
+        simbolos = {}
+        for original in originales:
+            for s in sp.sympify(original).free_symbols:
+                simbolos[sp.Symbol(s.name)] = s
+        return sp.sympify(resultado).xreplace(simbolos)
+
+
+_BACKENDS = {'sympy': BackendSympy, 'symengine': BackendSymEngine}
+_activo = None
+_comparar = False
+
+
+def usar_backend(nombre, comparar=False):
+    """
+    Elige el backend simbólico que usan DeltaDirac, OperadoresDiferenciales y
+    FuncionTestCartesiana para derivar, sustituir y evaluar.
+
+    Args:
+        nombre (str): 'sympy' (por defecto) o 'symengine'.
+        comparar (bool): Si es True, cada operación también se calcula con SymPy y se emite una
+                         advertencia si los resultados no coinciden.
+    """
+    global _activo, _comparar
+    if nombre not in _BACKENDS:
+        raise ValueError(f"Backend desconocido: {nombre}. Opciones: {list(_BACKENDS)}")
+    _activo = _BACKENDS[nombre]()
+    _comparar = comparar
+
+
+def backend_actual():
+    """
+    Devuelve el backend activo; la primera vez se elige con la variable de entorno
+    DISTOPY_BACKEND (por defecto 'sympy').
+    """
+    if _activo is None:
+        usar_backend(os.environ.get('DISTOPY_BACKEND', 'sympy'))
+    return _activo
+
+
+def _ejecutar(operacion, *args):
+    backend = backend_actual()
+    resultado = getattr(backend, operacion)(*args)
+    if _comparar and backend.nombre != 'sympy':
+        referencia = getattr(BackendSympy(), operacion)(*args)
+        if not _coinciden(resultado, referencia):
+            warnings.warn(f"{operacion}: {backend.nombre} dio {resultado} y sympy {referencia}",
+                          RuntimeWarning, stacklevel=3)
+    return resultado
+
+
+def _coinciden(a, b):
+    if isinstance(a, set) or isinstance(b, set):
+        return a == b
+    try:
+        return sp.simplify(sp.sympify(a) - sp.sympify(b)) == 0
+    except Exception:
+        return a == b
+
+
+@instrumentado('diff')
+def diff(expr, var, n=1):
+    """
+    Derivada n-ésima de expr respecto a var con el backend activo. El resultado se guarda en
+    la caché simbólica.
+    """
+    return en_cache('diff', _ejecutar, 'diff', expr, var, n)
+
+
+@instrumentado('subs')
+def subs(expr, sustituciones):
+    """
+    Sustituye en expr según el diccionario sustituciones con el backend activo.
+    """
+    return _ejecutar('subs', expr, sustituciones)
+
+
+def free_symbols(expr):
+    """
+    Símbolos libres de expr (como símbolos de SymPy) con el backend activo.
+    """
+    return _ejecutar('free_symbols', expr)
+
+
+@instrumentado('evaluar')
+def evaluar(expr, sustituciones):
+    """
+    Sustituye y evalúa numéricamente expr con el backend activo.
+    """
+    return _ejecutar('evaluar', expr, sustituciones)
@@ -0,0 +1,234 @@
+
+import os
+import copy
+import time
+import pickle
+import hashlib
+import sqlite3
+from collections import OrderedDict
+from perezoso import importar_perezoso
+sp = importar_perezoso('sympy')
+
+class CacheSimbolico:
+    """
+    Caché de resultados simbólicos costosos (sp.limit, sp.simplify, diff, ...).
+
+    La clave es el hash SHA-256 de la operación, del backend simbólico activo y del srepr de
+    sus argumentos. Delante hay una memoria LRU dentro del proceso y, si se da una ruta, una
+    base SQLite en disco compartida entre procesos (SQLite se encarga de los bloqueos) con
+    expulsión de las entradas usadas hace más tiempo cuando se supera max_bytes.
+
+    El tamaño total se lleva en la tabla total, actualizada en la misma transacción que cada
+    escritura, y los tiempos de acceso de las lecturas se acumulan en memoria y se escriben por
+    lotes, de modo que leer no bloquea a los demás procesos. Los valores mutables (Matrix) se
+    entregan como copias para que quien los modifique no altere la caché.
+    """
+
+    def __init__(self, ruta=None, max_bytes=512 * 2**20, max_memoria=4096, lote_accesos=256):
+        """
+        Inicializa la clase CacheSimbolico.
+
+        :param ruta: Archivo de la base de datos en disco; None para usar solo memoria.
+        :param max_bytes: Tamaño máximo de los valores guardados en disco.
+        :param max_memoria: Número máximo de entradas en la memoria del proceso.
+        :param lote_accesos: Lecturas acumuladas antes de escribir sus tiempos de acceso.
+        """
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self.max_memoria = max_memoria
+        self.lote_accesos = lote_accesos
+        self.memoria = OrderedDict()
+        self._accesos = {} #clave -> último acceso todavía no escrito en disco
+        self._conexion = None
+        self._pid = None
+
+    def obtener_o_calcular(self, operacion, funcion, *args, **kwargs):
+        """
+        Devuelve el resultado guardado de funcion(*args, **kwargs) o lo calcula y lo guarda.
+        """
+        clave = clave_cache(operacion, *args, **kwargs)
+        if clave in self.memoria:
+            self.memoria.move_to_end(clave)
+            self._registrar_acceso(clave)
+            return _copia(self.memoria[clave])
+
+        encontrado, valor = self._leer_disco(clave)
+        if not encontrado:
+            valor = funcion(*args, **kwargs)
+            self._escribir_disco(clave, valor)
+        self._recordar(clave, _copia(valor))
+        return valor
+
+    def limpiar(self):
+        """
+        Borra todas las entradas, en memoria y en disco.
+        """
+        self.memoria.clear()
+        self._accesos.clear()
+        conexion = self._conectar()
+        if conexion is not None:
+            conexion.execute('BEGIN IMMEDIATE')
+            conexion.execute('DELETE FROM cache')
+            conexion.execute('UPDATE total SET bytes = 0')
+            conexion.execute('COMMIT')
+
+    def guardar_accesos(self):
+        """
+        Escribe en disco los tiempos de acceso acumulados de las lecturas.
+        """
+        conexion = self._conectar()
+        if conexion is None or not self._accesos:
+            return
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            self._escribir_accesos(conexion)
+            conexion.execute('COMMIT')
+        except Exception:
+            conexion.execute('ROLLBACK')
+            raise
+
+    def _recordar(self, clave, valor):
+        self.memoria[clave] = valor
+        if len(self.memoria) > self.max_memoria:
+            self.memoria.popitem(last=False)
+
+    def _registrar_acceso(self, clave):
+        if self.ruta is None:
+            return
+        self._accesos[clave] = time.time()
+        if len(self._accesos) >= self.lote_accesos:
+            self.guardar_accesos()
+
+    def _escribir_accesos(self, conexion):
+        conexion.executemany('UPDATE cache SET acceso = ? WHERE clave = ?',
+                             [(t, clave) for clave, t in self._accesos.items()])
+        self._accesos.clear()
+
+    def _conectar(self):
+        if self.ruta is None:
+            return None
+        #después de un fork cada proceso abre su propia conexión
+        if self._conexion is None or self._pid != os.getpid():
+            conexion = sqlite3.connect(self.ruta, timeout=60, isolation_level=None)
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.execute('BEGIN IMMEDIATE')
+            conexion.execute('CREATE TABLE IF NOT EXISTS cache '
+                             '(clave TEXT PRIMARY KEY, valor BLOB, tam INTEGER, acceso REAL)')
+            conexion.execute('CREATE INDEX IF NOT EXISTS cache_acceso ON cache(acceso)')
+            conexion.execute('CREATE TABLE IF NOT EXISTS total '
+                             '(id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER)')
+            #una base creada antes de la tabla total se suma una sola vez
+            conexion.execute('INSERT OR IGNORE INTO total SELECT 0, COALESCE(SUM(tam), 0) FROM cache')
+            conexion.execute('COMMIT')
+            self._conexion, self._pid = conexion, os.getpid()
+            self._accesos.clear() #los accesos pendientes son del proceso padre
+        return self._conexion
+
+    def _leer_disco(self, clave):
+        conexion = self._conectar()
+        if conexion is None:
+            return False, None
+        fila = conexion.execute('SELECT valor FROM cache WHERE clave = ?', (clave,)).fetchone()
+        if fila is None:
+            return False, None
+        self._registrar_acceso(clave)
+        return True, pickle.loads(fila[0])
+
+    def _escribir_disco(self, clave, valor):
+        conexion = self._conectar()
+        if conexion is None:
+            return
+        try:
+            datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return #valores que no se pueden serializar solo se guardan en memoria
+        if len(datos) > self.max_bytes:
+            return
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            self._escribir_accesos(conexion) #para expulsar con los accesos al día
+            anterior = conexion.execute('SELECT tam FROM cache WHERE clave = ?', (clave,)).fetchone()
+            conexion.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)',
+                             (clave, datos, len(datos), time.time()))
+            cambio = len(datos) - (anterior[0] if anterior else 0)
+            conexion.execute('UPDATE total SET bytes = bytes + ?', (cambio,))
+            total = conexion.execute('SELECT bytes FROM total').fetchone()[0]
+            if total > self.max_bytes:
+                self._expulsar(conexion, total - self.max_bytes)
+            conexion.execute('COMMIT')
+        except Exception:
+            conexion.execute('ROLLBACK')
+            raise
+
+    def _expulsar(self, conexion, exceso):
+        """
+        Borra las entradas usadas hace más tiempo hasta liberar al menos `exceso` bytes.
+        """
+        liberado, claves = 0, []
+        for clave, tam in conexion.execute('SELECT clave, tam FROM cache ORDER BY acceso'):
+            claves.append((clave,))
+            liberado += tam
+            if liberado >= exceso:
+                break
+        conexion.executemany('DELETE FROM cache WHERE clave = ?', claves)
+        conexion.execute('UPDATE total SET bytes = bytes - ?', (liberado,))
+
+
+def clave_cache(operacion, *args, **kwargs):
+    """
+    Clave de contenido: hash de la operación, del backend simbólico activo (sympy y symengine
+    pueden dar resultados distintos) y del srepr de los argumentos.
+    """
+    import backend #aquí y no arriba: backend importa este módulo
+    partes = [operacion, backend.backend_actual().nombre]
+    partes += [_representar(a) for a in args]
+    partes += [f'{k}={_representar(v)}' for k, v in sorted(kwargs.items())]
+    return hashlib.sha256('\x1f'.join(partes).encode()).hexdigest()
+
+
+def _representar(valor):
+    if isinstance(valor, (sp.Basic, sp.MatrixBase)):
+        return sp.srepr(valor)
+    if isinstance(valor, (list, tuple)):
+        return '(' + ','.join(_representar(v) for v in valor) + ')'
+    return repr(valor)
+
+
+def _copia(valor):
+    """
+    Copia de los valores mutables; las expresiones de SymPy son inmutables y se comparten.
+    """
+    if isinstance(valor, sp.Basic):
+        return valor
+    if isinstance(valor, sp.MatrixBase):
+        return valor.copy()
+    return copy.deepcopy(valor)
+
+
+_cache = None
+
+
+def activar_cache(ruta=None, max_bytes=512 * 2**20, max_memoria=4096):
+    """
+    Configura la caché global. Con ruta=None solo se usa la memoria del proceso.
+    """
+    global _cache
+    _cache = CacheSimbolico(ruta, max_bytes, max_memoria)
+    return _cache
+
+
+def cache_global():
+    """
+    Devuelve la caché global; la primera vez se crea con la ruta de la variable de entorno
+    DISTOPY_CACHE (si no existe, solo en memoria).
+    """
+    if _cache is None:
+        activar_cache(os.environ.get('DISTOPY_CACHE'))
+    return _cache
+
+
+def en_cache(operacion, funcion, *args, **kwargs):
+    """
+    Calcula funcion(*args, **kwargs) pasando por la caché global.
+    """
+    return cache_global().obtener_o_calcular(operacion, funcion, *args, **kwargs)
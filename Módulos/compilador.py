@@ -0,0 +1,196 @@
+
+import re
+import ast
+import hashlib
+import functools
+import numpy as np
+from perezoso import importar_perezoso
+sp = importar_perezoso('sympy')
+scipy = importar_perezoso('scipy')
+from instrumentacion import instrumentado
+
+class KernelCompilado:
+    """
+    Función numérica vectorizada generada a partir de una lista de expresiones simbólicas.
+    Todas las componentes se calculan en una sola función de NumPy en la que las
+    subexpresiones comunes (por ejemplo sqrt((x-x0)^2+...)) se calculan una sola vez.
+
+    La fuente se ejecuta con exec: solo se deben reconstruir con desde_dict kernels de
+    archivos de confianza.
+    """
+
+    def __init__(self, fuente, variables, n_componentes, nombre='kernel'):
+        """
+        Inicializa la clase KernelCompilado.
+
+        :param fuente: Código fuente de la función generada (usa numpy y, para funciones
+                       especiales, scipy.special).
+        :param variables: Nombres de las variables, en el orden de las columnas de los puntos.
+        :param n_componentes: Número de componentes que devuelve la función.
+        :param nombre: Nombre de la función dentro de la fuente.
+        """
+        self.fuente = fuente
+        self.variables = tuple(variables)
+        self.n_componentes = n_componentes
+        self.nombre = nombre
+        #Max y Min se imprimen con functools.reduce; scipy solo se carga si la fuente lo usa
+        espacio = {'numpy': np, 'functools': functools, 'scipy': scipy}
+        exec(compile(fuente, f'<{nombre}>', 'exec'), espacio)
+        self.funcion = espacio[nombre]
+
+    def evaluar(self, *coordenadas):
+        """
+        Evalúa las componentes en arreglos de coordenadas (uno por variable).
+
+        Returns:
+            numpy.ndarray: Arreglo de forma (N, n_componentes).
+        """
+        coordenadas = [np.asarray(c, dtype=float) for c in coordenadas]
+        forma = np.broadcast(*coordenadas).shape if coordenadas else ()
+        componentes = self.funcion(*coordenadas)
+        return np.stack([np.broadcast_to(np.asarray(c, dtype=float), forma)
+                         for c in componentes], axis=-1)
+
+    def __call__(self, puntos):
+        """
+        Evalúa las componentes en un arreglo de puntos de forma (N, d).
+
+        Returns:
+            numpy.ndarray: Arreglo de forma (N, n_componentes).
+        """
+        puntos = np.asarray(puntos, dtype=float)
+        if puntos.ndim == 1:
+            puntos = puntos.reshape(-1, len(self.variables))
+        return self.evaluar(*puntos.T)
+
+    def a_dict(self):
+        """
+        Datos para serializar el kernel (por ejemplo en JSON); no incluyen objetos de SymPy.
+        """
+        return {'fuente': self.fuente, 'variables': list(self.variables),
+                'n_componentes': self.n_componentes, 'nombre': self.nombre,
+                'sha256': hashlib.sha256(self.fuente.encode()).hexdigest()}
+
+    @classmethod
+    def desde_dict(cls, datos):
+        """
+        Reconstruye un kernel a partir de a_dict() sin importar SymPy.
+
+        Antes de ejecutar la fuente se comprueba que coincide con su hash y que tiene la forma
+        de las funciones de compilar_expresiones (asignaciones y un return con operaciones de
+        numpy y scipy.special sobre las variables); si no, se lanza ValueError. Esto detecta archivos dañados
+        o editados a mano, pero no hace seguro cargar archivos de origen desconocido: el hash
+        se puede recalcular.
+        """
+        fuente = datos['fuente']
+        if datos.get('sha256') != hashlib.sha256(fuente.encode()).hexdigest():
+            raise ValueError(f"La fuente del kernel {datos.get('nombre')} no coincide con su hash: "
+                             "el archivo está dañado o fue modificado.")
+        _validar_fuente(fuente, datos['nombre'], len(datos['variables']))
+        return cls(fuente, datos['variables'], datos['n_componentes'], datos['nombre'])
+
+
+#lo único que puede aparecer en una fuente generada por compilar_expresiones
+_NODOS = (ast.Module, ast.FunctionDef, ast.arguments, ast.arg, ast.Assign, ast.Return, ast.Name,
+          ast.Attribute, ast.Call, ast.keyword, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare,
+          ast.Tuple, ast.List, ast.Constant, ast.expr_context, ast.operator, ast.unaryop,
+          ast.boolop, ast.cmpop)
+_GLOBALES = {'numpy', 'scipy', 'functools', 'abs'}
+_AUXILIAR = re.compile(r'_c\d+$')
+
+
+def _validar_fuente(fuente, nombre, n_variables):
+    """
+    Comprueba que la fuente es una sola función `nombre(_v0, ..., _vn)` cuyo cuerpo solo
+    asigna variables auxiliares _c<k> y termina con return, usando numpy, scipy.special,
+    scipy.constants, functools.reduce y abs; sin cadenas, importaciones ni atributos privados.
+    """
+    def invalida(motivo):
+        return ValueError(f"La fuente del kernel {nombre} no es una función generada: {motivo}.")
+
+    try:
+        arbol = ast.parse(fuente)
+    except SyntaxError as error:
+        raise invalida(error) from None
+    if len(arbol.body) != 1 or not isinstance(arbol.body[0], ast.FunctionDef):
+        raise invalida('debe contener una sola función')
+    funcion = arbol.body[0]
+    argumentos = [a.arg for a in funcion.args.args]
+    if (funcion.name != nombre or funcion.decorator_list or funcion.returns
+            or argumentos != [f'_v{i}' for i in range(n_variables)]
+            or ast.unparse(funcion.args) != ', '.join(argumentos)):
+        raise invalida(f'la cabecera debe ser def {nombre}(_v0, ..., _v{n_variables - 1})')
+    if not funcion.body or not isinstance(funcion.body[-1], ast.Return):
+        raise invalida('debe terminar con return')
+
+    locales = set(argumentos)
+    for nodo in ast.walk(funcion):
+        if not isinstance(nodo, _NODOS):
+            raise invalida(f'{type(nodo).__name__} no permitido')
+        if isinstance(nodo, ast.Assign):
+            if len(nodo.targets) != 1 or not isinstance(nodo.targets[0], ast.Name) \
+                    or not _AUXILIAR.match(nodo.targets[0].id):
+                raise invalida('solo se asignan variables _c<k>')
+            locales.add(nodo.targets[0].id)
+        elif isinstance(nodo, ast.Attribute):
+            cadena, raiz = [], nodo
+            while isinstance(raiz, ast.Attribute):
+                if raiz.attr.startswith('_'):
+                    raise invalida(f'atributo {raiz.attr} no permitido')
+                cadena.insert(0, raiz.attr)
+                raiz = raiz.value
+            modulo = raiz.id if isinstance(raiz, ast.Name) else None
+            if not (modulo == 'numpy' or (modulo == 'functools' and cadena == ['reduce'])
+                    or (modulo == 'scipy' and cadena[0] in ('special', 'constants'))):
+                raise invalida('solo se accede a numpy, scipy.special, scipy.constants y '
+                               'functools.reduce')
+        elif isinstance(nodo, ast.Constant) and not isinstance(nodo.value, (int, float, complex)):
+            raise invalida(f'constante {nodo.value!r} no permitida')
+    for nodo in ast.walk(funcion):
+        if isinstance(nodo, ast.Name) and nodo.id not in locales | _GLOBALES:
+            raise invalida(f'nombre {nodo.id} no permitido')
+
+
+@instrumentado('lambdify')
+def compilar_expresiones(expresiones, variables, nombre='kernel'):
+    """
+    Compila una lista de expresiones (o una Matrix) en un solo KernelCompilado, aplicando
+    eliminación de subexpresiones comunes entre todas las componentes. Las funciones
+    especiales (erf, gamma, besselj, ...) se evalúan con scipy.special; las que no tienen
+    equivalente numérico (por ejemplo DiracDelta) dan ValueError al compilar.
+
+    Args:
+        expresiones (list o sympy.Matrix): Componentes a compilar.
+        variables (list): Símbolos de los que dependen las expresiones.
+        nombre (str): Nombre de la función generada.
+
+    Returns:
+        KernelCompilado: La función numérica.
+    """
+    if isinstance(expresiones, (sp.Basic, int, float)) and not isinstance(expresiones, sp.MatrixBase):
+        expresiones = [expresiones]
+    expresiones = [sp.sympify(e) for e in expresiones]
+    variables = list(variables)
+
+    #se renombran las variables para que el código generado siempre sea válido
+    internas = sp.symbols(f'_v0:{len(variables)}')
+    expresiones = [e.subs(dict(zip(variables, internas)), simultaneous=True) for e in expresiones]
+    libres = set().union(*[e.free_symbols for e in expresiones]) - set(internas)
+    if libres:
+        raise ValueError(f"Las expresiones tienen símbolos sin valor numérico: {libres}")
+
+    reemplazos, reducidas = sp.cse(expresiones, symbols=sp.numbered_symbols('_c'))
+    from sympy.printing.numpy import SciPyPrinter
+    from sympy.printing.codeprinter import PrintMethodNotImplementedError
+    impresora = SciPyPrinter({'fully_qualified_modules': True})
+    lineas = [f"def {nombre}({', '.join(str(v) for v in internas)}):"]
+    try:
+        for simbolo, subexpresion in reemplazos:
+            lineas.append(f"    {simbolo} = {impresora.doprint(subexpresion)}")
+        lineas.append(f"    return ({''.join(impresora.doprint(e) + ', ' for e in reducidas)})")
+    except PrintMethodNotImplementedError as error:
+        funcion = str(error).split(':')[-1].split()[0]
+        raise ValueError(f"No se puede compilar {funcion}: no tiene equivalente en NumPy ni "
+                         "en scipy.special.") from None
+    fuente = '\n'.join(lineas) + '\n'
+    return KernelCompilado(fuente, [str(v) for v in variables], len(reducidas), nombre)
@@ -1,9 +1,11 @@
 
-from scipy.misc import derivative
-import sympy as sp
-from sympy import Float, sympify
-from scipy.misc import derivative
-from sympy import symbols, Function, Derivative
+from perezoso import importar_perezoso
+sp = importar_perezoso('sympy')
+from derivacion_numerica import derivada_numerica
+from saltos import calcular_saltos, saltos_por_tramos
+import backend
+from distribucion import Distribucion, TerminoSingular
+from instrumentacion import instrumentado
 
 class DeltaDirac:
     """
@@ -30,9 +32,10 @@ class DeltaDirac:
             sympy.Expr: Resultado de la evaluación de manera simbólica.
         """
         f = self.f  # Copia de la función test para trabajar
-        return f.subs(self.x, self.x_0)
+        return backend.subs(f, {self.x: self.x_0})
 
 
+    @instrumentado('DeltaDirac.derivada', entrada=None)
     def derivada(self, n):
         """
         Calcula la n-ésima derivada de la delta de Dirac en sentido de distribuciones
@@ -45,16 +48,56 @@ class DeltaDirac:
             return self.accion()
         else:
             try:
-                derivada_simb = self.f.diff(self.x, n).subs(self.x, self.x_0)
+                derivada_simb = backend.subs(backend.diff(self.f, self.x, n), {self.x: self.x_0})
                 return (-1)**n * derivada_simb
             except:
-                def func(x_val):
-                    return self.f.subs(self.x, x_val)
-
-                derivada_num = derivative(func, float(self.x_0), dx=1e-5, n=n)
-                resultado_simbolico = Float((-1)**n * derivada_num) #conversion a float, pero el de sympy!
+                derivada_num = derivada_numerica(self.f, self.x, float(self.x_0), n)
+                resultado_simbolico = sp.Float((-1)**n * derivada_num) #conversion a float, pero el de sympy!
                 return resultado_simbolico
-            
+
+    def derivada_numerica(self, n, x_0=None, metodo='richardson'):
+        """
+        Calcula numéricamente la acción de la n-ésima derivada de la delta de Dirac,
+        (-1)^n f^(n)(x_0), para uno o muchos puntos x_0 en una sola evaluación vectorizada.
+
+        :param n: Orden de la derivada.
+        :param x_0: Valor o arreglo de valores; por defecto el x_0 de la instancia.
+        :param metodo: 'richardson' o 'complejo' (solo n = 1).
+        :return: float o numpy.ndarray con las acciones.
+        """
+        x_0 = self.x_0 if x_0 is None else x_0
+        return (-1)**n * derivada_numerica(self.f, self.x, x_0, n, metodo=metodo)
+
+    @instrumentado('DeltaDirac.derivadas_hasta', entrada=None)
+    def derivadas_hasta(self, N):
+        """
+        Calcula de una sola vez la acción de las derivadas de la delta de Dirac de orden
+        0, 1, ..., N sobre la función test: <δ^(k), f> = (-1)^k f^(k)(x_0).
+
+        Se obtienen de la serie de Taylor de f alrededor de x_0 (la acción de orden k es
+        (-1)^k k! por el coeficiente k-ésimo); si f es racional la serie se calcula con división
+        de polinomios. Si la serie no se puede calcular, se usa una cadena de derivadas en la
+        que el orden k se obtiene derivando el orden k-1.
+
+        :param N: Orden máximo.
+        :return: Lista con las N+1 acciones.
+        """
+        h = sp.Dummy('h')
+        try:
+            coeficientes = _coeficientes_taylor(self.f.subs(self.x, self.x_0 + h), h, N)
+        except Exception:
+            coeficientes = None
+
+        if coeficientes is None:
+            acciones = []
+            derivada = self.f
+            for k in range(N + 1):
+                if k > 0:
+                    derivada = backend.diff(derivada, self.x) #reutiliza la derivada de orden k-1
+                acciones.append((-1)**k * backend.subs(derivada, {self.x: self.x_0}))
+            return acciones
+        return [(-1)**k * sp.factorial(k) * c for k, c in enumerate(coeficientes)]
+
     class DerivadaDiscontinua:
         """
         Clase para calcular la n-ésima derivada de la delta de Dirac en sentido de distribuciones
@@ -72,47 +115,45 @@ class DeltaDirac:
             self.f = f
             self.x = x
             self.discontinuidades = discontinuidades
+            self._saltos = {} #(k, x_0) -> salto de la derivada k-ésima, para reusar entre órdenes
 
-        def salto_funcion(self, x_0):
+        def salto_funcion(self, x_0, timeout=None):
             """
             Calcula el salto de la función [[f]] = f(x_0^+) - f(x_0^-), para una sola
             discontinuidad puntual en x_0
+            Para Piecewise, Heaviside, sign y Abs los límites laterales se obtienen eligiendo
+            la rama, sin sp.limit. Si se da timeout (en segundos) y el cálculo simbólico tarda
+            más, el salto se estima numéricamente.
             Returns:
                 sympy.Expr: El salto de la función en x_0.
             """
-            # Límite por la derecha (x_0+)
-            limite_derecha = sp.limit(self.f, self.x, x_0, dir='+')
-            # Límite por la izquierda (x_0-)
-            limite_izquierda = sp.limit(self.f, self.x, x_0, dir='-')
             # Salto: [[f]] = f(x_0^+) - f(x_0^-)
-            return limite_derecha - limite_izquierda
+            return calcular_saltos([(self.f, self.x, x_0)], timeout=timeout)[0]
 
-        def derivada_sin_precaucion_n(self, n):
+        def derivada_sin_precaucion_n(self, n, x_0=None):
             """
             Calcula la derivada n-ésima de la función simbólica f con respecto a x 
             de forma recursiva.
-            Intenta hacerlo simbólicamente; si falla, lo hace numéricamente.
+            Intenta hacerlo simbólicamente; si falla, lo hace numéricamente en x_0.
 
             Args:
                 n (int): orden de la derivada.
+                x_0 (float o array): punto o puntos para la aproximación numérica.
 
             Returns:
                 sympy.Expr o float: expresión simbólica o aproximación numérica.
             """
-            if 0 <= n <= 2:
+            if n == 0:
                 return self.f #regresa la función original
             try:
-                derivada_simbolica = sp.diff(self.f, self.x, n)
+                derivada_simbolica = backend.diff(self.f, self.x, n)
                 return derivada_simbolica #deriva las veces necesarias usando la función diff
             except Exception:
-                def func(x_val):
-                    return float(self.f.subs(self.x, x_val)) #convierte a float para evitar problemas con sympy
-                return derivative(func, self.x_0, dx=1e-5, n=n) #tolerancia de 1e-5
-            else:
-                raise NotImplementedError("El orden de la derivada debe ser 0, 1 o 2 para este método.")
+                return derivada_numerica(self.f, self.x, x_0, n) #una sola evaluación vectorizada
 
 
-        def derivada_discontinua_1(self, n, x_0):
+        @instrumentado('DerivadaDiscontinua.derivada_discontinua_1', entrada=None)
+        def derivada_discontinua_1(self, n, x_0, estructurada=False):
             """
             Calcula la n-ésima derivada de la delta de Dirac en sentido de distribuciones
             para el caso donde la función test es discontinua en x_0, con una sola discontinuidad.
@@ -121,54 +162,107 @@ class DeltaDirac:
 
             :param n: Orden de la derivada.
             :param x_0: Punto de discontinuidad.
+            :param estructurada: Si es True devuelve una Distribucion (parte regular y términos
+                                 singulares por separado) en lugar de una sola expresión.
             :return: Expresión simbólica de la derivada distribuida.
             """
-            delta = Function('δ')  # símbolo de la delta de Dirac
             if n == 0:
-                return self.accion()
+                resultado = Distribucion(self.f)
             
             elif n == 1:
                 # f' = {f'} + [[f]]·δ(x₀)
-                derivada_regular = self.derivada_sin_precaucion(1)
+                derivada_regular = _parte_regular(self.derivada_sin_precaucion_n(1))
                 salto = self.salto_funcion(x_0)
-                termino_delta = salto * delta(x_0)
-                return derivada_regular + termino_delta
+                resultado = Distribucion(derivada_regular, [TerminoSingular(salto, x_0, 0)])
 
             elif n == 2:
                 # f'' = {f''} + [[f']]·δ(x₀) + [[f]]·δ'(x₀)
-                derivada_regular = self.derivada_sin_precaucion(2)
-                salto_derivada = self.salto_funcion(x_0)
+                derivada_regular = _parte_regular(self.derivada_sin_precaucion_n(2))
+                salto_derivada = calcular_saltos([(_parte_regular(self.derivada_sin_precaucion_n(1)), self.x, x_0)])[0]
                 salto_funcion = self.salto_funcion(x_0)  # salto de la función en x_0
-
-                delta_prima = DeltaDirac.derivada(delta(x_0), self.x)  # derivada simbólica de la delta
-                
-                termino_delta = salto_derivada * delta(x_0)
-                termino_delta_prima = salto_funcion * delta_prima
-
-                return derivada_regular + termino_delta + termino_delta_prima
+                resultado = Distribucion(derivada_regular, [TerminoSingular(salto_derivada, x_0, 0),
+                                                            TerminoSingular(salto_funcion, x_0, 1)])
 
             else:
                 raise NotImplementedError("Solo se implementa para n=0, 1 o 2 en este momento.")
+            return resultado if estructurada else resultado.como_expresion(self.x)
             
-        def derivada_discontinua_n(self, n):
+        def saltos_derivadas(self, n, timeout=None, procesos=None):
             """
-            Calcula la primera derivada de la delta de Dirac en sentido de distribuciones para
-            el caso donde la función test es discontinua en x_0_i, con múltiples discontinuidades.
+            Calcula los saltos [[f^(k)]](x_0) para k = 0, ..., n-1 en todas las discontinuidades.
+            Solo se calculan los que no se pidieron antes, en paralelo con saltos_por_tramos
+            (agrupando los puntos por rama), y se guardan para los siguientes órdenes.
+
+            Returns:
+                list: Para cada discontinuidad, la lista [[[f]], [[f']], ..., [[f^(n-1)]]].
+            """
+            puntos = [sp.sympify(x_0) for x_0 in self.discontinuidades]
+            ordenes = [k for k in range(n) if any((k, x_0) not in self._saltos for x_0 in puntos)]
+            if ordenes:
+                nuevos = saltos_por_tramos(self.f, self.x, puntos, ordenes, timeout, procesos)
+                for (k, i), salto in nuevos.items():
+                    self._saltos[k, puntos[i]] = salto
+            return [[self._saltos[k, x_0] for k in range(n)] for x_0 in puntos]
+
+        @instrumentado('DerivadaDiscontinua.derivada_discontinua_n', entrada=None)
+        def derivada_discontinua_n(self, n, estructurada=False, timeout=None, procesos=None):
+            """
+            Calcula la n-ésima derivada en sentido de distribuciones de una función con
+            múltiples discontinuidades x_0_i:
+
+            f^(n) = {f^(n)} + Σ_i Σ_k [[f^(k)]](x_0_i)·δ^(n-1-k)(x_0_i),  k = 0, ..., n-1
+
+            Los saltos se calculan en un pool de procesos y se reusan entre llamadas, de modo
+            que pedir el orden n después del n-1 solo calcula los saltos de f^(n-1). La parte
+            regular {f^(n)} no lleva los DiracDelta que SymPy genera al derivar Heaviside, sign
+            o Abs, ya que esos saltos están en los términos singulares; por eso las
+            discontinuidades deben incluir todos los puntos donde f salta.
 
             :param n: Orden de la derivada.
-            :return: La primera derivada de la función en sentido de distribuciones.
+            :param estructurada: Si es True devuelve una Distribucion en lugar de una expresión.
+            :param timeout: Tiempo máximo por grupo de saltos; si se supera se estiman numéricamente.
+            :param procesos: Número de procesos del pool.
+            :return: La n-ésima derivada de la función en sentido de distribuciones.
             """
-            #f' = {f'} + Σ [[f]](a_i)·δ(x₀ᵢ)
-
-            delta = Function('δ')  # símbolo de la delta de Dirac
-            derivada_regular = self.derivada_sin_precaucion_n(1)
-            suma_terminos = 0
-            for x_0 in self.discontinuidades:
-                salto = self.salto_funcion(self.f, x_0)
-                termino_delta = salto * delta(x_0)
-                suma_terminos += termino_delta
-            
-            return derivada_regular + suma_terminos
+            derivada_regular = _parte_regular(self.derivada_sin_precaucion_n(n))
+            terminos = []
+            for x_0, saltos in zip(self.discontinuidades, self.saltos_derivadas(n, timeout, procesos)):
+                for k, salto in enumerate(saltos):
+                    terminos.append(TerminoSingular(salto, x_0, n - 1 - k))
 
+            resultado = Distribucion(derivada_regular, terminos)
+            return resultado if estructurada else resultado.como_expresion(self.x)
 
-            
+
+def _parte_regular(derivada):
+    """
+    Derivada clásica: quita los términos DiracDelta (y sus derivadas) que aparecen al derivar
+    Heaviside, sign o Abs, que valen cero fuera de las discontinuidades.
+    """
+    if not isinstance(derivada, sp.Basic): #aproximación numérica
+        return derivada
+    return derivada.replace(lambda e: isinstance(e, sp.DiracDelta), lambda e: sp.S.Zero)
+
+
+def _coeficientes_taylor(g, h, N):
+    """
+    Coeficientes c_0, ..., c_N de la serie de Taylor de g en h = 0, o None si g no tiene serie
+    de Taylor (potencias fraccionarias, logaritmos, polos).
+    """
+    if g.is_rational_function(h):
+        numerador, denominador = sp.fraction(sp.together(g))
+        p = sp.Poly(numerador, h).all_coeffs()[::-1]
+        q = sp.Poly(denominador, h).all_coeffs()[::-1]
+        if q[0] == 0:
+            return None
+        p += [0] * (N + 1 - len(p))
+        #división de series: a_k = (p_k - sum_j q_j a_(k-j)) / q_0
+        a = []
+        for k in range(N + 1):
+            suma = p[k] - sum(q[j] * a[k - j] for j in range(1, min(k, len(q) - 1) + 1))
+            a.append(sp.cancel(suma / q[0]))
+        return a
+    serie = sp.series(g, h, 0, N + 1).removeO()
+    if not serie.is_polynomial(h):
+        return None
+    return [serie.coeff(h, k) for k in range(N + 1)]
@@ -0,0 +1,116 @@
+
+import numpy as np
+from perezoso import importar_perezoso
+sp = importar_perezoso('sympy')
+from math import factorial
+
+def derivada_numerica(f, x, x_0, n=1, metodo='richardson', h=None, niveles=5, tolerancia=1e-2,
+                      tolerancia_absoluta=1e-10):
+    """
+    Calcula numéricamente la n-ésima derivada de f en x_0 (un valor o un arreglo de valores).
+
+    La función se convierte a NumPy una sola vez y todos los puntos de las plantillas de
+    diferencias centradas (para todos los pasos y todos los x_0) se evalúan en una sola
+    llamada. Con metodo='richardson' se usan pasos h, h/2, ..., h/2^(niveles-1) y extrapolación
+    de Richardson; con metodo='complejo' se usa el paso complejo f'(x) = Im f(x + ih)/h, que
+    no sufre cancelación pero solo vale para n = 1 y f analítica.
+
+    Con Richardson el error se estima a partir de la tabla de extrapolación y del redondeo; si
+    en algún punto supera tolerancia·|f^(n)(x_0)| + tolerancia_absoluta la derivada no
+    convergió y se lanza ValueError en lugar de devolverla. Pasa, por ejemplo, con derivadas
+    de orden alto mucho menores que f (log(x + 2) en x_0 = 50), donde el redondeo domina.
+
+    Args:
+        f (sympy.Expr o function): Función a derivar; si es una función debe aceptar arreglos.
+        x (sympy.Symbol): Variable de la expresión (se ignora si f es una función).
+        x_0 (float o array): Punto o puntos donde se deriva.
+        n (int): Orden de la derivada.
+        metodo (str): 'richardson' o 'complejo'.
+        h (float): Paso inicial; por defecto se elige según n para que el paso más pequeño
+                   no sufra demasiado redondeo.
+        niveles (int): Número de pasos usados en la extrapolación (al menos 2).
+        tolerancia (float): Error relativo máximo aceptado; None para no comprobarlo.
+        tolerancia_absoluta (float): Error absoluto aceptado además del relativo, para
+                                     derivadas nulas o casi nulas.
+
+    Returns:
+        float o numpy.ndarray: La derivada en cada x_0.
+    """
+    if x_0 is None:
+        raise ValueError("Se necesita el punto x_0 para derivar numéricamente.")
+    g = sp.lambdify(x, f, 'numpy') if isinstance(f, sp.Basic) else f
+    puntos = np.asarray(x_0, dtype=float)
+    escalar = puntos.ndim == 0
+    puntos = puntos.reshape(-1)
+
+    if n == 0:
+        resultado = np.broadcast_to(np.asarray(g(puntos), dtype=float), puntos.shape)
+    elif metodo == 'complejo':
+        if n != 1:
+            raise ValueError("El paso complejo solo calcula la primera derivada.")
+        paso = 1e-20 * np.maximum(1.0, np.abs(puntos))
+        resultado = np.imag(g(puntos + 1j * paso)) / paso
+    elif metodo == 'richardson':
+        resultado, error = _richardson(g, puntos, n, h, niveles)
+        if tolerancia is not None:
+            no_converge = ~(error <= tolerancia * np.abs(resultado) + tolerancia_absoluta)
+            if no_converge.any():
+                i = np.flatnonzero(no_converge)[0]
+                raise ValueError(f"La derivada numérica de orden {n} no convergió en x_0 = {puntos[i]}: "
+                                 f"error estimado {error[i]:.3g} para el valor {resultado[i]:.6g}.")
+    else:
+        raise ValueError("El método debe ser 'richardson' o 'complejo'.")
+    return float(resultado[0]) if escalar else np.array(resultado, dtype=float)
+
+
+def pesos_centrados(n):
+    """
+    Desplazamientos y pesos de la diferencia centrada de orden 2 para la n-ésima derivada:
+    f^(n)(x) ~ sum_j w_j f(x + j h) / h^n.
+    """
+    p = (n + 1) // 2
+    desplazamientos = np.arange(-p, p + 1, dtype=float)
+    m = len(desplazamientos)
+    vandermonde = desplazamientos[None, :] ** np.arange(m)[:, None]
+    lado_derecho = np.zeros(m)
+    lado_derecho[n] = factorial(n)
+    return desplazamientos, np.linalg.solve(vandermonde, lado_derecho)
+
+
+def _richardson(g, puntos, n, h, niveles):
+    """
+    Extrapolación de Richardson de las diferencias centradas.
+
+    Returns:
+        tuple: La derivada en cada punto y una estimación de su error (la diferencia con la
+               extrapolación que no usa el paso más pequeño, más el redondeo de los valores de
+               f y de las abscisas amplificado por los pesos y 1/h^n).
+    """
+    if niveles < 2:
+        raise ValueError("Se necesitan al menos 2 niveles para estimar el error.")
+    desplazamientos, pesos = pesos_centrados(n)
+    if h is None:
+        #el redondeo crece como eps/h^n: el paso más pequeño es ~ 10^(-16/(n+3)); no depende de
+        #|x_0|, y es una potencia de 2 para que las abscisas x_0 + j·h sean exactas
+        h = 2.0 ** np.round(np.log2(10.0 ** (-16 / (n + 3)))) * 2.0 ** (niveles - 1)
+    h = np.broadcast_to(np.asarray(h, dtype=float), puntos.shape)
+    pasos = h[:, None] / 2.0 ** np.arange(niveles)[None, :]
+
+    #todas las plantillas de todos los pasos y puntos en una sola evaluación
+    malla = puntos[:, None, None] + pasos[:, :, None] * desplazamientos[None, None, :]
+    valores = np.broadcast_to(np.asarray(g(malla), dtype=float), malla.shape)
+    tabla = (valores @ pesos) / pasos ** n
+
+    #el error de la diferencia centrada tiene solo potencias pares de h
+    for k in range(1, niveles):
+        anterior = tabla[:, 0] #extrapolación sin el paso más pequeño
+        factor = 4.0 ** k
+        tabla = (factor * tabla[:, 1:] - tabla[:, :-1]) / (factor - 1)
+    truncamiento = np.abs(tabla[:, -1] - anterior)
+
+    amplitud = np.abs(valores).max(axis=(1, 2))
+    pendiente = np.abs(np.diff(valores[:, 0, :], axis=1)).max(axis=1) / h
+    desvio = (malla[:, -1, :] - puntos[:, None]) - pasos[:, -1, None] * desplazamientos
+    redondeo = (np.finfo(float).eps * amplitud * np.abs(pesos).sum()
+                + pendiente * (np.abs(desvio) @ np.abs(pesos))) / pasos[:, -1] ** n
+    return tabla[:, -1], truncamiento + redondeo
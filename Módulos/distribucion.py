@@ -0,0 +1,163 @@
+
+import numpy as np
+from perezoso import importar_perezoso
+sp = importar_perezoso('sympy')
+import backend
+from accion_locint import Accion_LocInt
+
+class TerminoSingular:
+    """
+    Término singular coeficiente·δ^(orden) soportado en un punto x_0 (soporte numérico o
+    simbólico) o en una superficie (soporte δ_s(x, y, z) o una MallaSuperficie). En una
+    superficie, orden 1 representa la capa dipolar nabla·(n coeficiente δ_s).
+    """
+    __slots__ = ('coeficiente', 'soporte', 'orden')
+
+    def __init__(self, coeficiente, soporte, orden=0):
+        self.coeficiente = coeficiente
+        self.soporte = soporte
+        self.orden = orden
+
+    def escalar(self, c):
+        """
+        Devuelve el término multiplicado por c.
+        """
+        return TerminoSingular(self.coeficiente * c, self.soporte, self.orden)
+
+    def superficial(self):
+        """
+        Indica si el soporte es una superficie.
+        """
+        if hasattr(self.soporte, 'accion_salto'): #MallaSuperficie
+            return True
+        return (isinstance(self.soporte, sp.core.function.AppliedUndef)
+                and self.soporte.func.__name__ == 'δ_s')
+
+    def __repr__(self):
+        return f'TerminoSingular({self.coeficiente}, {self.soporte}, orden={self.orden})'
+
+
+class Distribucion:
+    """
+    Resultado de un operador en sentido de distribuciones: una parte regular (expresión o
+    Matrix de SymPy) y una lista de términos singulares. Sumar y escalar cuesta lo que el
+    número de términos, sin reconstruir árboles de SymPy, y la acción sobre una función test
+    se evalúa término a término.
+    """
+    __slots__ = ('regular', 'singulares')
+
+    def __init__(self, regular=0, singulares=()):
+        self.regular = regular
+        self.singulares = list(singulares)
+
+    def __add__(self, otra):
+        if isinstance(otra, Distribucion):
+            return Distribucion(self.regular + otra.regular, self.singulares + otra.singulares)
+        return Distribucion(self.regular + otra, self.singulares)
+
+    __radd__ = __add__
+
+    def __mul__(self, c):
+        return Distribucion(self.regular * c, [t.escalar(c) for t in self.singulares])
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return self * -1
+
+    def __sub__(self, otra):
+        return self + (-otra)
+
+    def __repr__(self):
+        return f'Distribucion({self.regular}, {self.singulares})'
+
+    def agrupar(self):
+        """
+        Suma los coeficientes de los términos con el mismo soporte y orden.
+        """
+        grupos = {}
+        for t in self.singulares:
+            clave = (id(t.soporte) if hasattr(t.soporte, 'accion_salto') else t.soporte, t.orden)
+            if clave in grupos:
+                grupos[clave].coeficiente += t.coeficiente
+            else:
+                grupos[clave] = TerminoSingular(t.coeficiente, t.soporte, t.orden)
+        return Distribucion(self.regular, grupos.values())
+
+    def como_expresion(self, x=None):
+        """
+        Convierte a una sola expresión de SymPy, con δ(x_0) para los soportes puntuales
+        (y sus derivadas como Subs(Derivative(δ(x), x, k), x, x_0)) y δ_s para los
+        superficiales.
+        """
+        delta = sp.Function('δ')
+        x = sp.Dummy('x') if x is None else x
+        expresion = self.regular
+        for t in self.singulares:
+            if t.superficial():
+                soporte = t.soporte if isinstance(t.soporte, sp.Basic) else sp.Function('δ_s')(*sp.symbols('x y z'))
+                singular = soporte if t.orden == 0 else sp.Derivative(soporte, sp.Symbol('n'), t.orden)
+            elif t.orden == 0:
+                singular = delta(t.soporte)
+            else:
+                singular = sp.Subs(sp.Derivative(delta(x), (x, t.orden)), x, t.soporte)
+            expresion = expresion + t.coeficiente * singular
+        return expresion
+
+    def accion(self, f_test, x=None, limites=None, malla=None, variables=None):
+        """
+        Evalúa la acción sobre la función test f_test.
+
+        Args:
+            f_test (sympy.Expr): Función test.
+            x (sympy.Symbol): Variable de los términos con soporte puntual.
+            limites (list): Límites para integrar la parte regular con Accion_LocInt; se
+                            puede omitir si la parte regular es cero.
+            malla (MallaSuperficie): Superficie de los términos con soporte δ_s.
+            variables (list): Variables de integración de la parte regular y de la malla.
+
+        Returns:
+            Resultado simbólico o numérico (vector si los coeficientes son Matrix).
+        """
+        resultado = 0
+        if not _es_cero(self.regular):
+            if limites is None:
+                raise ValueError("Se necesitan los límites para integrar la parte regular.")
+            componentes = list(self.regular) if isinstance(self.regular, sp.MatrixBase) else [self.regular]
+            valores = [Accion_LocInt(c, f_test, len(limites), limites, variables=variables)[0]
+                       for c in componentes]
+            resultado = np.array(valores) if len(valores) > 1 else valores[0]
+
+        for t in self.singulares:
+            if t.superficial():
+                superficie = t.soporte if hasattr(t.soporte, 'accion_salto') else malla
+                if superficie is None:
+                    raise ValueError("Se necesita una MallaSuperficie para los términos con δ_s.")
+                resultado = resultado + _accion_superficial(t, f_test, superficie, variables)
+            else:
+                if x is None:
+                    raise ValueError("Se necesita la variable x para los términos puntuales.")
+                derivada = backend.diff(f_test, x, t.orden) if t.orden else f_test
+                resultado = resultado + t.coeficiente * (-1)**t.orden * backend.subs(derivada, {x: t.soporte})
+        return resultado
+
+
+def _es_cero(valor):
+    if isinstance(valor, sp.MatrixBase):
+        return valor.is_zero_matrix is True
+    return sp.sympify(valor) == 0
+
+
+def _accion_superficial(termino, f_test, malla, variables):
+    coeficiente = malla.evaluar(termino.coeficiente, variables)
+    if termino.orden == 0:
+        valor = malla.integrar(coeficiente, [f_test], variables)[0]
+    elif termino.orden == 1:
+        variables = sp.symbols('x y z') if variables is None else variables
+        gradiente = malla.evaluar(sp.Matrix([sp.diff(f_test, v) for v in variables]), variables)
+        derivada_normal = np.einsum('qi,qi->q', malla.normales, gradiente)
+        peso = malla.pesos * derivada_normal
+        valor = -(peso[:, None] * coeficiente).sum(axis=0) if coeficiente.ndim == 2 else -(peso * coeficiente).sum()
+    else:
+        raise NotImplementedError("Solo hay términos superficiales de orden 0 y 1.")
+    return valor
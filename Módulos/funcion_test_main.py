@@ -1,6 +1,27 @@
 
-from Módulos.deltadirac_1d import DeltaDirac1D
-from sympy import symbols, Abs, sqrt, Expr, lambdify
+import numpy as np
+import backend
+import instrumentacion
+from compilador import compilar_expresiones
+from perezoso import importar_perezoso
+sp = importar_perezoso('sympy')
+
+
+class FuncionTest:
+    """
+    Símbolos de las distribuciones singulares que aparecen en los operadores en sentido de
+    distribuciones. Su acción numérica sobre funciones test se calcula con MallaSuperficie.
+    """
+
+    @staticmethod
+    def delta_s():
+        """
+        Delta superficial δ_s soportada en la superficie de discontinuidad, como función
+        simbólica de (x, y, z).
+        Returns:
+            sympy.Function: δ_s(x, y, z).
+        """
+        return sp.Function('δ_s')(*sp.symbols('x y z'))
 
 
 class FuncionTestCartesiana:
@@ -22,7 +43,8 @@ class FuncionTestCartesiana:
     """
     def __init__(self, x0):#inicializa clase
         self.x0 = x0
-        self.expr, self.vars = self._build_expression(x0)
+        self.expr, self.vars = self.build(x0)
+        self._kernel = None #función numérica compilada, se construye una sola vez
 
     def build(self, x0):
         """
@@ -35,26 +57,26 @@ class FuncionTestCartesiana:
         """
         if isinstance(x0, (int, float)): #este if verifica la dimensión de x0
             #caso unidimensional numérico
-            x = symbols('x')
-            expr = 1 / Abs(x - x0)
+            x = sp.symbols('x')
+            expr = 1 / sp.Abs(x - x0)
             return expr, (x,)
 
-        elif isinstance(x0, Expr):
+        elif isinstance(x0, sp.Expr):
             #caso unidimensional simbólico
-            x = symbols('x')
-            expr = 1 / Abs(x - x0)
+            x = sp.symbols('x')
+            expr = 1 / sp.Abs(x - x0)
             return expr, (x,)
 
         elif isinstance(x0, (list, tuple)):
             #caso multidimensional
             n = len(x0) #dimensión 2 o 3, no más
             if n == 2:
-                x, y = symbols('x y')
-                expr = 1 / sqrt((x - x0[0])**2 + (y - x0[1])**2)
+                x, y = sp.symbols('x y')
+                expr = 1 / sp.sqrt((x - x0[0])**2 + (y - x0[1])**2)
                 return expr, (x, y)
             elif n == 3:
-                x, y, z = symbols('x y z')
-                expr = 1 / sqrt((x - x0[0])**2 + (y - x0[1])**2 + (z - x0[2])**2)
+                x, y, z = sp.symbols('x y z')
+                expr = 1 / sp.sqrt((x - x0[0])**2 + (y - x0[1])**2 + (z - x0[2])**2)
                 return expr, (x, y, z)
             else:
                 raise ValueError("Solo se permiten 1, 2 o 3 dimensiones.")
@@ -78,7 +100,7 @@ class FuncionTestCartesiana:
         Returns:
             float: El resultado de la evaluación de la función test.
         """
-        return self.expr.subs(kwargs).evalf()
+        return backend.evaluar(self.expr, kwargs)
 
     def como_funcion(self):
         """
@@ -87,14 +109,49 @@ class FuncionTestCartesiana:
             function: Una función anónima que toma los valores de las variables 
                       y devuelve el resultado de la evaluación de la función test.
         """
-        return lambdify(self.vars, self.expr)
+        if self._kernel is None:
+            self._kernel = instrumentacion.medir('lambdify', sp.lambdify, self.vars, self.expr, 'numpy',
+                                                 entrada=self.expr)
+        return self._kernel
 
-#ejemplos de uso  
-f = FuncionTestCartesiana([3,8,5]) #crea el objetote como tal
-
-#y dsp llamas a cada metodo, q ya esta hecho
-print(f.symbolic())              # ➜ 1/|x - 3|
-print(f.evaluate(x=5))           # ➜ 0.5
-func = f.as_function()
-print(func(3,1,4))                  # ➜ 1/7 = 0.142857...
+    def compilar(self):
+        """
+        Compila la función test en un KernelCompilado, que se puede guardar con
+        numerico.guardar_kernels y cargar en otro proceso sin importar SymPy.
+        Returns:
+            KernelCompilado: Recibe puntos (N, d) y devuelve (N, 1).
+        """
+        if self.expr.free_symbols - set(self.vars):
+            raise ValueError("x0 debe ser numérico para compilar la función test.")
+        return compilar_expresiones([self.expr], self.vars, 'funcion_test')
 
+    @instrumentacion.instrumentado('FuncionTestCartesiana.evaluar_lote', entrada=None)
+    def evaluar_lote(self, puntos, tam_bloque=1 << 16, salida=None):
+        """
+        Evalúa la función test en muchos puntos de observación con la función compilada
+        (guardada en la instancia), procesando los puntos por bloques para acotar la memoria.
+        Args:
+            puntos (array): Arreglo de forma (N, d) con los puntos, puede ser un np.memmap
+                            para N mayor que la memoria disponible. En 1D también se acepta (N,).
+            tam_bloque (int): Número de puntos evaluados por bloque.
+            salida (array): Arreglo de forma (N,) donde se escriben los resultados, por ejemplo
+                            un np.memmap. Si no se da, se crea uno en memoria.
+        Returns:
+            numpy.ndarray: Arreglo de forma (N,) con los valores de la función test.
+        """
+        d = len(self.vars)
+        if self.expr.free_symbols - set(self.vars):
+            raise ValueError("x0 debe ser numérico para evaluar en lote.")
+        if puntos.ndim == 1 and d == 1:
+            puntos = puntos.reshape(-1, 1)
+        if puntos.ndim != 2 or puntos.shape[1] != d:
+            raise ValueError(f"Los puntos deben tener forma (N, {d}).")
+
+        kernel = self.como_funcion()
+        N = puntos.shape[0]
+        if salida is None:
+            salida = np.empty(N)
+        for inicio in range(0, N, tam_bloque):
+            bloque = np.asarray(puntos[inicio:inicio + tam_bloque], dtype=float)
+            salida[inicio:inicio + len(bloque)] = kernel(*bloque.T)
+        return salida
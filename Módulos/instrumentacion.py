@@ -0,0 +1,153 @@
+
+import json
+import time
+import functools
+import threading
+from perezoso import importar_perezoso
+sp = importar_perezoso('sympy')
+
+_activo = None #perfil activo; None significa que la instrumentación está apagada
+
+
+class Perfil:
+    """
+    Perfil de las operaciones costosas (diff, subs, limit, simplify, lambdify, cuadratura y los
+    operadores en sentido de distribuciones). Se usa como gestor de contexto:
+
+        with Perfil() as perfil:
+            OperadoresDiferenciales.Laplaciano(...).laplaciano_isod()
+        print(perfil.reporte())
+
+    Por operación se guardan el número de llamadas, el tiempo de reloj (inclusivo: una
+    operación que llama a otras incluye su tiempo) y, si contar_operaciones es True, el
+    count_ops de la expresión de entrada y del resultado, para ver si una expresión explota de
+    tamaño. Solo se registran las llamadas del proceso actual, no las de los pools de procesos.
+    Fuera del contexto cada punto instrumentado cuesta una comparación con None.
+    """
+
+    def __init__(self, contar_operaciones=True):
+        """
+        Inicializa la clase Perfil.
+
+        :param contar_operaciones: Si es False no se calcula count_ops (que también cuesta).
+        """
+        self.contar_operaciones = contar_operaciones
+        self.registros = {}
+        self._anterior = None
+        self._candado = threading.Lock()
+
+    def __enter__(self):
+        global _activo
+        self._anterior, _activo = _activo, self
+        return self
+
+    def __exit__(self, *excepcion):
+        global _activo
+        _activo = self._anterior
+        return False
+
+    def medir(self, operacion, funcion, args, kwargs, entrada=None):
+        """
+        Ejecuta funcion(*args, **kwargs) y registra su tiempo y el tamaño de entrada y salida.
+        """
+        ops_entrada = _contar(entrada) if self.contar_operaciones else None
+        inicio = time.perf_counter()
+        resultado = funcion(*args, **kwargs)
+        tiempo = time.perf_counter() - inicio
+        ops_salida = _contar(resultado) if self.contar_operaciones else None
+        self.registrar(operacion, tiempo, ops_entrada, ops_salida)
+        return resultado
+
+    def registrar(self, operacion, tiempo, ops_entrada=None, ops_salida=None):
+        """
+        Agrega una llamada de la operación al perfil.
+        """
+        with self._candado:
+            r = self.registros.get(operacion)
+            if r is None:
+                r = self.registros[operacion] = {'llamadas': 0, 'tiempo': 0.0, 'tiempo_max': 0.0,
+                                                 'ops_entrada': 0, 'ops_salida': 0,
+                                                 'crecimiento_max': None}
+            r['llamadas'] += 1
+            r['tiempo'] += tiempo
+            r['tiempo_max'] = max(r['tiempo_max'], tiempo)
+            if ops_entrada is not None:
+                r['ops_entrada'] += ops_entrada
+            if ops_salida is not None:
+                r['ops_salida'] += ops_salida
+            if ops_entrada is not None and ops_salida is not None:
+                crecimiento = (ops_salida + 1) / (ops_entrada + 1)
+                r['crecimiento_max'] = max(r['crecimiento_max'] or 0, crecimiento)
+
+    def reporte(self):
+        """
+        Tabla de texto con las operaciones ordenadas por tiempo total.
+        """
+        ancho = max([len('operacion')] + [len(o) for o in self.registros])
+        lineas = [f"{'operacion':{ancho}s} {'llamadas':>9s} {'tiempo [s]':>11s} {'max [s]':>10s} "
+                  f"{'ops entrada':>12s} {'ops salida':>11s} {'crec. max':>10s}"]
+        for operacion, r in sorted(self.registros.items(), key=lambda par: -par[1]['tiempo']):
+            crecimiento = '' if r['crecimiento_max'] is None else f"{r['crecimiento_max']:.2f}"
+            lineas.append(f"{operacion:{ancho}s} {r['llamadas']:9d} {r['tiempo']:11.4f} "
+                          f"{r['tiempo_max']:10.4f} {r['ops_entrada']:12d} {r['ops_salida']:11d} "
+                          f"{crecimiento:>10s}")
+        return '\n'.join(lineas)
+
+    def exportar(self, ruta):
+        """
+        Guarda los registros en un archivo JSON.
+        """
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(self.registros, archivo, indent=1)
+
+
+def perfil_activo():
+    """
+    Devuelve el perfil activo o None si la instrumentación está apagada.
+    """
+    return _activo
+
+
+def medir(operacion, funcion, *args, entrada=None, **kwargs):
+    """
+    Llama a funcion(*args, **kwargs) registrándola como `operacion` si hay un perfil activo.
+    entrada es la expresión cuyo count_ops se registra como tamaño de la entrada.
+    """
+    if _activo is None:
+        return funcion(*args, **kwargs)
+    return _activo.medir(operacion, funcion, args, kwargs, entrada)
+
+
+def instrumentado(operacion, entrada=0):
+    """
+    Decorador que registra cada llamada de la función como `operacion` si hay un perfil
+    activo. entrada es la posición del argumento cuyo count_ops se registra (None para no
+    registrar la entrada, por ejemplo en métodos).
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if _activo is None:
+                return funcion(*args, **kwargs)
+            valor = args[entrada] if entrada is not None and entrada < len(args) else None
+            return _activo.medir(operacion, funcion, args, kwargs, valor)
+        return envoltura
+    return decorador
+
+
+def _contar(valor):
+    """
+    count_ops de una expresión, Matrix, lista o Distribucion; None si no es simbólico.
+    """
+    if isinstance(valor, (sp.Basic, sp.MatrixBase)):
+        try:
+            return int(sp.count_ops(valor))
+        except Exception:
+            return None
+    if isinstance(valor, (list, tuple)):
+        cuentas = [_contar(v) for v in valor]
+        cuentas = [c for c in cuentas if c is not None]
+        return sum(cuentas) if cuentas else None
+    if hasattr(valor, 'regular') and hasattr(valor, 'singulares'): #Distribucion
+        return _contar([valor.regular] + [t.coeficiente for t in valor.singulares])
+    return None
@@ -0,0 +1,299 @@
+
+import os
+import sys
+import json
+import time
+import argparse
+from types import SimpleNamespace
+from collections import deque
+import multiprocessing as mp
+from multiprocessing.connection import wait
+import numpy as np
+from perezoso import importar_perezoso
+sp = importar_perezoso('sympy')
+from deltadirac_1d import DeltaDirac
+from op_dif import OperadoresDiferenciales, salto_funcion
+from saltos import calcular_saltos, respaldos_usados
+
+try:
+    import resource
+except ImportError: #Windows: no se puede limitar la memoria
+    resource = None
+
+def ejecutar_lote(entrada, salida, procesos=None, timeout=60.0, memoria=None, reintentos=1):
+    """
+    Resuelve un lote de ejercicios leídos de un archivo JSONL (uno por línea) y escribe los
+    resultados, también en JSONL, conforme van terminando.
+
+    Cada ejercicio se ejecuta en su propio proceso, con a lo sumo `procesos` a la vez. Si un
+    ejercicio supera timeout segundos se mata su proceso, y si se queda sin tiempo o sin
+    memoria se reintenta hasta `reintentos` veces con los respaldos numéricos: límites
+    laterales con limite_numerico y derivadas de la delta con derivada_numerica. Los errores
+    (una expresión mal escrita, una operación desconocida) no se reintentan porque volverían a
+    ocurrir, y tampoco los operadores vectoriales sin respaldo numérico (ver _reintentable).
+    Un ejercicio problemático nunca detiene a los demás.
+
+    Cada resultado indica en "metodo" si se obtuvo de forma exacta ('simbolico') o con algún
+    respaldo numérico ('numerico'); en los ejercicios que fallan es None.
+
+    Formato de un ejercicio (las expresiones son cadenas que entiende sympify, los vectores
+    listas de cadenas):
+        {"id": 1, "operacion": "accion_delta", "funcion": "exp(-x**2)", "punto": "0", "n": 2}
+        {"operacion": "derivada_discontinua", "funcion": "...", "discontinuidades": ["1"], "n": 2}
+        {"operacion": "salto", "funcion": "...", "punto": "1"}
+        {"operacion": "gradiente", "funcion": "...", "normal": ["x", "y", "z"], "salto": "..."}
+    Las operaciones vectoriales son gradiente, divergencia, rotacional y laplaciano (este
+    último necesita "salto_derivada_normal"); si no se da "salto" se calcula con
+    op_dif.salto_funcion, en el "punto" [x, y, z] si se da (sin punto el reintento numérico
+    no puede estimar un salto que depende de x, y, z).
+
+    Args:
+        entrada (str): Archivo JSONL de ejercicios, o '-' para la entrada estándar.
+        salida (str): Archivo JSONL de resultados, o '-' para la salida estándar.
+        procesos (int): Ejercicios simultáneos; por defecto el número de CPUs.
+        timeout (float): Tiempo máximo por intento en segundos.
+        memoria (float): Límite de espacio de direcciones por proceso en MiB (solo Unix).
+        reintentos (int): Intentos numéricos después de un fallo.
+
+    Returns:
+        dict: Número de ejercicios por estado ('ok', 'timeout', 'memoria', 'error').
+    """
+    procesos = procesos or os.cpu_count() or 1
+    contexto = mp.get_context('fork' if 'fork' in mp.get_all_start_methods() else None)
+    resumen = {'ok': 0, 'timeout': 0, 'memoria': 0, 'error': 0}
+
+    archivo_entrada = sys.stdin if entrada == '-' else open(entrada, encoding='utf-8')
+    archivo_salida = sys.stdout if salida == '-' else open(salida, 'w', encoding='utf-8')
+    try:
+        ejercicios = _leer_ejercicios(archivo_entrada)
+        pendientes = deque() #reintentos, antes que los ejercicios nuevos
+        activos = {}
+
+        def escribir(tarea, estado, resultado, metodo=None):
+            resumen[estado] += 1
+            ejercicio = tarea.ejercicio or {}
+            registro = {'indice': tarea.indice, 'id': ejercicio.get('id'),
+                        'operacion': ejercicio.get('operacion'), 'estado': estado,
+                        'resultado': resultado, 'metodo': metodo,
+                        'intentos': tarea.intento + 1, 'tiempo': round(tarea.tiempo, 6)}
+            archivo_salida.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            archivo_salida.flush()
+
+        def terminar(conexion, estado, resultado, metodo=None):
+            tarea = activos.pop(conexion)
+            tarea.tiempo += time.monotonic() - tarea.inicio
+            conexion.close()
+            if estado in ('timeout', 'memoria') and tarea.intento < reintentos \
+                    and _reintentable(tarea.ejercicio):
+                tarea.intento += 1
+                pendientes.append(tarea)
+            else:
+                escribir(tarea, estado, resultado, metodo)
+
+        while True:
+            while len(activos) < procesos:
+                tarea = pendientes.popleft() if pendientes else next(ejercicios, None)
+                if tarea is None:
+                    break
+                if tarea.ejercicio is None: #línea que no es un objeto JSON válido
+                    escribir(tarea, 'error', tarea.error)
+                    continue
+                timeout_interno = timeout / 4 if tarea.intento else None
+                lectura, escritura = contexto.Pipe(duplex=False)
+                tarea.proceso = contexto.Process(target=_trabajador, daemon=False,
+                                                 args=(escritura, tarea.ejercicio, timeout_interno, memoria))
+                tarea.proceso.start()
+                escritura.close()
+                tarea.inicio = time.monotonic()
+                activos[lectura] = tarea
+            if not activos:
+                break
+
+            plazo = min(t.inicio for t in activos.values()) + timeout - time.monotonic()
+            for conexion in wait(list(activos), timeout=max(plazo, 0)):
+                proceso = activos[conexion].proceso
+                try:
+                    estado, resultado, metodo = conexion.recv()
+                    proceso.join()
+                except EOFError: #el proceso murió sin responder
+                    proceso.join()
+                    #con límite de memoria, morir por una señal suele ser no poder reservarla
+                    estado = 'memoria' if memoria and proceso.exitcode < 0 else 'error'
+                    resultado, metodo = f'El proceso terminó con código {proceso.exitcode}', None
+                terminar(conexion, estado, resultado, metodo)
+
+            ahora = time.monotonic()
+            for conexion, tarea in list(activos.items()):
+                if ahora - tarea.inicio >= timeout:
+                    tarea.proceso.kill()
+                    tarea.proceso.join()
+                    terminar(conexion, 'timeout', f'Se superaron {timeout} s')
+    finally:
+        if archivo_entrada is not sys.stdin:
+            archivo_entrada.close()
+        if archivo_salida is not sys.stdout:
+            archivo_salida.close()
+    return resumen
+
+
+def _leer_ejercicios(archivo):
+    """
+    Genera las tareas del lote leyendo el archivo línea por línea.
+    """
+    for indice, linea in enumerate(archivo):
+        if not linea.strip():
+            continue
+        tarea = SimpleNamespace(indice=indice, ejercicio=None, error=None, intento=0, tiempo=0.0,
+                                inicio=None, proceso=None)
+        try:
+            ejercicio = json.loads(linea)
+        except json.JSONDecodeError as error:
+            tarea.error = f'JSONDecodeError: {error}'
+        else:
+            if isinstance(ejercicio, dict):
+                tarea.ejercicio = ejercicio
+            else:
+                tarea.error = 'Cada línea debe ser un objeto JSON.'
+        yield tarea
+
+
+def _reintentable(ejercicio):
+    """
+    Si el reintento de un ejercicio tiene un camino numérico distinto del primer intento.
+    Los operadores vectoriales solo lo tienen cuando hay que calcular el salto en un punto
+    (con el respaldo de calcular_saltos); con el salto dado, o sin punto donde estimarlo, el
+    reintento repetiría el mismo cálculo simbólico.
+    """
+    if ejercicio.get('operacion') not in _CLASES and ejercicio.get('operacion') != 'laplaciano':
+        return True
+    return 'salto' not in ejercicio and 'punto' in ejercicio
+
+
+def _trabajador(conexion, ejercicio, timeout_interno, memoria):
+    """
+    Resuelve un ejercicio en un proceso aparte y manda (estado, resultado, metodo) por la
+    conexión.
+    """
+    if memoria and resource is not None:
+        limite = int(memoria * 2**20)
+        resource.setrlimit(resource.RLIMIT_AS, (limite, limite))
+    try:
+        operacion = ejercicio.get('operacion')
+        if operacion not in _OPERACIONES:
+            raise ValueError(f"Operación desconocida: {operacion}. Opciones: {list(_OPERACIONES)}")
+        resultado, metodo = _OPERACIONES[operacion](ejercicio, timeout_interno)
+        respuesta = ('ok', _serializar(resultado), metodo)
+    except MemoryError:
+        respuesta = ('memoria', 'MemoryError', None)
+    except Exception as error:
+        respuesta = ('error', f'{type(error).__name__}: {error}', None)
+    conexion.send(respuesta)
+    conexion.close()
+
+
+def _simbolos():
+    """
+    Símbolos x, y, z para sympify (una función y no una constante para no cargar SymPy al
+    importar el módulo).
+    """
+    return {nombre: sp.Symbol(nombre) for nombre in ('x', 'y', 'z')}
+
+
+def _expresion(texto):
+    if isinstance(texto, list):
+        return sp.Matrix([_expresion(t) for t in texto])
+    return sp.sympify(texto, locals=_simbolos())
+
+
+def _serializar(resultado):
+    if isinstance(resultado, np.ndarray):
+        return resultado.tolist()
+    if isinstance(resultado, (np.floating, np.integer)):
+        return resultado.item()
+    if isinstance(resultado, (int, float)):
+        return resultado
+    return str(resultado)
+
+
+def _metodo(respaldos_antes):
+    """
+    'numerico' si algún salto se estimó con el respaldo numérico desde respaldos_antes.
+    """
+    return 'numerico' if respaldos_usados() > respaldos_antes else 'simbolico'
+
+
+def _accion_delta(ejercicio, timeout_interno):
+    f = _expresion(ejercicio['funcion'])
+    x = _expresion(ejercicio.get('variable', 'x'))
+    x_0 = _expresion(ejercicio['punto'])
+    n = ejercicio.get('n', 0)
+    delta = DeltaDirac(f, x, x_0)
+    if timeout_interno is not None: #reintento numérico
+        return float(delta.derivada_numerica(n, float(x_0))), 'numerico'
+    return delta.derivada(n), 'simbolico'
+
+
+def _derivada_discontinua(ejercicio, timeout_interno):
+    f = _expresion(ejercicio['funcion'])
+    x = _expresion(ejercicio.get('variable', 'x'))
+    discontinuidades = [_expresion(a) for a in ejercicio['discontinuidades']]
+    derivada = DeltaDirac.DerivadaDiscontinua(f, x, discontinuidades)
+    antes = respaldos_usados()
+    resultado = derivada.derivada_discontinua_n(ejercicio.get('n', 1), timeout=timeout_interno, procesos=1)
+    return resultado, _metodo(antes)
+
+
+def _salto(ejercicio, timeout_interno):
+    f = _expresion(ejercicio['funcion'])
+    x = _expresion(ejercicio.get('variable', 'x'))
+    x_0 = _expresion(ejercicio['punto'])
+    antes = respaldos_usados()
+    return calcular_saltos([(f, x, x_0)], timeout=timeout_interno, procesos=1)[0], _metodo(antes)
+
+
+def _operador(ejercicio, timeout_interno):
+    nombre = ejercicio['operacion']
+    funcion = _expresion(ejercicio['funcion'])
+    normal = _expresion(ejercicio['normal'])
+    antes = respaldos_usados()
+    if 'salto' in ejercicio:
+        salto = _expresion(ejercicio['salto'])
+    else:
+        punto = dict(zip(sp.symbols('x y z'), _expresion(ejercicio['punto']))) if 'punto' in ejercicio else None
+        salto = salto_funcion(funcion, normal, timeout_interno, 1, punto)
+
+    if nombre == 'laplaciano':
+        operador = OperadoresDiferenciales.Laplaciano(funcion, normal, salto,
+                                                       _expresion(ejercicio['salto_derivada_normal']))
+    else:
+        operador = _CLASES[nombre](funcion, normal, salto)
+    return getattr(operador, nombre + '_isod')(), _metodo(antes)
+
+
+_CLASES = {'gradiente': OperadoresDiferenciales.Gradiente,
+           'divergencia': OperadoresDiferenciales.Divergencia,
+           'rotacional': OperadoresDiferenciales.Rotacional}
+
+_OPERACIONES = {'accion_delta': _accion_delta, 'derivada_discontinua': _derivada_discontinua,
+                'salto': _salto, 'gradiente': _operador, 'divergencia': _operador,
+                'rotacional': _operador, 'laplaciano': _operador}
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description='Resuelve un lote de ejercicios en JSONL con '
+                                                 'tiempo y memoria limitados por ejercicio.')
+    parser.add_argument('entrada', help="Archivo JSONL de ejercicios ('-' para stdin).")
+    parser.add_argument('salida', help="Archivo JSONL de resultados ('-' para stdout).")
+    parser.add_argument('--procesos', type=int, default=None, help='Ejercicios simultáneos.')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Segundos por intento.')
+    parser.add_argument('--memoria', type=float, default=None, help='MiB por proceso (Unix).')
+    parser.add_argument('--reintentos', type=int, default=1, help='Reintentos numéricos.')
+    opciones = parser.parse_args(argumentos)
+    resumen = ejecutar_lote(opciones.entrada, opciones.salida, opciones.procesos, opciones.timeout,
+                            opciones.memoria, opciones.reintentos)
+    print(json.dumps(resumen), file=sys.stderr)
+    return 0 if resumen['ok'] == sum(resumen.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
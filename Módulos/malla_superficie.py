@@ -0,0 +1,168 @@
+
+import numpy as np
+from perezoso import importar_perezoso
+sp = importar_perezoso('sympy')
+from compilador import compilar_expresiones
+from cache_simbolico import clave_cache
+
+#las 6 permutaciones de ejes dan los 6 tetraedros de un cubo que comparten la diagonal 0-7
+_TETRAEDROS = np.array([[0, 1 << a, (1 << a) | (1 << b), 7]
+                        for a, b in [(0, 1), (0, 2), (1, 0), (1, 2), (2, 0), (2, 1)]])
+_ESQUINAS = np.array([[c & 1, (c >> 1) & 1, (c >> 2) & 1] for c in range(8)])
+#para cada vértice aislado de un tetraedro, los otros tres
+_OTROS = np.array([[j for j in range(4) if j != i] for i in range(4)])
+
+
+class MallaSuperficie:
+    """
+    Triangulación de una superficie de discontinuidad con sus puntos de cuadratura, normales y
+    pesos, para evaluar numéricamente la acción de términos con delta superficial:
+
+    :math:`<n [[f]] \\delta_s, \\varphi> = \\oint n [[f]] \\varphi \\, dS`
+
+    La malla, las normales y los pesos se calculan una sola vez; los valores de saltos y
+    funciones test en los puntos de cuadratura también se guardan, de modo que repetir una
+    acción sobre la misma superficie solo cuesta productos punto.
+    """
+
+    def __init__(self, triangulos, normal=None):
+        """
+        Inicializa la clase MallaSuperficie.
+
+        :param triangulos: Arreglo (T, 3, 3) con los vértices de cada triángulo.
+        :param normal: Función que recibe puntos (Q, 3) y devuelve las normales unitarias
+                       (Q, 3); si no se da, se usa la normal de cada triángulo.
+        """
+        self.triangulos = np.asarray(triangulos, dtype=float)
+        #regla de los puntos medios de las aristas (exacta para polinomios de grado 2)
+        v0, v1, v2 = self.triangulos[:, 0], self.triangulos[:, 1], self.triangulos[:, 2]
+        cruz = np.cross(v1 - v0, v2 - v0)
+        areas = np.linalg.norm(cruz, axis=1) / 2
+        self.puntos = np.concatenate([(v0 + v1) / 2, (v1 + v2) / 2, (v2 + v0) / 2])
+        self.pesos = np.tile(areas / 3, 3)
+        if normal is None:
+            unitaria = cruz / np.where(areas > 0, 2 * areas, 1)[:, None]
+            self.normales = np.tile(unitaria, (3, 1))
+        else:
+            self.normales = np.asarray(normal(self.puntos), dtype=float)
+        self._valores = {}
+
+    @classmethod
+    def desde_nivel(cls, nivel, limites, resolucion=64, variables=None):
+        """
+        Triangula la superficie de nivel nivel(x, y, z) = 0 (la misma función que recibe
+        OperadoresDiferenciales.vector_normal) con marching tetrahedra dentro de la caja
+        limites = [[xmin, xmax], [ymin, ymax], [zmin, zmax]]. La normal es
+        grad(nivel)/|grad(nivel)| y apunta hacia donde nivel crece.
+
+        :param resolucion: Número de celdas por eje (entero o tupla de tres).
+        """
+        if variables is None:
+            variables = sp.symbols('x y z')
+        gradiente = sp.Matrix([sp.diff(nivel, v) for v in variables])
+        f_nivel = compilar_expresiones([nivel], variables, 'nivel')
+        f_gradiente = compilar_expresiones(gradiente, variables, 'gradiente_nivel')
+
+        resolucion = np.broadcast_to(resolucion, (3,))
+        ejes = [np.linspace(lim[0], lim[1], n + 1) for lim, n in zip(limites, resolucion)]
+        X, Y, Z = np.meshgrid(*ejes, indexing='ij')
+        valores = f_nivel.evaluar(X, Y, Z)[..., 0]
+        triangulos = _marching_tetrahedra(ejes, valores)
+
+        def normal(puntos):
+            g = f_gradiente(puntos)
+            return g / np.linalg.norm(g, axis=1, keepdims=True)
+        return cls(triangulos, normal)
+
+    def evaluar(self, funcion, variables=None):
+        """
+        Valores de una expresión, Matrix o función de Python en los puntos de cuadratura.
+        Se calculan una sola vez por función.
+
+        Returns:
+            numpy.ndarray: Arreglo (Q,) para escalares o (Q, k) para vectores.
+        """
+        clave = clave_cache('malla', funcion) if isinstance(funcion, (sp.Basic, sp.MatrixBase)) else id(funcion)
+        if clave not in self._valores:
+            if callable(funcion) and not isinstance(funcion, sp.Basic):
+                valor = np.asarray(funcion(self.puntos), dtype=float)
+            else:
+                vector = isinstance(funcion, sp.MatrixBase)
+                componentes = list(funcion) if vector else [funcion]
+                if variables is None:
+                    variables = sp.symbols('x y z')
+                valor = compilar_expresiones(componentes, variables, 'en_malla')(self.puntos)
+                valor = valor if vector else valor[:, 0]
+            self._valores[clave] = (funcion, valor) #se guarda la función para que id siga siendo válido
+        return self._valores[clave][1]
+
+    def integrar(self, densidad, funciones_test, variables=None):
+        """
+        Integra densidad·phi_k sobre la superficie para una lista de funciones test.
+
+        :param densidad: Arreglo (Q,) o (Q, m) con la densidad en los puntos de cuadratura.
+        :return: Arreglo (K,) o (K, m).
+        """
+        phi = np.stack([self.evaluar(f, variables) for f in funciones_test])
+        densidad = np.asarray(densidad, dtype=float)
+        if densidad.ndim == 1:
+            return phi @ (self.pesos * densidad)
+        return phi @ (self.pesos[:, None] * densidad)
+
+    def accion_salto(self, salto, funciones_test, variables=None):
+        """
+        Acción de n [[f]] delta_s sobre funciones test. Si el salto es vectorial (Matrix) se
+        calcula la integral de n·[[f]] phi (forma escalar); si es escalar se devuelve la
+        integral vectorial de n [[f]] phi.
+
+        Returns:
+            numpy.ndarray: Arreglo (K,) para saltos vectoriales o (K, 3) para escalares.
+        """
+        valores = self.evaluar(salto, variables)
+        if valores.ndim == 2:
+            densidad = np.einsum('qi,qi->q', self.normales, valores)
+        else:
+            densidad = self.normales * valores[:, None]
+        return self.integrar(densidad, funciones_test, variables)
+
+
+def _marching_tetrahedra(ejes, valores):
+    """
+    Triángulos de la superficie valores = 0 en una rejilla, partiendo cada celda en 6
+    tetraedros e interpolando linealmente sobre las aristas que cambian de signo.
+    """
+    nx, ny, nz = (len(e) - 1 for e in ejes)
+    esquinas = np.stack([valores[i:i + nx, j:j + ny, k:k + nz] for i, j, k in _ESQUINAS], axis=-1)
+    cortadas = np.argwhere((esquinas.min(axis=-1) < 0) & (esquinas.max(axis=-1) >= 0))
+    if len(cortadas) == 0:
+        return np.zeros((0, 3, 3))
+
+    #coordenadas y valores de los 4 vértices de cada tetraedro de las celdas cortadas
+    indices = cortadas[:, None, :] + _ESQUINAS[None, :, :]
+    coordenadas = np.stack([ejes[d][indices[..., d]] for d in range(3)], axis=-1)
+    P = coordenadas[:, _TETRAEDROS].reshape(-1, 4, 3)
+    F = esquinas[tuple(cortadas.T)][:, _TETRAEDROS].reshape(-1, 4)
+    negativos = F < 0
+    cuenta = negativos.sum(axis=1)
+
+    def punto(t, a, b):
+        Pa, Pb = P[t, a], P[t, b]
+        Fa, Fb = F[t, a], F[t, b]
+        return Pa + (Fa / (Fa - Fb))[:, None] * (Pb - Pa)
+
+    triangulos = []
+    #un vértice separado de los otros tres: un triángulo
+    t = np.flatnonzero((cuenta == 1) | (cuenta == 3))
+    if len(t):
+        aislado = np.argmax(np.where(cuenta[t, None] == 1, negativos[t], ~negativos[t]), axis=1)
+        otros = _OTROS[aislado]
+        triangulos.append(np.stack([punto(t, aislado, otros[:, j]) for j in range(3)], axis=1))
+    #dos y dos: un cuadrilátero, dos triángulos
+    t = np.flatnonzero(cuenta == 2)
+    if len(t):
+        orden = np.argsort(~negativos[t], axis=1, kind='stable')
+        a, b, c, d = orden.T
+        ac, ad, bd, bc = punto(t, a, c), punto(t, a, d), punto(t, b, d), punto(t, b, c)
+        triangulos.append(np.stack([ac, ad, bd], axis=1))
+        triangulos.append(np.stack([ac, bd, bc], axis=1))
+    return np.concatenate(triangulos)
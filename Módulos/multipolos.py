@@ -0,0 +1,149 @@
+
+import numpy as np
+from math import factorial
+from superposicion import SuperposicionCargas
+
+class ExpansionMultipolar:
+    """
+    Desarrollo multipolar hasta el orden L de una distribución de cargas puntuales localizada,
+    para evaluar el potencial y el campo lejanos. Usa el teorema de adición
+
+    :math:`1/|x - y| = \\sum_{l,m} \\frac{(l-|m|)!}{(l+|m|)!} \\frac{r_y^l}{r_x^{l+1}} P_l^{|m|}(\\cos\\theta_y) P_l^{|m|}(\\cos\\theta_x) e^{im(\\varphi_x - \\varphi_y)}`
+
+    de modo que los momentos se calculan una sola vez y cada punto de observación cuesta
+    O(L^2). Dentro del radio de suma directa (o de la esfera que contiene a las cargas) el
+    potencial se calcula sumando directamente.
+    """
+
+    def __init__(self, posiciones, cargas, L, k=1.0, centro=None, radio_directo=None):
+        """
+        Inicializa la clase ExpansionMultipolar.
+
+        :param posiciones: Arreglo de forma (N, 3) con las posiciones de las cargas.
+        :param cargas: Arreglo de forma (N,) con las magnitudes de las cargas.
+        :param L: Orden máximo del desarrollo (0 monopolo, 1 dipolo, 2 cuadrupolo, ...).
+        :param k: Constante de Coulomb.
+        :param centro: Centro del desarrollo; por defecto el centro de |q|.
+        :param radio_directo: Radio (desde el centro) dentro del cual se suma directamente;
+                              por defecto el doble del radio de la distribución.
+        """
+        self.directo = SuperposicionCargas(posiciones, cargas, k)
+        Y, q = self.directo.posiciones, self.directo.cargas
+        if Y.shape[1] != 3:
+            raise ValueError("El desarrollo multipolar solo está implementado en 3 dimensiones.")
+        self.L = L
+        self.k = k
+        if centro is None:
+            peso = np.abs(q)
+            centro = peso @ Y / peso.sum() if peso.sum() > 0 else Y.mean(axis=0)
+        self.centro = np.asarray(centro, dtype=float)
+        self.radio = float(np.sqrt(((Y - self.centro) ** 2).sum(axis=1)).max())
+        self.radio_directo = max(2 * self.radio if radio_directo is None else radio_directo,
+                                 self.radio)
+        self.carga_absoluta = float(np.abs(q).sum())
+
+        #momentos M_lm = c_lm sum_q q conj(S_l^m(y_q)), con c_lm = (l-m)!/(l+m)!
+        S, _ = _armonicos_solidos(Y - self.centro, L)
+        c = np.array([[factorial(l - m) / factorial(l + m) if m <= l else 0.0
+                       for m in range(L + 1)] for l in range(L + 1)])
+        peso_m = np.where(np.arange(L + 1) == 0, 1.0, 2.0) #m y -m dan conjugados
+        self.momentos = c[:, :, None] * np.conj(S) @ q
+        self._coeficientes = self.momentos * peso_m
+
+    def potencial(self, puntos, tam_bloque=4096):
+        """
+        Evalúa el potencial en un arreglo de puntos (M, 3).
+        """
+        return self._evaluar(puntos, False, tam_bloque)
+
+    def campo(self, puntos, tam_bloque=4096):
+        """
+        Evalúa el campo eléctrico en un arreglo de puntos (M, 3).
+        """
+        return self._evaluar(puntos, True, tam_bloque)
+
+    def cota_error(self, puntos):
+        """
+        Cota del error del potencial truncado en cada punto:
+        :math:`k \\sum|q| (a/r)^{L+1} / (r - a)`, con a el radio de la distribución.
+        Es cero en los puntos que se evalúan por suma directa.
+        """
+        r = self._distancias(puntos)
+        lejos = r > self.radio_directo
+        cota = np.zeros(len(r))
+        a, rl = self.radio, r[lejos]
+        cota[lejos] = abs(self.k) * self.carga_absoluta * (a / rl) ** (self.L + 1) / (rl - a)
+        return cota
+
+    def _distancias(self, puntos):
+        X = np.atleast_2d(np.asarray(puntos, dtype=float)) - self.centro
+        return np.sqrt((X ** 2).sum(axis=1))
+
+    def _evaluar(self, puntos, campo, tam_bloque):
+        puntos = np.atleast_2d(np.asarray(puntos, dtype=float))
+        salida = np.empty(puntos.shape if campo else len(puntos))
+        lejos = self._distancias(puntos) > self.radio_directo
+
+        cerca = ~lejos
+        if cerca.any():
+            if campo:
+                salida[cerca] = self.directo.campo(puntos[cerca])
+            else:
+                salida[cerca] = self.directo.potencial(puntos[cerca])
+
+        indices = np.flatnonzero(lejos)
+        l = np.arange(self.L + 1)[:, None]
+        for inicio in range(0, len(indices), tam_bloque):
+            idx = indices[inicio:inicio + tam_bloque]
+            X = puntos[idx] - self.centro
+            r2 = (X ** 2).sum(axis=1)
+            S, dS = _armonicos_solidos(X, self.L, gradiente=campo)
+            #término l: Re(sum_m A_lm S_l^m(x)) / r^(2l+1)
+            terminos = np.einsum('lm,lmp->lp', self._coeficientes, S).real
+            potencia = r2 ** -(l + 0.5)
+            if campo:
+                grad = np.einsum('lm,lmpj->lpj', self._coeficientes, dS).real
+                grad = grad * potencia[:, :, None] - ((2 * l + 1) * terminos * potencia / r2)[:, :, None] * X
+                salida[idx] = -self.k * grad.sum(axis=0)
+            else:
+                salida[idx] = self.k * (terminos * potencia).sum(axis=0)
+        return salida
+
+
+def _armonicos_solidos(X, L, gradiente=False):
+    """
+    Armónicos sólidos regulares S_l^m(x) = r^l P_l^m(cos theta) e^(i m phi), 0 <= m <= l <= L,
+    (sin la fase de Condon-Shortley) calculados con recurrencias polinomiales en (x, y, z), y
+    opcionalmente su gradiente.
+
+    Returns:
+        tuple: S de forma (L+1, L+1, M) y dS de forma (L+1, L+1, M, 3) o None.
+    """
+    M = len(X)
+    x, y, z = X[:, 0], X[:, 1], X[:, 2]
+    r2 = x * x + y * y + z * z
+    w = x + 1j * y
+    S = np.zeros((L + 1, L + 1, M), dtype=complex)
+    dS = np.zeros((L + 1, L + 1, M, 3), dtype=complex) if gradiente else None
+    ez = np.array([0, 0, 1.0])
+    dw = np.array([1, 1j, 0])
+
+    doble_factorial = 1.0
+    for m in range(L + 1):
+        if m > 0:
+            doble_factorial *= 2 * m - 1
+        #S_m^m = (2m-1)!! (x + iy)^m
+        S[m, m] = doble_factorial * w ** m
+        if gradiente and m > 0:
+            dS[m, m] = doble_factorial * m * (w ** (m - 1))[:, None] * dw
+        if m + 1 <= L:
+            S[m + 1, m] = (2 * m + 1) * z * S[m, m]
+            if gradiente:
+                dS[m + 1, m] = (2 * m + 1) * (S[m, m][:, None] * ez + z[:, None] * dS[m, m])
+        for l in range(m + 2, L + 1):
+            S[l, m] = ((2 * l - 1) * z * S[l - 1, m] - (l + m - 1) * r2 * S[l - 2, m]) / (l - m)
+            if gradiente:
+                dS[l, m] = ((2 * l - 1) * (S[l - 1, m][:, None] * ez + z[:, None] * dS[l - 1, m])
+                            - (l + m - 1) * (2 * X * S[l - 2, m][:, None]
+                                             + r2[:, None] * dS[l - 2, m])) / (l - m)
+    return S, dS
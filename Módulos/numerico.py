@@ -0,0 +1,47 @@
+
+import os
+import json
+from compilador import KernelCompilado
+
+def guardar_kernels(ruta, kernels):
+    """
+    Guarda kernels compilados (KernelCompilado de FuncionTestCartesiana.compilar, de
+    compilar_expresiones o de los métodos compilar de los operadores) en un archivo JSON, para
+    cargarlos después con cargar_kernels en procesos que no importan SymPy.
+
+    Args:
+        ruta (str): Archivo JSON.
+        kernels (dict): {nombre: KernelCompilado}; un par (regular, singular) de un operador
+                        se guarda como nombre_regular y nombre_singular.
+    """
+    datos = {}
+    for nombre, kernel in kernels.items():
+        if isinstance(kernel, tuple):
+            datos[nombre + '_regular'] = kernel[0].a_dict()
+            datos[nombre + '_singular'] = kernel[1].a_dict()
+        else:
+            datos[nombre] = kernel.a_dict()
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo, ensure_ascii=False)
+    os.replace(temporal, ruta) #otros procesos nunca ven el archivo a medias
+
+
+def cargar_kernels(ruta):
+    """
+    Carga los kernels guardados con guardar_kernels. Solo usa NumPy: el código de cada kernel
+    es una función de numpy, así que ni este módulo ni los kernels importan SymPy o SciPy, y
+    un proceso que solo evalúa arranca en decenas de milisegundos.
+
+    El código de los kernels se ejecuta con exec, así que solo se deben cargar archivos de
+    confianza (por ejemplo los escritos por guardar_kernels en el mismo proyecto). Antes de
+    ejecutarlo se comprueban su hash y su estructura (ver KernelCompilado.desde_dict), lo
+    que rechaza con ValueError archivos dañados o editados pero no protege de un archivo
+    malicioso.
+
+    Returns:
+        dict: {nombre: KernelCompilado}.
+    """
+    with open(ruta, encoding='utf-8') as archivo:
+        datos = json.load(archivo)
+    return {nombre: KernelCompilado.desde_dict(d) for nombre, d in datos.items()}
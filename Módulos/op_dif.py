@@ -1,7 +1,59 @@
 
 from funcion_test_main import FuncionTest
-import sympy as sp
-from deltadirac_1d import DeltaDirac
+import numpy as np
+from perezoso import importar_perezoso
+sp = importar_perezoso('sympy')
+from compilador import compilar_expresiones
+from saltos import calcular_saltos
+import backend
+from distribucion import Distribucion, TerminoSingular
+from instrumentacion import instrumentado
+from superficies import Superficie
+from poisson import laplaciano_discreto, coordenadas_rejilla
+
+
+@instrumentado('salto_funcion', entrada=None)
+def salto_funcion(funcion, vector_normal, timeout=None, procesos=None, punto=None):
+    """
+    Calcula el salto [[f]] = f(x + eps*n) - f(x - eps*n) de funcion a través de la superficie
+    de normal vector_normal, como función simbólica de (x, y, z), para funciones escalares o
+    vectoriales.
+    Las componentes de un campo vectorial se calculan en paralelo en un pool de procesos.
+    Para Piecewise, Heaviside, sign y Abs se elige la rama sin usar sp.limit; si se da
+    timeout (en segundos) y una componente tarda más, se estima numéricamente, lo que
+    requiere dar el punto {x: ..., y: ..., z: ...} de la superficie donde se evalúa el salto.
+    Con punto, el resultado es el salto en ese punto.
+    """
+    eps = sp.Symbol('eps', real=True, positive=True)
+    x, y, z = sp.symbols('x y z')
+    pos = sp.Matrix([x, y, z])
+    
+    # Vector normal puede depender de x, y, z simbólicamente
+    n = vector_normal  # vector normal unitario
+    
+    # Desplazamiento sobre la normal
+    pos_plus = pos + eps * n
+    pos_minus = pos - eps * n
+
+    def tarea(comp):
+        f_plus = comp.subs({x: pos_plus[0], y: pos_plus[1], z: pos_plus[2]}, simultaneous=True)
+        f_minus = comp.subs({x: pos_minus[0], y: pos_minus[1], z: pos_minus[2]}, simultaneous=True)
+        return (f_plus, eps, 0, f_minus, '+', '+', True)
+    
+    # Si la función es vectorial (tipo Matrix)
+    if isinstance(funcion, sp.MatrixBase):
+        saltos = calcular_saltos([tarea(comp) for comp in funcion], timeout, procesos, punto)
+        salto = sp.Matrix(funcion.shape[0], funcion.shape[1], saltos)
+
+    # Si la función es escalar
+    elif isinstance(funcion, (sp.Basic, sp.Expr)):
+        salto = calcular_saltos([tarea(funcion)], timeout, procesos, punto)[0]
+    
+    else:
+        raise TypeError("La función debe ser escalar (Expr) o vectorial (Matrix)")
+    
+    return salto
+
 
 class OperadoresDiferenciales:
     """
@@ -11,61 +63,74 @@ class OperadoresDiferenciales:
     def __init__(self, operador):
         self.operador = operador
 
+    @staticmethod
     def vector_normal(superficie_discontinuidad):
         """
         Calcula el vector normal a una superficie de discontinuidad. Recibe la
         parametrización de la superficie en cartesianas como función simbólica y devuelve 
         el vector ortogonal normalizado.
+        Para las superficies del catálogo (Esfera, Plano, Cilindro) devuelve directamente su
+        normal en forma cerrada, sin calcular el gradiente.
         """
+        if isinstance(superficie_discontinuidad, Superficie):
+            return superficie_discontinuidad.normal
         x,y,z=sp.symbols('x y z')
 
-        N = sp.CoordSys3D('N') # Definimos un sistema de coordenadas 3D
-
         #el vector normal se calcula como
         #n= grad(phi)/||grad(phi)||
 
         # Calculamos el gradiente (vector normal)
-        grad_sup = sp.gradient(superficie_discontinuidad, N)
+        grad_sup = sp.Matrix([backend.diff(superficie_discontinuidad, v) for v in (x, y, z)])
         # Normalizamos el vector normal
         vector_normal = grad_sup / sp.sqrt(grad_sup.dot(grad_sup))
         return vector_normal #lo devuelve en sus coodenadas x,y,z
+
+    @staticmethod
+    def normal_y_superficie(vector_normal):
+        """
+        Separa el argumento vector_normal de los operadores: si es una Superficie del catálogo
+        devuelve su normal cerrada y la superficie; si no, el vector tal cual y None.
+        """
+        if isinstance(vector_normal, Superficie):
+            return vector_normal.normal, vector_normal
+        return vector_normal, None
+
+    @staticmethod
+    def como_malla(malla):
+        """
+        Devuelve la MallaSuperficie de una Superficie del catálogo (con sus normales exactas);
+        una MallaSuperficie se devuelve igual.
+        """
+        return malla.malla() if isinstance(malla, Superficie) else malla
     
-    def salto_funcion(self):
+    def salto_funcion(self, timeout=None, procesos=None, punto=None):
         """
-        Calcula el salto [[f]] = f(x + eps*n) - f(x - eps*n)
-        como función simbólica de (x, y, z), para funciones escalares o vectoriales.
+        Salto [[f]] de self.funcion a través de la superficie de normal self.vector_normal;
+        ver la función salto_funcion del módulo.
         """
-        eps = sp.Symbol('eps', real=True, positive=True)
-        x, y, z = sp.symbols('x y z')
-        pos = sp.Matrix([x, y, z])
-        
-        # Vector normal puede depender de x, y, z simbólicamente
-        n = self.vector_normal  # vector normal unitario
-        
-        # Desplazamiento sobre la normal
-        pos_plus = pos + eps * n
-        pos_minus = pos - eps * n
-        
-        # Si la función es escalar
-        if isinstance(self.funcion, (sp.Basic, sp.Expr)):
-            f_plus = self.funcion.subs({x: pos_plus[0], y: pos_plus[1], z: pos_plus[2]})
-            f_minus = self.funcion.subs({x: pos_minus[0], y: pos_minus[1], z: pos_minus[2]})
-            salto = sp.simplify(sp.limit(f_plus, eps, 0, dir='+') - sp.limit(f_minus, eps, 0, dir='+'))
-        
-        # Si la función es vectorial (tipo Matrix)
-        elif isinstance(self.funcion, sp.Matrix):
-            salto = sp.Matrix([
-                sp.simplify(
-                    sp.limit(comp.subs({x: pos_plus[0], y: pos_plus[1], z: pos_plus[2]}), eps, 0, dir='+') -
-                    sp.limit(comp.subs({x: pos_minus[0], y: pos_minus[1], z: pos_minus[2]}), eps, 0, dir='+')
-                )
-                for comp in self.funcion
-            ])
-        
-        else:
-            raise TypeError("La función debe ser escalar (Expr) o vectorial (Matrix)")
-        
-        return salto
+        return salto_funcion(self.funcion, self.vector_normal, timeout, procesos, punto)
+
+    @staticmethod
+    def compilar_partes(regular, singular, variables=None, nombre='operador'):
+        """
+        Compila por separado la parte regular de un operador y el coeficiente de su término
+        de delta superficial, cada una en una sola función de NumPy con eliminación de
+        subexpresiones comunes entre componentes.
+
+        Args:
+            regular (sympy.Expr o sympy.Matrix): Parte regular del operador.
+            singular (sympy.Expr o sympy.Matrix): Coeficiente de delta_s.
+            variables (list): Variables de los puntos; por defecto los símbolos libres de ambas
+                              partes ordenados por nombre.
+        Returns:
+            tuple: (KernelCompilado regular, KernelCompilado singular).
+        """
+        regular = sp.Matrix([regular]) if not isinstance(regular, sp.MatrixBase) else regular
+        singular = sp.Matrix([singular]) if not isinstance(singular, sp.MatrixBase) else singular
+        if variables is None:
+            variables = sorted(regular.free_symbols | singular.free_symbols, key=lambda s: s.name)
+        return (compilar_expresiones(regular, variables, nombre + '_regular'),
+                compilar_expresiones(singular, variables, nombre + '_singular'))
 
 
 
@@ -79,7 +144,7 @@ class OperadoresDiferenciales:
         
         def __init__(self, funcion, vector_normal, salto_funcion):
             self.funcion = funcion
-            self.vector_normal = vector_normal
+            self.vector_normal, self.superficie = OperadoresDiferenciales.normal_y_superficie(vector_normal)
             self.salto_funcion= salto_funcion
         
         def gradiente_sin_precaucion(self):
@@ -87,17 +152,43 @@ class OperadoresDiferenciales:
             Calcula el gradiente de la función sin considerar la discontinuidad.
             """
             # Ordena los símbolos para consistencia
-            variables = sorted(self.funcion.free_symbols, key=lambda s: s.name)
-            return sp.Matrix([sp.diff(self.funcion, var) for var in variables])
+            variables = sorted(backend.free_symbols(self.funcion), key=lambda s: s.name)
+            return sp.Matrix([backend.diff(self.funcion, var) for var in variables])
         
-        def gradiente_isod(self):
+        @instrumentado('gradiente_isod', entrada=None)
+        def gradiente_isod(self, estructurada=False):
             """
             Junta el cálculo completo para tener el gradiente en sentido de distribuciones.
+            Con estructurada=True devuelve una Distribucion con la parte regular y el término
+            n_out [[f]] delta_s por separado.
             """
             gradiente = self.gradiente_sin_precaucion() #gradiente sin considerar la discontinuidad
-            salto = self.salto_funcion() if callable(self.saltofuncion) else self.salto_funcion
-            #devuelve el gradiente con el término de discontinuidad
-            return gradiente + self.vector_normal * salto * FuncionTest.delta_s()
+            salto = self.salto_funcion() if callable(self.salto_funcion) else self.salto_funcion
+            #gradiente con el término de discontinuidad
+            resultado = Distribucion(gradiente, [TerminoSingular(self.vector_normal * salto,
+                                                                 FuncionTest.delta_s())])
+            return resultado if estructurada else resultado.como_expresion()
+
+        def compilar(self, variables=None):
+            """
+            Compila el gradiente en dos funciones vectorizadas: la parte regular {nabla f} y el
+            coeficiente n_out [[f]] de delta_s. Cada una recibe puntos (N, d) y devuelve (N, 3).
+            """
+            salto = self.salto_funcion() if callable(self.salto_funcion) else self.salto_funcion
+            return OperadoresDiferenciales.compilar_partes(
+                self.gradiente_sin_precaucion(), self.vector_normal * salto, variables, 'gradiente')
+
+        def accion_delta_s(self, malla, funciones_test):
+            """
+            Acción numérica del término n_out [[f]] delta_s sobre una lista de funciones test,
+            integrando sobre la superficie triangulada (MallaSuperficie);
+            con malla=None se usa la de la Superficie del catálogo que se dio como normal.
+            Returns:
+                numpy.ndarray: Arreglo (K, 3) con la integral de n [[f]] phi_k.
+            """
+            malla = OperadoresDiferenciales.como_malla(self.superficie if malla is None else malla)
+            salto = self.salto_funcion() if callable(self.salto_funcion) else self.salto_funcion
+            return malla.accion_salto(salto, funciones_test)
 
 
     class Divergencia:
@@ -109,23 +200,55 @@ class OperadoresDiferenciales:
         
         def __init__(self, funcion, vector_normal, salto_funcion):
             self.funcion = funcion
-            self.vector_normal = vector_normal
+            self.vector_normal, self.superficie = OperadoresDiferenciales.normal_y_superficie(vector_normal)
             self.salto_funcion = salto_funcion
 
         def divergencia_sin_precaucion(self):
             """
             Calcula la divergencia de un campo vectorial sin considerar la discontinuidad.
             """
-            variables = sorted(self.funcion.free_symbols, key=lambda s: s.name)
-            return sum(sp.diff(self.funcion[i], variables[i]) for i in range(len(variables)))
+            variables = sorted(backend.free_symbols(self.funcion), key=lambda s: s.name)
+            return sum(backend.diff(self.funcion[i], variables[i]) for i in range(len(variables)))
             
-        def divergencia_isod(self):
+        @instrumentado('divergencia_isod', entrada=None)
+        def divergencia_isod(self, estructurada=False):
             """
             Junta el cálculo completo para tener la divergencia en sentido de distribuciones.
+            Con estructurada=True devuelve una Distribucion.
             """
             divergencia = self.divergencia_sin_precaucion()
             salto = self.salto_funcion() if callable(self.salto_funcion) else self.salto_funcion
-            return divergencia + self.vector_normal * salto * FuncionTest.delta_s()
+            if isinstance(salto, sp.MatrixBase):
+                coeficiente = self.vector_normal.dot(salto)
+            else:
+                coeficiente = self.vector_normal * salto
+            resultado = Distribucion(divergencia, [TerminoSingular(coeficiente, FuncionTest.delta_s())])
+            return resultado if estructurada else resultado.como_expresion()
+
+        def compilar(self, variables=None):
+            """
+            Compila la divergencia en dos funciones vectorizadas: la parte regular
+            {nabla dot f} y el coeficiente n_out dot [[f]] de delta_s.
+            """
+            salto = self.salto_funcion() if callable(self.salto_funcion) else self.salto_funcion
+            if isinstance(salto, sp.MatrixBase):
+                coeficiente = self.vector_normal.dot(salto)
+            else:
+                coeficiente = self.vector_normal * salto
+            return OperadoresDiferenciales.compilar_partes(
+                self.divergencia_sin_precaucion(), coeficiente, variables, 'divergencia')
+
+        def accion_delta_s(self, malla, funciones_test):
+            """
+            Acción numérica del término n_out dot [[f]] delta_s sobre una lista de funciones
+            test, integrando sobre la superficie triangulada (MallaSuperficie);
+            con malla=None se usa la de la Superficie del catálogo que se dio como normal.
+            Returns:
+                numpy.ndarray: Arreglo (K,) con la integral de n·[[f]] phi_k.
+            """
+            malla = OperadoresDiferenciales.como_malla(self.superficie if malla is None else malla)
+            salto = self.salto_funcion() if callable(self.salto_funcion) else self.salto_funcion
+            return malla.accion_salto(salto, funciones_test)
 
     class Rotacional:
         """
@@ -135,7 +258,7 @@ class OperadoresDiferenciales:
         
         def __init__(self, vector, vector_normal, salto_funcion):
             self.vector = vector
-            self.vector_normal=vector_normal
+            self.vector_normal, self.superficie = OperadoresDiferenciales.normal_y_superficie(vector_normal)
             self.salto_funcion=salto_funcion
 
         def rotacional_sin_precaucion(self):
@@ -145,17 +268,44 @@ class OperadoresDiferenciales:
             x, y, z = sp.symbols('x y z')
             variables = [x, y, z]
             return sp.Matrix([
-                sp.diff(self.vector[2], variables[1]) - sp.diff(self.vector[1], variables[2]),
-                sp.diff(self.vector[0], variables[2]) - sp.diff(self.vector[2], variables[0]),
-                sp.diff(self.vector[1], variables[0]) - sp.diff(self.vector[0], variables[1])
+                backend.diff(self.vector[2], variables[1]) - backend.diff(self.vector[1], variables[2]),
+                backend.diff(self.vector[0], variables[2]) - backend.diff(self.vector[2], variables[0]),
+                backend.diff(self.vector[1], variables[0]) - backend.diff(self.vector[0], variables[1])
             ])
-        def rotacional_isod(self):
+        @instrumentado('rotacional_isod', entrada=None)
+        def rotacional_isod(self, estructurada=False):
             """
             Junta el cálculo completo para tener el rotacional en sentido de distribuciones.
+            Con estructurada=True devuelve una Distribucion.
             """
             rotacional = self.rotacional_sin_precaucion()
             salto = self.salto_funcion() if callable(self.salto_funcion) else self.salto_funcion
-            return rotacional + self.vector_normal.cross(salto) * FuncionTest.delta_s()
+            resultado = Distribucion(rotacional, [TerminoSingular(self.vector_normal.cross(salto),
+                                                                  FuncionTest.delta_s())])
+            return resultado if estructurada else resultado.como_expresion()
+
+        def compilar(self, variables=None):
+            """
+            Compila el rotacional en dos funciones vectorizadas: la parte regular {curl f} y el
+            coeficiente n_out x [[f]] de delta_s.
+            """
+            salto = self.salto_funcion() if callable(self.salto_funcion) else self.salto_funcion
+            return OperadoresDiferenciales.compilar_partes(
+                self.rotacional_sin_precaucion(), self.vector_normal.cross(salto), variables,
+                'rotacional')
+
+        def accion_delta_s(self, malla, funciones_test):
+            """
+            Acción numérica del término n_out x [[f]] delta_s sobre una lista de funciones test,
+            integrando sobre la superficie triangulada (MallaSuperficie);
+            con malla=None se usa la de la Superficie del catálogo que se dio como normal.
+            Returns:
+                numpy.ndarray: Arreglo (K, 3) con la integral de (n x [[f]]) phi_k.
+            """
+            malla = OperadoresDiferenciales.como_malla(self.superficie if malla is None else malla)
+            salto = self.salto_funcion() if callable(self.salto_funcion) else self.salto_funcion
+            densidad = np.cross(malla.normales, malla.evaluar(salto))
+            return malla.integrar(densidad, funciones_test)
         
 
     class Laplaciano:
@@ -167,24 +317,90 @@ class OperadoresDiferenciales:
         def __init__(self, funcion, vector_normal, salto_funcion, salto_derivada_normal):
             #va a recibir el salto de la derivada normal, no supe hacer que lo calcule
             self.funcion = funcion
-            self.vector_normal = vector_normal
+            self.vector_normal, self.superficie = OperadoresDiferenciales.normal_y_superficie(vector_normal)
             self.salto_funcion = salto_funcion
             self.salto_derivada_normal = salto_derivada_normal
+            self._gradientes = {} #gradiente compilado de cada función test, por (phi, variables)
 
         def laplaciano_sin_precaucion(self):
             """
             Calcula el laplaciano de una función sin considerar la discontinuidad.
             """
-            variables = sorted(self.funcion.free_symbols, key=lambda s: s.name)
-            return sum(sp.diff(self.funcion, var, 2) for var in variables) #segunda derivada
+            variables = sorted(backend.free_symbols(self.funcion), key=lambda s: s.name)
+            return sum(backend.diff(self.funcion, var, 2) for var in variables) #segunda derivada
         
-        def laplaciano_isod(self):
+        @instrumentado('laplaciano_isod', entrada=None)
+        def laplaciano_isod(self, estructurada=False):
             """
             Junta el cálculo completo para tener el laplaciano en sentido de distribuciones.
+            El término nabla dot (n [[f]] delta_s) es la capa dipolar (TerminoSingular de
+            orden 1); sin estructurada=True se escribe como la derivada normal de delta_s.
             """
             laplaciano = self.laplaciano_sin_precaucion()
             salto = self.salto_funcion() if callable(self.salto_funcion) else self.salto_funcion
-            
-            return (laplaciano + self.salto_derivada_normal * FuncionTest.delta_s() +
-                    sp.div(self.vector_normal * salto * FuncionTest.delta_s()))
+            delta_s = FuncionTest.delta_s()
+            resultado = Distribucion(laplaciano, [TerminoSingular(self.salto_derivada_normal, delta_s, 0),
+                                                  TerminoSingular(salto, delta_s, 1)])
+            return resultado if estructurada else resultado.como_expresion()
 
+        def compilar(self, variables=None):
+            """
+            Compila el laplaciano en dos funciones vectorizadas: la parte regular {nabla^2 f} y
+            los coeficientes singulares, cuyas columnas son [[df/dn]] (coeficiente de delta_s) y
+            [[f]] (densidad de la capa dipolar nabla dot (n [[f]] delta_s)).
+            """
+            salto = self.salto_funcion() if callable(self.salto_funcion) else self.salto_funcion
+            return OperadoresDiferenciales.compilar_partes(
+                self.laplaciano_sin_precaucion(), sp.Matrix([self.salto_derivada_normal, salto]),
+                variables, 'laplaciano')
+
+        def accion_delta_s(self, malla, funciones_test, variables=None):
+            """
+            Acción numérica de los términos singulares sobre una lista de funciones test:
+            <[[df/dn]] delta_s, phi> = integral de [[df/dn]] phi y
+            <nabla dot (n [[f]] delta_s), phi> = -integral de [[f]] dphi/dn.
+            Returns:
+                numpy.ndarray: Arreglo (K,) con la suma de ambos términos.
+            """
+            malla = OperadoresDiferenciales.como_malla(self.superficie if malla is None else malla)
+            if variables is None:
+                variables = sp.symbols('x y z')
+            salto = self.salto_funcion() if callable(self.salto_funcion) else self.salto_funcion
+            capa_simple = malla.integrar(malla.evaluar(self.salto_derivada_normal), funciones_test)
+            valores_salto = malla.evaluar(salto)
+            capa_dipolar = np.array([
+                np.sum(malla.pesos * valores_salto * np.einsum(
+                    'qi,qi->q', malla.normales, malla.evaluar(self._gradiente(phi, variables))))
+                for phi in funciones_test])
+            return capa_simple - capa_dipolar
+
+        def _gradiente(self, phi, variables):
+            """
+            Gradiente de phi compilado, derivado una sola vez por función test; al ser una
+            función de Python, malla.evaluar lo guarda por id sin rehacer la clave simbólica.
+            """
+            clave = (phi, tuple(variables))
+            if clave not in self._gradientes:
+                self._gradientes[clave] = compilar_expresiones(
+                    [backend.diff(phi, v) for v in variables], variables, 'gradiente_test')
+            return self._gradientes[clave]
+
+        def verificar_numericamente(self, forma, espaciado, origen=(0.0, 0.0, 0.0), variables=None):
+            """
+            Compara en una rejilla regular el laplaciano discreto de 7 puntos de la función con
+            la parte regular laplaciano_sin_precaucion evaluada en los mismos nodos. Sirve para
+            comprobar numéricamente nabla^2 phi = -rho/epsilon_0 lejos de la discontinuidad.
+
+            Returns:
+                float: Máxima diferencia absoluta en los nodos interiores donde ambas son finitas.
+            """
+            if variables is None:
+                variables = sp.symbols('x y z')
+            puntos = np.stack([c.reshape(-1) for c in coordenadas_rejilla(forma, espaciado, origen)],
+                              axis=1)
+            funcion = compilar_expresiones([self.funcion], variables, 'funcion')(puntos)
+            regular = compilar_expresiones([self.laplaciano_sin_precaucion()], variables,
+                                           'laplaciano')(puntos)
+            discreto = laplaciano_discreto(funcion.reshape(forma), espaciado)
+            diferencia = np.abs(discreto - regular.reshape(forma))
+            return float(np.nanmax(np.where(np.isfinite(diferencia), diferencia, np.nan)))
@@ -1,4 +1,12 @@
 
+from superposicion import SuperposicionCargas
+from multipolos import ExpansionMultipolar
+from poisson import resolver_poisson
+from rejilla import evaluar_rejilla, clave_funcion
+from compilador import compilar_expresiones
+from perezoso import importar_perezoso
+sp = importar_perezoso('sympy')
+
 class OperadoresElectrostaticos:
     """
     Clase para representar operadores electrostáticos en un sistema de coordenadas cartesianas.
@@ -15,6 +23,43 @@ class OperadoresElectrostaticos:
         def __init__(self, vector):
             self.vector = vector
 
+        @classmethod
+        def de_cargas(cls, posiciones, cargas, k=1.0):
+            """
+            Construye el campo eléctrico de N cargas puntuales por superposición numérica.
+            """
+            return cls(SuperposicionCargas(posiciones, cargas, k))
+
+        def evaluar(self, puntos, **opciones):
+            """
+            Evalúa el campo en un arreglo de puntos (M, d). Las opciones (metodo, tam_bloque,
+            hilos, theta) se pasan a SuperposicionCargas.campo.
+            """
+            if not isinstance(self.vector, SuperposicionCargas):
+                raise TypeError("Solo se puede evaluar numéricamente un campo construido con de_cargas.")
+            return self.vector.campo(puntos, **opciones)
+
+        def evaluar_rejilla(self, ruta, limites, forma, metodo='directo', **opciones):
+            """
+            Evalúa el campo en una rejilla regular (nx, ny, nz) y lo escribe por bloques en el
+            archivo .npy ruta, de forma (nx, ny, nz, 3), sin tener la rejilla en memoria; un
+            cálculo interrumpido se reanuda llamando de nuevo (ver rejilla.evaluar_rejilla).
+            El campo puede venir de de_cargas (con metodo 'directo' o 'arbol'), de una
+            ExpansionMultipolar o ser una Matrix de SymPy en x, y, z, que se compila.
+            """
+            vector = self.vector
+            if isinstance(vector, SuperposicionCargas):
+                kernel = lambda puntos: vector.campo(puntos, metodo=metodo)
+            elif isinstance(vector, ExpansionMultipolar):
+                kernel = vector.campo
+            elif isinstance(vector, sp.MatrixBase):
+                kernel = compilar_expresiones(vector, sp.symbols('x y z'), 'campo')
+            else:
+                raise TypeError("El campo debe venir de de_cargas, de una ExpansionMultipolar o "
+                                "ser una Matrix simbólica.")
+            opciones.setdefault('clave', _clave_fuente('campo', vector, metodo))
+            return evaluar_rejilla(kernel, ruta, limites, forma, 3, **opciones)
+
     class PotencialElectrico:
         """
         Clase para representar el potencial eléctrico.
@@ -23,6 +68,69 @@ class OperadoresElectrostaticos:
         def __init__(self, funcion):
             self.funcion = funcion
 
+        @classmethod
+        def de_cargas(cls, posiciones, cargas, k=1.0):
+            """
+            Construye el potencial eléctrico de N cargas puntuales por superposición numérica.
+            """
+            return cls(SuperposicionCargas(posiciones, cargas, k))
+
+        def evaluar(self, puntos, **opciones):
+            """
+            Evalúa el potencial en un arreglo de puntos (M, d). Las opciones (metodo,
+            tam_bloque, hilos, theta) se pasan a SuperposicionCargas.potencial.
+            """
+            if not isinstance(self.funcion, SuperposicionCargas):
+                raise TypeError("Solo se puede evaluar numéricamente un potencial construido con de_cargas.")
+            return self.funcion.potencial(puntos, **opciones)
+
+        def evaluar_rejilla(self, ruta, limites, forma, metodo='directo', **opciones):
+            """
+            Evalúa el potencial en una rejilla regular (nx, ny, nz) y lo escribe por bloques en
+            el archivo .npy ruta sin tener la rejilla en memoria; un cálculo interrumpido se
+            reanuda llamando de nuevo (ver rejilla.evaluar_rejilla). El potencial puede venir
+            de de_cargas, de una ExpansionMultipolar o ser una expresión de SymPy en x, y, z.
+            """
+            funcion = self.funcion
+            if isinstance(funcion, SuperposicionCargas):
+                kernel = lambda puntos: funcion.potencial(puntos, metodo=metodo)
+            elif isinstance(funcion, ExpansionMultipolar):
+                kernel = funcion.potencial
+            elif isinstance(funcion, sp.Basic):
+                compilado = compilar_expresiones([funcion], sp.symbols('x y z'), 'potencial')
+                kernel = lambda puntos: compilado(puntos)[:, 0]
+            else:
+                raise TypeError("El potencial debe venir de de_cargas, de una ExpansionMultipolar "
+                                "o ser una expresión simbólica.")
+            opciones.setdefault('clave', _clave_fuente('potencial', funcion, metodo))
+            return evaluar_rejilla(kernel, ruta, limites, forma, 1, **opciones)
+
+        @classmethod
+        def de_densidad(cls, rho, espaciado, modo='libre', **opciones):
+            """
+            Resuelve la ecuación de Poisson con FFT para una densidad de carga muestreada en
+            una rejilla regular 3D (ver poisson.resolver_poisson).
+
+            Returns:
+                tuple: (PotencialElectrico, CampoElectrico) cuyos atributos funcion y vector
+                       son las rejillas phi (nx, ny, nz) y E (3, nx, ny, nz).
+            """
+            phi, E = resolver_poisson(rho, espaciado, modo, **opciones)
+            return cls(phi), OperadoresElectrostaticos.CampoElectrico(E)
+
+        def expansion_multipolar(self, L, radio_directo=None, centro=None):
+            """
+            Calcula una sola vez los momentos multipolares (monopolo, dipolo, cuadrupolo, ...)
+            hasta el orden L y devuelve un objeto ExpansionMultipolar que evalúa el potencial y
+            el campo lejanos en O(L^2) por punto, con cota de error y suma directa dentro de
+            radio_directo.
+            """
+            if not isinstance(self.funcion, SuperposicionCargas):
+                raise TypeError("El desarrollo multipolar requiere un potencial construido con de_cargas.")
+            cargas = self.funcion
+            return ExpansionMultipolar(cargas.posiciones, cargas.cargas, L, cargas.k,
+                                       centro=centro, radio_directo=radio_directo)
+
     class FuerzaElectrica:
         """
         Clase para representar la fuerza eléctrica.
@@ -37,4 +145,18 @@ class OperadoresElectrostaticos:
         """
         
         def __init__(self, vector):
-            self.vector = vector
\ No newline at end of file
+            self.vector = vector
+
+
+def _clave_fuente(magnitud, fuente, metodo):
+    """
+    Clave de la función que se evalúa en la rejilla, para reanudar solo con las mismas cargas,
+    desarrollo multipolar o expresión.
+    """
+    if isinstance(fuente, SuperposicionCargas):
+        return clave_funcion(magnitud, fuente.posiciones, fuente.cargas, fuente.k, metodo)
+    if isinstance(fuente, ExpansionMultipolar):
+        directo = fuente.directo
+        return clave_funcion(magnitud, 'multipolar', directo.posiciones, directo.cargas, fuente.k,
+                             fuente.L, fuente.centro, fuente.radio_directo)
+    return clave_funcion(magnitud, fuente)
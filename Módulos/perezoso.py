@@ -0,0 +1,30 @@
+
+import sys
+import importlib.util
+
+def importar_perezoso(nombre):
+    """
+    Importa un módulo de forma perezosa con importlib.util.LazyLoader: el módulo queda en
+    sys.modules pero su código solo se ejecuta la primera vez que se usa uno de sus atributos.
+    Así SymPy y SciPy no se cargan al importar Distopy, sino cuando de verdad se necesitan.
+
+    Si el módulo ya está importado se devuelve tal cual. Para un nombre con puntos (por
+    ejemplo 'scipy.fft') el paquete padre sí se importa, solo el submódulo es perezoso.
+
+    Args:
+        nombre (str): Nombre completo del módulo.
+
+    Returns:
+        module: El módulo (perezoso si todavía no estaba importado).
+    """
+    if nombre in sys.modules:
+        return sys.modules[nombre]
+    spec = importlib.util.find_spec(nombre)
+    if spec is None:
+        raise ImportError(f"No se encontró el módulo {nombre}.", name=nombre)
+    cargador = importlib.util.LazyLoader(spec.loader)
+    spec.loader = cargador
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nombre] = modulo
+    cargador.exec_module(modulo)
+    return modulo
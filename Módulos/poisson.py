@@ -0,0 +1,132 @@
+
+import numpy as np
+from perezoso import importar_perezoso
+fft = importar_perezoso('scipy.fft')
+
+#constante eléctrica en SI; por defecto se usa 1/(4 pi), es decir k = 1 como en SuperposicionCargas
+EPSILON_0_SI = 8.8541878128e-12
+
+#promedio de 1/r sobre un cubo de lado 1 centrado en el origen, para regularizar G(0)
+_PROMEDIO_INVERSO_CUBO = 2.3800772166
+
+_greens = {}
+
+
+def resolver_poisson(rho, espaciado, modo='libre', epsilon_0=1 / (4 * np.pi), precision=np.float64,
+                     hilos=-1):
+    """
+    Resuelve nabla^2 phi = -rho/epsilon_0 para una densidad de carga muestreada en una rejilla
+    regular 3D usando FFT, y calcula el campo E = -nabla phi.
+
+    Con modo='libre' se usa la función de Green del espacio libre 1/(4 pi epsilon_0 r) con
+    relleno de ceros (rejilla del doble de tamaño), de modo que no hay imágenes periódicas;
+    la transformada de la función de Green se guarda para reutilizarla con la misma rejilla.
+    Con modo='periodico' la solución es periódica y se resta la carga media (fondo neutro).
+
+    Args:
+        rho (numpy.ndarray): Densidad de carga de forma (nx, ny, nz).
+        espaciado (float o tuple): Separación de la rejilla (hx, hy, hz).
+        modo (str): 'libre' o 'periodico'.
+        epsilon_0 (float): Constante eléctrica; EPSILON_0_SI para unidades SI.
+        precision (dtype): np.float64 o np.float32 (la mitad de memoria).
+        hilos (int): Hilos para las FFT (-1 usa todos).
+
+    Returns:
+        tuple: phi de forma (nx, ny, nz) y E de forma (3, nx, ny, nz).
+    """
+    rho = np.asarray(rho, dtype=precision)
+    h = np.broadcast_to(np.asarray(espaciado, dtype=float), (3,))
+    forma = rho.shape
+
+    if modo == 'libre':
+        forma_ext = tuple(2 * n for n in forma)
+        g_hat = _green_libre(forma, tuple(h), epsilon_0, precision, hilos)
+        rho_hat = fft.rfftn(rho, s=forma_ext, workers=hilos)
+        rho_hat *= g_hat
+        phi = fft.irfftn(rho_hat, s=forma_ext, workers=hilos)
+        del rho_hat
+        phi = np.ascontiguousarray(phi[:forma[0], :forma[1], :forma[2]])
+        phi *= np.prod(h) #en su sitio: un escalar float64 convertiría phi a float64
+        E = -np.array(np.gradient(phi, *h), dtype=precision)
+        return phi, E
+    elif modo == 'periodico':
+        kx, ky, kz = _numeros_de_onda(forma, h)
+        k2 = kx ** 2 + ky ** 2 + kz ** 2
+        k2[0, 0, 0] = 1.0
+        phi_hat = fft.rfftn(rho, workers=hilos) / (epsilon_0 * k2)
+        phi_hat[0, 0, 0] = 0.0
+        phi = fft.irfftn(phi_hat, s=forma, workers=hilos).astype(precision)
+        E = np.array([fft.irfftn(-1j * k * phi_hat, s=forma, workers=hilos) for k in (kx, ky, kz)],
+                     dtype=precision)
+        return phi, E
+    else:
+        raise ValueError("El modo debe ser 'libre' o 'periodico'.")
+
+
+def laplaciano_discreto(phi, espaciado, periodico=False):
+    """
+    Laplaciano discreto de 7 puntos. Sin periodicidad los bordes de la rejilla quedan como NaN.
+    """
+    h = np.broadcast_to(np.asarray(espaciado, dtype=float), (3,))
+    phi = np.asarray(phi, dtype=float)
+    if periodico:
+        return sum((np.roll(phi, 1, eje) - 2 * phi + np.roll(phi, -1, eje)) / h[eje] ** 2
+                   for eje in range(3))
+    resultado = np.full(phi.shape, np.nan)
+    interior = (slice(1, -1),) * 3
+    total = 0
+    for eje in range(3):
+        antes = [slice(1, -1)] * 3
+        despues = [slice(1, -1)] * 3
+        antes[eje], despues[eje] = slice(0, -2), slice(2, None)
+        total = total + (phi[tuple(antes)] - 2 * phi[interior] + phi[tuple(despues)]) / h[eje] ** 2
+    resultado[interior] = total
+    return resultado
+
+
+def verificar_poisson(phi, rho, espaciado, epsilon_0=1 / (4 * np.pi), periodico=False):
+    """
+    Comprueba numéricamente nabla^2 phi = -rho/epsilon_0 con el laplaciano discreto.
+
+    Returns:
+        float: Norma relativa del residuo en los puntos donde el laplaciano está definido.
+    """
+    rho = np.asarray(rho)
+    if periodico:
+        rho = rho - rho.mean() #la solución periódica corresponde a la carga con fondo neutro
+    residuo = laplaciano_discreto(phi, espaciado, periodico) + rho / epsilon_0
+    validos = np.isfinite(residuo)
+    referencia = np.linalg.norm(rho[validos] / epsilon_0)
+    return float(np.linalg.norm(residuo[validos]) / max(referencia, np.finfo(float).tiny))
+
+
+def coordenadas_rejilla(forma, espaciado, origen=(0.0, 0.0, 0.0)):
+    """
+    Coordenadas (x, y, z) de los nodos de una rejilla regular, como tres arreglos 3D.
+    """
+    h = np.broadcast_to(np.asarray(espaciado, dtype=float), (3,))
+    ejes = [origen[i] + h[i] * np.arange(forma[i]) for i in range(3)]
+    return np.meshgrid(*ejes, indexing='ij')
+
+
+def _green_libre(forma, h, epsilon_0, precision, hilos):
+    clave = (forma, h, epsilon_0, np.dtype(precision).name)
+    if clave not in _greens:
+        ejes = []
+        for n, paso in zip(forma, h):
+            i = np.arange(2 * n)
+            ejes.append(np.minimum(i, 2 * n - i) * paso) #distancia con vuelta periódica
+        x, y, z = np.meshgrid(*ejes, indexing='ij', sparse=True)
+        r = np.sqrt(x ** 2 + y ** 2 + z ** 2)
+        r[0, 0, 0] = np.cbrt(np.prod(h)) / _PROMEDIO_INVERSO_CUBO
+        G = (1 / (4 * np.pi * epsilon_0 * r)).astype(precision)
+        _greens.clear() #solo se guarda la última rejilla para no acumular memoria
+        _greens[clave] = fft.rfftn(G, workers=hilos)
+    return _greens[clave]
+
+
+def _numeros_de_onda(forma, h):
+    kx = 2 * np.pi * fft.fftfreq(forma[0], h[0])
+    ky = 2 * np.pi * fft.fftfreq(forma[1], h[1])
+    kz = 2 * np.pi * fft.rfftfreq(forma[2], h[2])
+    return np.meshgrid(kx, ky, kz, indexing='ij', sparse=True)
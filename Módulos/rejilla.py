@@ -0,0 +1,158 @@
+
+import os
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+from perezoso import importar_perezoso
+sp = importar_perezoso('sympy')
+
+def evaluar_rejilla(funcion, ruta, limites, forma, componentes=1, puntos_por_bloque=1 << 18,
+                    hilos=None, dtype=np.float64, reanudar=True, bloques_por_guardado=16, clave=None):
+    """
+    Evalúa funcion en todos los nodos de una rejilla regular 3D y escribe el resultado
+    directamente en un archivo .npy mapeado en memoria, sin construir nunca la rejilla completa.
+
+    La rejilla se recorre en orden C por bloques de puntos_por_bloque nodos consecutivos; las
+    coordenadas de cada bloque se generan a partir de sus índices y los bloques se evalúan en
+    un pool de hilos (los núcleos de NumPy liberan el GIL). Junto a la salida se guarda
+    ruta + '.progreso.npy' con los bloques terminados: solo se marcan después de hacer flush de
+    los datos, de modo que si el cálculo se interrumpe, volver a llamar con reanudar=True
+    calcula únicamente los bloques que faltan. En ruta + '.progreso.json' se guardan los
+    límites, la forma, las componentes, el dtype, el tamaño de bloque y la clave de la función;
+    solo se reanuda si todos coinciden, y si no se empieza de cero. Al terminar los archivos de
+    progreso se borran.
+
+    Args:
+        funcion (callable): Recibe puntos (M, 3) y devuelve (M,) o (M, componentes), por
+                            ejemplo un KernelCompilado o SuperposicionCargas.potencial.
+        ruta (str): Archivo .npy de salida.
+        limites (list): [[xmin, xmax], [ymin, ymax], [zmin, zmax]] (extremos incluidos).
+        forma (tuple): Número de nodos (nx, ny, nz).
+        componentes (int): 1 para un escalar (salida (nx, ny, nz)) o k (salida (nx, ny, nz, k)).
+        puntos_por_bloque (int): Nodos evaluados por bloque.
+        hilos (int): Hilos del pool; por defecto el número de CPUs.
+        dtype (dtype): Tipo de la salida.
+        reanudar (bool): Si es False se empieza de cero aunque haya progreso guardado.
+        bloques_por_guardado (int): Bloques terminados entre cada flush del progreso.
+        clave (str): Identifica la función para no reanudar con otra (ver clave_funcion); por
+                     defecto el hash de la fuente de un KernelCompilado o el nombre calificado
+                     de la función, que no distingue dos lambdas ni closures.
+
+    Returns:
+        numpy.memmap: La salida completa, mapeada en modo lectura.
+    """
+    forma = tuple(int(n) for n in forma)
+    forma_salida = forma if componentes == 1 else forma + (componentes,)
+    total = int(np.prod(forma))
+    n_bloques = -(-total // puntos_por_bloque)
+    origen = np.array([lim[0] for lim in limites], dtype=float)
+    paso = np.array([(lim[1] - lim[0]) / max(n - 1, 1) for lim, n in zip(limites, forma)])
+    ruta_progreso = ruta + '.progreso.npy'
+    metadatos = {'limites': [[float(a), float(b)] for a, b in limites], 'forma': list(forma),
+                 'componentes': int(componentes), 'dtype': np.dtype(dtype).str,
+                 'puntos_por_bloque': int(puntos_por_bloque),
+                 'clave': _clave_por_defecto(funcion) if clave is None else str(clave)}
+
+    salida, progreso = _abrir(ruta, ruta_progreso, forma_salida, dtype, n_bloques, reanudar, metadatos)
+    plana = salida.reshape(total, componentes)
+    pendientes = iter(np.flatnonzero(progreso == 0))
+
+    def tarea(bloque, plana):
+        inicio = bloque * puntos_por_bloque
+        fin = min(inicio + puntos_por_bloque, total)
+        indices = np.unravel_index(np.arange(inicio, fin), forma)
+        puntos = origen + np.stack(indices, axis=1) * paso
+        valores = np.asarray(funcion(puntos), dtype=dtype)
+        plana[inicio:fin] = valores.reshape(fin - inicio, componentes)
+        return bloque
+
+    hilos = hilos or os.cpu_count() or 1
+    terminados = []
+    try:
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            #a lo sumo 2·hilos bloques en vuelo, para no crear un futuro por bloque
+            en_vuelo = {pool.submit(tarea, b, plana) for _, b in zip(range(2 * hilos), pendientes)}
+            while en_vuelo:
+                listos, en_vuelo = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                for futuro in listos:
+                    terminados.append(futuro.result())
+                    siguiente = next(pendientes, None)
+                    if siguiente is not None:
+                        en_vuelo.add(pool.submit(tarea, siguiente, plana))
+                if len(terminados) >= bloques_por_guardado:
+                    _guardar_progreso(salida, progreso, terminados)
+    finally:
+        #también si se interrumpe, para no repetir los bloques ya escritos
+        _guardar_progreso(salida, progreso, terminados)
+
+    del salida, plana, progreso
+    os.remove(ruta_progreso)
+    os.remove(_ruta_metadatos(ruta_progreso))
+    return np.load(ruta, mmap_mode='r')
+
+
+def clave_funcion(*partes):
+    """
+    Clave de contenido para evaluar_rejilla a partir de lo que define una función: arreglos
+    de NumPy (por sus bytes), expresiones de SymPy (por su srepr) u otros valores (por repr).
+    """
+    h = hashlib.sha256()
+    for parte in partes:
+        if isinstance(parte, np.ndarray):
+            h.update(f'{parte.dtype.str}{parte.shape}'.encode())
+            h.update(np.ascontiguousarray(parte).tobytes())
+        elif isinstance(parte, (sp.Basic, sp.MatrixBase)):
+            h.update(sp.srepr(parte).encode())
+        else:
+            h.update(repr(parte).encode())
+        h.update(b'\x1f')
+    return h.hexdigest()
+
+
+def _clave_por_defecto(funcion):
+    if hasattr(funcion, 'fuente'): #KernelCompilado
+        return clave_funcion(funcion.fuente)
+    nombre = getattr(funcion, '__qualname__', type(funcion).__qualname__)
+    return f"{getattr(funcion, '__module__', '')}.{nombre}"
+
+
+def _ruta_metadatos(ruta_progreso):
+    return ruta_progreso[:-len('.npy')] + '.json'
+
+
+def _abrir(ruta, ruta_progreso, forma_salida, dtype, n_bloques, reanudar, metadatos):
+    """
+    Abre la salida y el progreso existentes si corresponden a la misma rejilla y función, o
+    los crea.
+    """
+    ruta_metadatos = _ruta_metadatos(ruta_progreso)
+    if reanudar and all(os.path.exists(r) for r in (ruta, ruta_progreso, ruta_metadatos)):
+        with open(ruta_metadatos, encoding='utf-8') as archivo:
+            guardados = json.load(archivo)
+        salida = np.lib.format.open_memmap(ruta, mode='r+')
+        progreso = np.lib.format.open_memmap(ruta_progreso, mode='r+')
+        if (guardados == metadatos and salida.shape == forma_salida
+                and salida.dtype == np.dtype(dtype) and progreso.shape == (n_bloques,)):
+            return salida, progreso
+        del salida, progreso
+    salida = np.lib.format.open_memmap(ruta, mode='w+', dtype=dtype, shape=forma_salida)
+    progreso = np.lib.format.open_memmap(ruta_progreso, mode='w+', dtype=np.uint8, shape=(n_bloques,))
+    #los metadatos se escriben al final y de forma atómica: sin ellos no se reanuda
+    temporal = ruta_metadatos + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(metadatos, archivo)
+    os.replace(temporal, ruta_metadatos)
+    return salida, progreso
+
+
+def _guardar_progreso(salida, progreso, terminados):
+    """
+    Hace flush de los datos y después marca los bloques como terminados.
+    """
+    if not terminados:
+        return
+    salida.flush()
+    progreso[terminados] = 1
+    progreso.flush()
+    terminados.clear()
@@ -0,0 +1,427 @@
+
+import os
+import time
+import multiprocessing as mp
+from multiprocessing.connection import wait
+import numpy as np
+from perezoso import importar_perezoso
+sp = importar_perezoso('sympy')
+from cache_simbolico import en_cache
+import backend
+from instrumentacion import instrumentado, medir
+
+class _NoResuelto(Exception):
+    """
+    El camino rápido no pudo decidir la rama; se usa sp.limit.
+    """
+
+
+_respaldos = 0 #veces que _en_pool usó el respaldo numérico en este proceso
+
+
+def respaldos_usados():
+    """
+    Número de tareas que en este proceso superaron su timeout y se calcularon con el respaldo
+    numérico; comparándolo antes y después de un cálculo se sabe si el resultado es exacto.
+    """
+    return _respaldos
+
+
+def _discontinuas():
+    """
+    Funciones que pueden ser discontinuas y que el camino rápido no sabe resolver (una
+    función y no una constante para no cargar SymPy al importar el módulo).
+    """
+    return (sp.floor, sp.ceiling, sp.frac, sp.Mod, sp.DiracDelta)
+
+
+def _ramificadas():
+    """
+    Funciones cuya rama a cada lado de x0 elige el camino rápido.
+    """
+    return (sp.Piecewise, sp.Heaviside, sp.sign, sp.Abs)
+
+
+@instrumentado('limit')
+def limite_lateral(expr, x, x0, dir='+'):
+    """
+    Calcula el límite lateral de expr cuando x -> x0 por la derecha (dir='+') o por la
+    izquierda (dir='-').
+
+    Primero intenta el camino rápido: en Piecewise, Heaviside, sign y Abs se elige la rama que
+    vale a ese lado de x0 analizando el signo de los argumentos y, si la expresión resultante
+    es continua en x0, se evalúa sustituyendo x = x0. En otro caso se usa sp.limit (sobre la
+    rama elegida, si se pudo elegir), cuyo resultado se guarda en la caché simbólica.
+
+    Returns:
+        sympy.Expr: El límite lateral.
+    """
+    expr = sp.sympify(expr)
+    if expr.has(*_ramificadas()):
+        try:
+            expr = _elegir_ramas(expr, x, x0, 1 if dir == '+' else -1)
+        except _NoResuelto:
+            pass
+        else:
+            valor = _valor_continuo(expr, x, x0)
+            if valor is not None:
+                return valor
+    return en_cache('limit', sp.limit, expr, x, x0, dir=dir)
+
+
+def limite_numerico(expr, x, x0, dir='+', pasos=8, punto=None):
+    """
+    Estimación numérica del límite lateral: evalúa expr en x0 ± h para h = 10^-2, ..., 10^-9 y
+    extrapola a h -> 0 con Richardson. Requiere que x0 y los demás símbolos sean numéricos;
+    los valores de los demás símbolos (por ejemplo x, y, z de un punto de la superficie) se
+    dan en punto.
+
+    Returns:
+        sympy.Float: La estimación del límite.
+    """
+    expr, x0 = _en_punto(sp.sympify(expr), x, punto), _en_punto(sp.sympify(x0), x, punto)
+    if expr.free_symbols - {x} or x0.free_symbols:
+        raise TimeoutError("No se pudo calcular el límite a tiempo y la expresión no es numérica; "
+                           "dé los valores de los demás símbolos en punto.")
+    lado = 1 if dir == '+' else -1
+    f = sp.lambdify(x, expr, 'numpy')
+    h = 10.0 ** -np.arange(2, 2 + pasos)
+    with np.errstate(all='ignore'):
+        valores = np.asarray(f(float(x0) + lado * h), dtype=float) * np.ones_like(h)
+    #Richardson suponiendo f(x0 ± h) = L + c h: L ~ (10 f(h/10) - f(h)) / 9
+    extrapolados = (10 * valores[1:] - valores[:-1]) / 9
+    finitos = extrapolados[np.isfinite(extrapolados)]
+    return sp.Float(finitos[-1]) if len(finitos) else sp.nan
+
+
+def calcular_salto(f_derecha, x, x0, f_izquierda=None, dir_derecha='+', dir_izquierda='-',
+                   simplificar=False):
+    """
+    Calcula el salto lim f_derecha - lim f_izquierda cuando x -> x0, con los lados dados.
+    Si no se da f_izquierda se usa la misma función, es decir [[f]] = f(x0^+) - f(x0^-).
+    """
+    if f_izquierda is None:
+        f_izquierda = f_derecha
+    salto = limite_lateral(f_derecha, x, x0, dir_derecha) - limite_lateral(f_izquierda, x, x0, dir_izquierda)
+    if simplificar:
+        return medir('simplify', en_cache, 'simplify', sp.simplify, salto, entrada=salto)
+    return salto
+
+
+def calcular_saltos(tareas, timeout=None, procesos=None, punto=None):
+    """
+    Calcula varios saltos (por ejemplo, las componentes de un campo vectorial) en paralelo en
+    un pool de procesos. Cada tarea es una tupla de argumentos de calcular_salto.
+
+    Si una tarea tarda más de timeout segundos (contados desde que empieza) se termina su
+    proceso y su salto se estima numéricamente con limite_numerico. La estimación numérica
+    necesita que la función solo dependa de la variable del límite: si depende además de otros
+    símbolos (x, y, z en los saltos de OperadoresDiferenciales), sus valores se dan en punto y
+    entonces todos los saltos se calculan en ese punto.
+
+    Args:
+        tareas (list): Lista de tuplas (f_derecha, x, x0[, f_izquierda, dir_derecha,
+                       dir_izquierda, simplificar]).
+        timeout (float): Tiempo máximo por tarea en segundos; None para no limitar.
+        procesos (int): Número de procesos; por defecto uno por tarea hasta el número de CPUs.
+        punto (dict): Valores de los demás símbolos, {símbolo: valor}, o None.
+
+    Returns:
+        list: Los saltos en el mismo orden que las tareas.
+    """
+    tareas = [tuple(t) for t in tareas]
+    if punto:
+        tareas = [tuple(_en_punto(a, t[1], punto) if j in (0, 2, 3) and a is not None else a
+                        for j, a in enumerate(t)) for t in tareas]
+    return _en_pool(calcular_salto, tareas, _salto_numerico, timeout, procesos)
+
+
+def saltos_por_tramos(f, x, puntos, ordenes=(0,), timeout=None, procesos=None):
+    """
+    Calcula los saltos [[f^(k)]](a) de f y sus derivadas en muchos puntos de discontinuidad a
+    la vez.
+
+    A cada lado de cada punto se elige la rama de f que vale ahí (Piecewise, Heaviside, sign,
+    Abs); los puntos se agrupan por rama, de modo que cada expresión distinta se deriva y se
+    analiza una sola vez aunque limite con dos puntos. Los grupos se reparten en un pool de
+    procesos y los resultados se juntan en el orden de los puntos. Si no se puede elegir la
+    rama, el grupo es la propia f y los límites se calculan con limite_lateral.
+
+    Args:
+        f (sympy.Expr): Función discontinua.
+        x (sympy.Symbol): Variable.
+        puntos (list): Puntos de discontinuidad.
+        ordenes (iterable): Órdenes k de las derivadas cuyos saltos se calculan.
+        timeout (float): Tiempo máximo por grupo en segundos; si se supera, los límites del
+                         grupo se estiman numéricamente.
+        procesos (int): Número de procesos; por defecto uno por grupo hasta el número de CPUs.
+
+    Returns:
+        dict: {(k, i): salto de f^(k) en puntos[i]}.
+    """
+    f = sp.sympify(f)
+    puntos = list(puntos)
+    ordenes = tuple(ordenes)
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+    #elegir las ramas también se reparte, en bloques de puntos consecutivos
+    bloques = np.array_split(np.arange(len(puntos)), max(min(4 * procesos, len(puntos)), 1))
+    tareas = [(f, x, tuple((int(i), puntos[i]) for i in bloque)) for bloque in bloques]
+    grupos = {}
+    for ramas in _en_pool(_ramas_laterales, tareas, _sin_ramas, timeout, procesos):
+        for i, a, dir, rama in ramas:
+            grupos.setdefault(rama, []).append((i, a, dir))
+
+    tareas = [(rama, x, tuple(lados), ordenes) for rama, lados in grupos.items()]
+    limites = {}
+    for resultado in _en_pool(_limites_rama, tareas, _limites_rama_numericos, timeout, procesos):
+        limites.update(resultado)
+    return {(k, i): limites[k, i, '+'] - limites[k, i, '-']
+            for k in ordenes for i in range(len(puntos))}
+
+
+def _ramas_laterales(f, x, puntos):
+    """
+    Rama de f a cada lado de cada punto; f misma si no se puede elegir.
+    """
+    ramas = []
+    for i, a in puntos:
+        for lado, dir in ((1, '+'), (-1, '-')):
+            try:
+                rama = _elegir_ramas(f, x, a, lado)
+            except _NoResuelto:
+                rama = f
+            ramas.append((i, a, dir, rama))
+    return ramas
+
+
+def _sin_ramas(f, x, puntos):
+    return [(i, a, dir, f) for i, a in puntos for dir in ('+', '-')]
+
+
+def _limite_de_rama(rama, x, x0, dir):
+    """
+    Límite lateral de una rama ya elegida: si es continua en x0 basta sustituir.
+    """
+    valor = _valor_continuo(sp.sympify(rama), x, x0)
+    return limite_lateral(rama, x, x0, dir) if valor is None else valor
+
+
+def _limites_rama(rama, x, lados, ordenes, limite=_limite_de_rama):
+    """
+    Límites laterales de las derivadas de una rama en todos los puntos que la usan.
+    """
+    limites = {}
+    for k in ordenes:
+        derivada = backend.diff(rama, x, k) if k else rama
+        for i, a, dir in lados:
+            limites[k, i, dir] = limite(derivada, x, a, dir)
+    return limites
+
+
+def _limites_rama_numericos(rama, x, lados, ordenes):
+    return _limites_rama(rama, x, lados, ordenes, limite_numerico)
+
+
+def _en_punto(expr, x, punto):
+    """
+    Sustituye en expr los valores de punto, salvo el de la variable del límite x.
+    """
+    if not punto:
+        return expr
+    return sp.sympify(expr).subs({s: v for s, v in dict(punto).items() if s != x})
+
+
+def _en_pool(funcion, tareas, respaldo, timeout=None, procesos=None):
+    """
+    Ejecuta funcion(*tarea) para cada tarea, con a lo sumo `procesos` procesos a la vez, y
+    devuelve los resultados en orden. Cada tarea corre en su propio proceso y tiene un solo
+    plazo de timeout segundos contados desde que empieza: si lo supera se mata su proceso y se
+    calcula con respaldo(*tarea), sin afectar a las tareas que esperan su turno.
+    """
+    if procesos is None:
+        procesos = min(len(tareas), os.cpu_count() or 1)
+    if timeout is None and procesos <= 1:
+        return [funcion(*t) for t in tareas]
+
+    global _respaldos
+    contexto = mp.get_context('fork' if 'fork' in mp.get_all_start_methods() else None)
+    resultados = [None] * len(tareas)
+    siguientes = iter(range(len(tareas)))
+    activos = {} #conexión -> (índice, proceso, plazo)
+    try:
+        while True:
+            while len(activos) < max(procesos, 1):
+                i = next(siguientes, None)
+                if i is None:
+                    break
+                lectura, escritura = contexto.Pipe(duplex=False)
+                proceso = contexto.Process(target=_trabajador, args=(escritura, funcion, tareas[i]),
+                                           daemon=True)
+                proceso.start()
+                escritura.close()
+                plazo = None if timeout is None else time.monotonic() + timeout
+                activos[lectura] = (i, proceso, plazo)
+            if not activos:
+                return resultados
+
+            plazos = [plazo for _, _, plazo in activos.values() if plazo is not None]
+            espera = max(min(plazos) - time.monotonic(), 0) if plazos else None
+            for conexion in wait(list(activos), timeout=espera):
+                i, proceso, _ = activos.pop(conexion)
+                try:
+                    exito, valor = conexion.recv()
+                except EOFError: #el proceso murió sin responder
+                    exito, valor = False, RuntimeError(f'El proceso terminó con código {proceso.exitcode}')
+                conexion.close()
+                proceso.join()
+                if not exito:
+                    raise valor
+                resultados[i] = valor
+
+            ahora = time.monotonic()
+            for conexion, (i, proceso, plazo) in list(activos.items()):
+                if plazo is not None and ahora >= plazo:
+                    del activos[conexion]
+                    proceso.kill()
+                    proceso.join()
+                    conexion.close()
+                    resultados[i] = respaldo(*tareas[i])
+                    _respaldos += 1
+    finally:
+        for conexion, (_, proceso, _) in activos.items():
+            proceso.kill()
+            proceso.join()
+            conexion.close()
+
+
+def _trabajador(conexion, funcion, tarea):
+    """
+    Calcula funcion(*tarea) en un proceso aparte y manda (éxito, resultado o excepción).
+    """
+    try:
+        respuesta = (True, funcion(*tarea))
+    except Exception as error:
+        respuesta = (False, error)
+    try:
+        conexion.send(respuesta)
+    except Exception as error: #resultado o excepción que no se puede serializar
+        conexion.send((False, RuntimeError(f'{type(error).__name__}: {error}')))
+    conexion.close()
+
+
+def _salto_numerico(f_derecha, x, x0, f_izquierda=None, dir_derecha='+', dir_izquierda='-',
+                    simplificar=False):
+    if f_izquierda is None:
+        f_izquierda = f_derecha
+    return (limite_numerico(f_derecha, x, x0, dir_derecha)
+            - limite_numerico(f_izquierda, x, x0, dir_izquierda))
+
+
+def _valor_continuo(expr, x, x0):
+    """
+    expr en x = x0 si expr es continua en x0, o None si no se puede asegurar: ninguna
+    subexpresión que dependa de x es una función discontinua o con ramas, ni vale infinito,
+    nan o un intervalo (AccumBounds, como atan(1/x) en 0) al sustituir x = x0.
+    """
+    tipos = _discontinuas() + _ramificadas()
+    for subexpresion in sp.preorder_traversal(expr):
+        if not subexpresion.has(x):
+            continue
+        if isinstance(subexpresion, tipos):
+            return None
+        if subexpresion.subs(x, x0).has(sp.nan, sp.zoo, sp.oo, -sp.oo, sp.AccumBounds):
+            return None
+    return expr.subs(x, x0)
+
+
+def _elegir_ramas(e, x, x0, lado):
+    """
+    Reemplaza Piecewise, Heaviside, sign y Abs por la rama que vale justo al lado `lado` de x0.
+    """
+    if not e.has(x):
+        return e
+    if isinstance(e, sp.Piecewise):
+        for rama, condicion in e.args:
+            verdad = _verdad_lateral(condicion, x, x0, lado)
+            if verdad is None:
+                raise _NoResuelto
+            if verdad:
+                return _elegir_ramas(rama, x, x0, lado)
+        raise _NoResuelto
+    if isinstance(e, sp.Heaviside):
+        signo = _signo_lateral(e.args[0], x, x0, lado)
+        if signo == 0:
+            return sp.Heaviside(0, *e.args[1:])
+        return sp.Integer(1) if signo > 0 else sp.Integer(0)
+    if isinstance(e, sp.sign):
+        return sp.Integer(_signo_lateral(e.args[0], x, x0, lado))
+    if isinstance(e, sp.Abs):
+        signo = _signo_lateral(e.args[0], x, x0, lado)
+        return signo * _elegir_ramas(e.args[0], x, x0, lado)
+    if not e.args:
+        return e
+    return e.func(*[_elegir_ramas(a, x, x0, lado) for a in e.args])
+
+
+def _signo_lateral(g, x, x0, lado, max_orden=6):
+    """
+    Signo (-1, 0 o 1) de g(x0 + lado·eps) para eps > 0 pequeño, usando el primer término no
+    nulo de su serie de Taylor en x0. Lanza _NoResuelto si no se puede decidir.
+    """
+    g = _elegir_ramas(sp.sympify(g), x, x0, lado)
+    if not g.has(x):
+        return _signo_numero(g)
+    derivada = g
+    for k in range(max_orden):
+        if k > 0:
+            derivada = sp.diff(derivada, x)
+        valor = derivada.subs(x, x0)
+        signo = _signo_numero(valor)
+        if signo != 0:
+            return signo * lado ** k
+    if g.is_polynomial(x) and sp.expand(g) == 0:
+        return 0
+    raise _NoResuelto
+
+
+def _signo_numero(valor):
+    if valor.has(sp.nan, sp.zoo, sp.oo, -sp.oo):
+        raise _NoResuelto
+    if valor.is_zero:
+        return 0
+    if valor.is_positive:
+        return 1
+    if valor.is_negative:
+        return -1
+    raise _NoResuelto
+
+
+def _verdad_lateral(condicion, x, x0, lado):
+    """
+    Valor de verdad de una condición de Piecewise justo al lado `lado` de x0, o None si no se
+    puede decidir.
+    """
+    if condicion in (sp.true, True):
+        return True
+    if condicion in (sp.false, False):
+        return False
+    if isinstance(condicion, sp.And):
+        valores = [_verdad_lateral(c, x, x0, lado) for c in condicion.args]
+        return None if None in valores else all(valores)
+    if isinstance(condicion, sp.Or):
+        valores = [_verdad_lateral(c, x, x0, lado) for c in condicion.args]
+        return None if None in valores else any(valores)
+    if isinstance(condicion, sp.Not):
+        valor = _verdad_lateral(condicion.args[0], x, x0, lado)
+        return None if valor is None else not valor
+    if isinstance(condicion, sp.core.relational.Relational):
+        try:
+            s = _signo_lateral(condicion.lhs - condicion.rhs, x, x0, lado)
+        except _NoResuelto:
+            return None
+        comparaciones = {sp.StrictLessThan: s < 0, sp.LessThan: s <= 0,
+                         sp.StrictGreaterThan: s > 0, sp.GreaterThan: s >= 0,
+                         sp.Equality: s == 0, sp.Unequality: s != 0}
+        return comparaciones.get(type(condicion))
+    return None
@@ -0,0 +1,173 @@
+
+from abc import ABC, abstractmethod
+import numpy as np
+from perezoso import importar_perezoso
+sp = importar_perezoso('sympy')
+from malla_superficie import MallaSuperficie
+
+class Superficie(ABC):
+    """
+    Superficie de discontinuidad con normal, curvaturas y función de nivel en forma cerrada.
+
+    Las subclases (Esfera, Plano, Cilindro) dan:
+        nivel: expresión de SymPy en (x, y, z) que vale 0 en la superficie y crece hacia
+               donde apunta la normal (distancia con signo).
+        normal: Matrix con la normal unitaria exterior sobre la superficie.
+        normal_numerica(puntos): la misma normal evaluada con NumPy en puntos (N, 3).
+        parametrizacion(u, v): puntos de la superficie para una rejilla de parámetros.
+    Los operadores de OperadoresDiferenciales las reciben en lugar de vector_normal, de modo
+    que no se calcula ningún gradiente simbólico, y su acción sobre delta_s usa la malla de la
+    superficie con las normales exactas. Es una clase abstracta: una subclase que no
+    implementa los tres métodos numéricos no se puede instanciar.
+    """
+
+    def __init__(self):
+        self.x, self.y, self.z = sp.symbols('x y z')
+        self._mallas = {}
+
+    @abstractmethod
+    def nivel_numerico(self, puntos):
+        """
+        Función de nivel evaluada en puntos (N, 3); su signo indica el lado de la superficie.
+        """
+
+    @abstractmethod
+    def normal_numerica(self, puntos):
+        """
+        Normal unitaria exterior evaluada en puntos (N, 3).
+        """
+
+    @abstractmethod
+    def parametrizacion(self, u, v):
+        """
+        Puntos de la superficie, de forma u.shape + (3,), para parámetros en rango_parametros.
+        """
+
+    def malla(self, resolucion=64):
+        """
+        Triangulación de la superficie a partir de su parametrización, con las normales exactas.
+        Se construye una sola vez por resolución.
+
+        :param resolucion: Número de divisiones por parámetro (entero o par de enteros).
+        :return: MallaSuperficie.
+        """
+        nu, nv = np.broadcast_to(resolucion, (2,))
+        if (nu, nv) not in self._mallas:
+            (u0, u1), (v0, v1) = self.rango_parametros
+            U, V = np.meshgrid(np.linspace(u0, u1, nu + 1), np.linspace(v0, v1, nv + 1), indexing='ij')
+            P = self.parametrizacion(U, V)
+            a, b, c, d = P[:-1, :-1], P[1:, :-1], P[1:, 1:], P[:-1, 1:]
+            triangulos = np.concatenate([np.stack([a, b, c], axis=-2).reshape(-1, 3, 3),
+                                         np.stack([a, c, d], axis=-2).reshape(-1, 3, 3)])
+            self._mallas[nu, nv] = MallaSuperficie(triangulos, self.normal_numerica)
+        return self._mallas[nu, nv]
+
+
+class Esfera(Superficie):
+    """
+    Esfera |r - c| = R. Normal (r - c)/R, curvatura media 1/R y gaussiana 1/R^2.
+    """
+
+    def __init__(self, radio=1, centro=(0, 0, 0)):
+        super().__init__()
+        self.radio = sp.sympify(radio)
+        self.centro = sp.Matrix(centro)
+        r = sp.Matrix([self.x, self.y, self.z]) - self.centro
+        self.nivel = sp.sqrt(r.dot(r)) - self.radio
+        self.normal = r / self.radio
+        self.curvatura_media = 1 / self.radio
+        self.curvatura_gaussiana = 1 / self.radio**2
+        self.rango_parametros = ((0, np.pi), (0, 2 * np.pi))
+        self._c = np.array(self.centro, dtype=float).reshape(3)
+        self._R = float(self.radio)
+
+    def nivel_numerico(self, puntos):
+        return np.linalg.norm(np.asarray(puntos, dtype=float) - self._c, axis=-1) - self._R
+
+    def normal_numerica(self, puntos):
+        d = np.asarray(puntos, dtype=float) - self._c
+        return d / np.linalg.norm(d, axis=-1, keepdims=True)
+
+    def parametrizacion(self, u, v):
+        return self._c + self._R * np.stack([np.sin(u) * np.cos(v), np.sin(u) * np.sin(v), np.cos(u)],
+                                            axis=-1)
+
+
+class Plano(Superficie):
+    """
+    Plano n·(r - p) = 0 con normal constante n. Curvaturas nulas. Para la malla se usa el
+    cuadrado de semilado extension centrado en p.
+    """
+
+    def __init__(self, normal=(0, 0, 1), punto=(0, 0, 0), extension=1.0):
+        super().__init__()
+        n = sp.Matrix(normal)
+        self.normal = n / sp.sqrt(n.dot(n))
+        self.punto = sp.Matrix(punto)
+        self.nivel = self.normal.dot(sp.Matrix([self.x, self.y, self.z]) - self.punto)
+        self.curvatura_media = sp.Integer(0)
+        self.curvatura_gaussiana = sp.Integer(0)
+        self.rango_parametros = ((-extension, extension), (-extension, extension))
+        self._n = np.array(self.normal, dtype=float).reshape(3)
+        self._p = np.array(self.punto, dtype=float).reshape(3)
+        self._t1, self._t2 = _base_tangente(self._n)
+
+    def nivel_numerico(self, puntos):
+        return (np.asarray(puntos, dtype=float) - self._p) @ self._n
+
+    def normal_numerica(self, puntos):
+        return np.broadcast_to(self._n, np.shape(puntos)).copy()
+
+    def parametrizacion(self, u, v):
+        return self._p + u[..., None] * self._t1 + v[..., None] * self._t2
+
+
+class Cilindro(Superficie):
+    """
+    Cilindro de radio R alrededor del eje que pasa por p con dirección a. Normal radial
+    (d - (d·a) a)/R con d = r - p, curvatura media 1/(2R) y gaussiana 0. Para la malla se usa
+    la cara lateral de altura altura centrada en p.
+    """
+
+    def __init__(self, radio=1, punto=(0, 0, 0), eje=(0, 0, 1), altura=2.0):
+        super().__init__()
+        a = sp.Matrix(eje)
+        self.eje = a / sp.sqrt(a.dot(a))
+        self.punto = sp.Matrix(punto)
+        self.radio = sp.sympify(radio)
+        d = sp.Matrix([self.x, self.y, self.z]) - self.punto
+        radial = d - d.dot(self.eje) * self.eje
+        self.nivel = sp.sqrt(radial.dot(radial)) - self.radio
+        self.normal = radial / self.radio
+        self.curvatura_media = 1 / (2 * self.radio)
+        self.curvatura_gaussiana = sp.Integer(0)
+        self.rango_parametros = ((-altura / 2, altura / 2), (0, 2 * np.pi))
+        self._a = np.array(self.eje, dtype=float).reshape(3)
+        self._p = np.array(self.punto, dtype=float).reshape(3)
+        self._R = float(self.radio)
+        self._t1, self._t2 = _base_tangente(self._a)
+
+    def _radial(self, puntos):
+        d = np.asarray(puntos, dtype=float) - self._p
+        return d - (d @ self._a)[..., None] * self._a
+
+    def nivel_numerico(self, puntos):
+        return np.linalg.norm(self._radial(puntos), axis=-1) - self._R
+
+    def normal_numerica(self, puntos):
+        radial = self._radial(puntos)
+        return radial / np.linalg.norm(radial, axis=-1, keepdims=True)
+
+    def parametrizacion(self, u, v):
+        return (self._p + u[..., None] * self._a
+                + self._R * (np.cos(v)[..., None] * self._t1 + np.sin(v)[..., None] * self._t2))
+
+
+def _base_tangente(n):
+    """
+    Dos vectores unitarios ortogonales entre sí y a n.
+    """
+    auxiliar = np.eye(3)[np.argmin(np.abs(n))]
+    t1 = np.cross(n, auxiliar)
+    t1 /= np.linalg.norm(t1)
+    return t1, np.cross(n, t1)
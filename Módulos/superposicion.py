@@ -0,0 +1,196 @@
+
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+class SuperposicionCargas:
+    """
+    Potencial y campo eléctrico de N cargas puntuales por superposición numérica:
+
+    :math:`\\phi(x) = k \\sum_i q_i / |x - x_i|`,  :math:`E(x) = k \\sum_i q_i (x - x_i) / |x - x_i|^3`
+
+    Con k = 1 (por defecto) el potencial es la suma de las funciones test 1/|x - x_i| de
+    FuncionTestCartesiana pesadas por las cargas. Los puntos de observación se procesan por
+    bloques (y opcionalmente en varios hilos); con metodo='arbol' se usa un árbol de Barnes-Hut
+    con costo O(M log N), pensado para N del orden de 10^5 o más.
+    """
+
+    def __init__(self, posiciones, cargas, k=1.0):
+        """
+        Inicializa la clase SuperposicionCargas.
+
+        :param posiciones: Arreglo de forma (N, d) con las posiciones de las cargas.
+        :param cargas: Arreglo de forma (N,) con las magnitudes de las cargas.
+        :param k: Constante de Coulomb, 1/(4 pi epsilon_0) en SI.
+        """
+        self.posiciones = np.atleast_2d(np.asarray(posiciones, dtype=float))
+        self.cargas = np.asarray(cargas, dtype=float).reshape(-1)
+        if len(self.cargas) != len(self.posiciones):
+            raise ValueError("Debe haber una carga por cada posición.")
+        self.k = k
+        self._raiz = None #árbol de Barnes-Hut, se construye la primera vez que se usa
+
+    def potencial(self, puntos, metodo='directo', tam_bloque=1024, hilos=None, theta=0.5):
+        """
+        Calcula el potencial eléctrico en los puntos de observación.
+
+        :param puntos: Arreglo de forma (M, d).
+        :param metodo: 'directo' (suma exacta por bloques) o 'arbol' (Barnes-Hut).
+        :param tam_bloque: Número de puntos de observación por bloque.
+        :param hilos: Número de hilos para repartir los bloques; None usa un solo hilo.
+        :param theta: Criterio de apertura de Barnes-Hut (tamaño del nodo / distancia).
+        :return: Arreglo de forma (M,).
+        """
+        return self._evaluar(puntos, False, metodo, tam_bloque, hilos, theta)
+
+    def campo(self, puntos, metodo='directo', tam_bloque=1024, hilos=None, theta=0.5):
+        """
+        Calcula el campo eléctrico en los puntos de observación. Los parámetros son los
+        mismos que en potencial.
+
+        :return: Arreglo de forma (M, d).
+        """
+        return self._evaluar(puntos, True, metodo, tam_bloque, hilos, theta)
+
+    def _evaluar(self, puntos, campo, metodo, tam_bloque, hilos, theta):
+        puntos = np.atleast_2d(np.asarray(puntos, dtype=float))
+        if puntos.shape[1] != self.posiciones.shape[1]:
+            raise ValueError("Los puntos y las cargas deben tener la misma dimensión.")
+        if metodo == 'directo':
+            def bloque(X):
+                return _suma_directa(X, self.posiciones, self.cargas, campo)
+        elif metodo == 'arbol':
+            raiz = self.arbol()
+
+            def bloque(X):
+                salida = np.zeros(X.shape if campo else len(X))
+                _recorrer(raiz, X, np.arange(len(X)), salida, self.posiciones, self.cargas,
+                          theta, campo)
+                return salida
+        else:
+            raise ValueError("El método debe ser 'directo' o 'arbol'.")
+
+        forma = puntos.shape if campo else (len(puntos),)
+        salida = np.empty(forma)
+        inicios = range(0, len(puntos), tam_bloque)
+
+        def tarea(inicio):
+            salida[inicio:inicio + tam_bloque] = bloque(puntos[inicio:inicio + tam_bloque])
+
+        if hilos and hilos > 1:
+            with ThreadPoolExecutor(max_workers=hilos) as pool:
+                list(pool.map(tarea, inicios))
+        else:
+            for inicio in inicios:
+                tarea(inicio)
+        return self.k * salida
+
+    def arbol(self, max_hoja=32):
+        """
+        Construye (una sola vez) el árbol de Barnes-Hut de las cargas.
+        """
+        if self._raiz is None:
+            minimo = self.posiciones.min(axis=0)
+            maximo = self.posiciones.max(axis=0)
+            centro = (minimo + maximo) / 2
+            mitad = max((maximo - minimo).max() / 2, 1e-12)
+            self._raiz = _construir_nodo(self.posiciones, self.cargas,
+                                         np.arange(len(self.cargas)), centro, mitad, max_hoja)
+        return self._raiz
+
+
+def _suma_directa(X, Y, q, campo, max_elementos=1 << 18):
+    """
+    Suma directa de las contribuciones de las cargas (Y, q) en los puntos X, recorriendo las
+    cargas por bloques para que los arreglos intermedios (de forma (M, bloque)) quepan en caché.
+    Una carga situada exactamente en un punto de observación no contribuye en él.
+    """
+    salida = np.zeros(X.shape if campo else len(X))
+    paso = max(1, max_elementos // max(len(X), 1))
+    for inicio in range(0, len(Y), paso):
+        Yb, qb = Y[inicio:inicio + paso], q[inicio:inicio + paso]
+        diferencias = [X[:, j, None] - Yb[None, :, j] for j in range(X.shape[1])]
+        r2 = diferencias[0] ** 2
+        for dj in diferencias[1:]:
+            r2 += dj ** 2
+        with np.errstate(divide='ignore'):
+            inv_r = 1 / np.sqrt(r2, out=r2)
+        inv_r[~np.isfinite(inv_r)] = 0.0
+        if campo:
+            inv_r3q = inv_r ** 3
+            inv_r3q *= qb
+            for j, dj in enumerate(diferencias):
+                dj *= inv_r3q
+                salida[:, j] += dj.sum(axis=1)
+        else:
+            salida += inv_r @ qb
+    return salida
+
+
+class _Nodo:
+    """
+    Nodo del árbol de Barnes-Hut: caja de centro `centro` y semilado `mitad`, con la carga total
+    y los momentos dipolar y cuadrupolar (sin traza) de sus cargas respecto al centro.
+    """
+    __slots__ = ('centro', 'mitad', 'carga', 'dipolo', 'cuadrupolo', 'indices', 'hijos')
+
+    def __init__(self, centro, mitad, carga, dipolo, cuadrupolo, indices, hijos):
+        self.centro = centro
+        self.mitad = mitad
+        self.carga = carga
+        self.dipolo = dipolo
+        self.cuadrupolo = cuadrupolo
+        self.indices = indices
+        self.hijos = hijos
+
+
+def _construir_nodo(Y, q, indices, centro, mitad, max_hoja):
+    Yn, qn = Y[indices], q[indices]
+    rel = Yn - centro
+    carga = qn.sum()
+    dipolo = qn @ rel
+    cuadrupolo = 3 * np.einsum('i,ij,ik->jk', qn, rel, rel)
+    cuadrupolo -= np.eye(Y.shape[1]) * (qn @ np.einsum('ij,ij->i', rel, rel))
+    if len(indices) <= max_hoja or mitad < 1e-12:
+        return _Nodo(centro, mitad, carga, dipolo, cuadrupolo, indices, None)
+
+    #cada carga va al hijo cuyo código binario indica de qué lado del centro está
+    bits = (Yn > centro).astype(int)
+    codigos = bits @ (1 << np.arange(Y.shape[1]))
+    hijos = []
+    for codigo in np.unique(codigos):
+        signo = np.where((codigo >> np.arange(Y.shape[1])) & 1, 1.0, -1.0)
+        hijos.append(_construir_nodo(Y, q, indices[codigos == codigo],
+                                     centro + signo * mitad / 2, mitad / 2, max_hoja))
+    return _Nodo(centro, mitad, carga, dipolo, cuadrupolo, None, hijos)
+
+
+def _recorrer(nodo, X, idx, salida, Y, q, theta, campo):
+    """
+    Evalúa el nodo en los puntos X[idx]: con su desarrollo hasta el cuadrupolo para los puntos
+    lejanos y bajando a los hijos (o sumando directamente en las hojas) para los cercanos.
+    """
+    r = X[idx] - nodo.centro
+    d = np.sqrt(np.einsum('ij,ij->i', r, r))
+    lejos = 2 * nodo.mitad < theta * d
+    if lejos.any():
+        rl, dl = r[lejos], d[lejos]
+        pr = rl @ nodo.dipolo
+        Qr = rl @ nodo.cuadrupolo
+        rQr = np.einsum('ij,ij->i', rl, Qr)
+        if campo:
+            d3 = dl[:, None] ** 3
+            salida[idx[lejos]] += (nodo.carga * rl / d3
+                                   + 3 * pr[:, None] * rl / d3 / dl[:, None] ** 2
+                                   - nodo.dipolo / d3
+                                   - Qr / d3 / dl[:, None] ** 2
+                                   + 2.5 * rQr[:, None] * rl / d3 / dl[:, None] ** 4)
+        else:
+            salida[idx[lejos]] += nodo.carga / dl + pr / dl ** 3 + 0.5 * rQr / dl ** 5
+    cerca = idx[~lejos]
+    if len(cerca) == 0:
+        return
+    if nodo.hijos is None:
+        salida[cerca] += _suma_directa(X[cerca], Y[nodo.indices], q[nodo.indices], campo)
+    else:
+        for hijo in nodo.hijos:
+            _recorrer(hijo, X, cerca, salida, Y, q, theta, campo)
@@ -0,0 +1,185 @@
+
+"""
+Benchmarks de Distopy.
+
+Mide los operadores principales en función de sus ejes de escala y guarda los tiempos como
+una línea base en JSON; al comparar contra una línea base se marcan las regresiones que son
+estadísticamente significativas (prueba U de Mann-Whitney sobre las muestras) y mayores que
+un umbral relativo.
+
+Uso:
+    python benchmarks/rendimiento.py --guardar base.json
+    python benchmarks/rendimiento.py --comparar base.json [--filtro salto]
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import numpy as np
+import scipy
+from scipy import stats
+import sympy as sp
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Módulos'))
+
+from cache_simbolico import activar_cache
+from deltadirac_1d import DeltaDirac
+from op_dif import OperadoresDiferenciales, salto_funcion
+from accion_locint import Accion_LocInt
+from funcion_test_main import FuncionTestCartesiana
+
+x, y, z = sp.symbols('x y z')
+
+
+def casos():
+    """
+    Casos de benchmark como pares (nombre, función sin argumentos). La preparación (construir
+    expresiones, arreglos de puntos) se hace aquí, fuera de lo que se mide.
+    """
+    lista = []
+
+    #DeltaDirac.derivada contra el orden n
+    f = sp.exp(-x**2) * sp.sin(3 * x) / (1 + x**2)
+    for n in (1, 2, 4, 8, 16):
+        delta = DeltaDirac(f, x, sp.Rational(1, 2))
+        lista.append((f'derivada_delta/n={n}', lambda delta=delta, n=n: delta.derivada(n)))
+
+    #salto_funcion para un campo escalar y uno vectorial
+    normal = sp.Matrix([x, y, z]) / sp.sqrt(x**2 + y**2 + z**2)
+    r2 = x**2 + y**2 + z**2
+    escalar = sp.Piecewise((1 - r2, r2 < 1), (0, True))
+    vectorial = sp.Matrix([sp.Heaviside(1 - r2) * x, sp.Abs(y) * z, sp.sign(x + y) * r2])
+    lista.append(('salto_funcion/escalar', lambda: salto_funcion(escalar, normal, procesos=1)))
+    lista.append(('salto_funcion/matrix', lambda: salto_funcion(vectorial, normal, procesos=1)))
+
+    #Accion_LocInt contra la dimensión y la tolerancia
+    variables = (x, y, z)
+    for d in (1, 2, 3):
+        T = sp.exp(-sum(v**2 for v in variables[:d])) * sp.cos(variables[0])
+        limites = [[-1, 1]] * d
+        for tolerancia in (1e-6, 1e-10):
+            lista.append((f'accion_locint/d={d}/tol={tolerancia:g}',
+                          lambda T=T, d=d, limites=limites, tolerancia=tolerancia:
+                          Accion_LocInt(T, 1, d, limites, variables=variables[:d],
+                                        epsabs=tolerancia, epsrel=tolerancia)))
+
+    #FuncionTestCartesiana contra el tamaño del lote
+    prueba = FuncionTestCartesiana([0.1, 0.2, 0.3])
+    prueba.como_funcion()
+    generador = np.random.default_rng(0)
+    for N in (10**2, 10**4, 10**6):
+        puntos = generador.uniform(-1, 1, (N, 3))
+        lista.append((f'funcion_test/N={N}', lambda puntos=puntos: prueba.evaluar_lote(puntos)))
+
+    #operadores en sentido de distribuciones
+    campo = sp.Matrix([x * y, sp.sin(y) * z, sp.exp(x * z)])
+    n_x = sp.Matrix([1, 0, 0])
+    operadores = {
+        'gradiente': lambda: OperadoresDiferenciales.Gradiente(x * y * sp.exp(z), n_x, 2).gradiente_isod(),
+        'divergencia': lambda: OperadoresDiferenciales.Divergencia(
+            campo, n_x, sp.Matrix([2, 0, 0])).divergencia_isod(),
+        'rotacional': lambda: OperadoresDiferenciales.Rotacional(
+            campo, n_x, sp.Matrix([1, 2, 3])).rotacional_isod(),
+        'laplaciano': lambda: OperadoresDiferenciales.Laplaciano(
+            sp.exp(-r2) * x, n_x, 2, 3).laplaciano_isod(),
+    }
+    for nombre, funcion in operadores.items():
+        lista.append((f'{nombre}_isod', funcion))
+    return lista
+
+
+def medir(funcion, repeticiones=15, tiempo_minimo=0.05):
+    """
+    Tiempos por llamada de funcion. Cada muestra repite la llamada las veces necesarias para
+    durar al menos tiempo_minimo segundos (calibrado con la primera llamada, que además
+    calienta cachés de lambdify y de importaciones).
+
+    Returns:
+        dict: Muestras en segundos por llamada, mediana, media, desviación y llamadas por muestra.
+    """
+    inicio = time.perf_counter()
+    funcion()
+    primera = time.perf_counter() - inicio
+    llamadas = max(1, int(np.ceil(tiempo_minimo / max(primera, 1e-9))))
+    muestras = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for _ in range(llamadas):
+            funcion()
+        muestras.append((time.perf_counter() - inicio) / llamadas)
+    return {'muestras': muestras, 'mediana': float(np.median(muestras)),
+            'media': float(np.mean(muestras)), 'desviacion': float(np.std(muestras, ddof=1)),
+            'llamadas': llamadas}
+
+
+def ejecutar(filtro=None, repeticiones=15, tiempo_minimo=0.05):
+    """
+    Ejecuta los casos cuyo nombre contiene filtro. La caché simbólica se desactiva para medir
+    el cálculo y no la lectura de resultados guardados.
+    """
+    activar_cache(None, max_memoria=0)
+    resultados = {}
+    for nombre, funcion in casos():
+        if filtro and filtro not in nombre:
+            continue
+        resultados[nombre] = medir(funcion, repeticiones, tiempo_minimo)
+        print(f"{nombre:40s} {resultados[nombre]['mediana'] * 1e3:12.4f} ms", file=sys.stderr)
+    return {'metadatos': {'python': platform.python_version(), 'numpy': np.__version__,
+                          'scipy': scipy.__version__, 'sympy': sp.__version__,
+                          'plataforma': platform.platform(), 'cpus': os.cpu_count(),
+                          'fecha': time.strftime('%Y-%m-%dT%H:%M:%S')},
+            'casos': resultados}
+
+
+def comparar(actual, base, alfa=0.01, umbral=0.05):
+    """
+    Compara dos corridas caso por caso. Un caso es una regresión si sus muestras son más
+    lentas que las de la base según la prueba U de Mann-Whitney (unilateral, nivel alfa) y la
+    mediana crece más que el umbral relativo.
+
+    Returns:
+        list: Diccionarios con nombre, razón de medianas, valor p y si es regresión.
+    """
+    filas = []
+    for nombre, caso in actual['casos'].items():
+        if nombre not in base['casos']:
+            continue
+        anterior = base['casos'][nombre]
+        razon = caso['mediana'] / anterior['mediana']
+        p = stats.mannwhitneyu(caso['muestras'], anterior['muestras'], alternative='greater').pvalue
+        filas.append({'nombre': nombre, 'razon': razon, 'p': float(p),
+                      'regresion': bool(p < alfa and razon > 1 + umbral)})
+    return filas
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description='Benchmarks de Distopy.')
+    parser.add_argument('--guardar', help='Archivo JSON donde guardar los resultados.')
+    parser.add_argument('--comparar', help='Línea base JSON contra la que comparar.')
+    parser.add_argument('--filtro', help='Solo los casos cuyo nombre contiene este texto.')
+    parser.add_argument('--repeticiones', type=int, default=15)
+    parser.add_argument('--tiempo-minimo', type=float, default=0.05, help='Segundos por muestra.')
+    parser.add_argument('--alfa', type=float, default=0.01, help='Nivel de significancia.')
+    parser.add_argument('--umbral', type=float, default=0.05, help='Aumento relativo tolerado.')
+    opciones = parser.parse_args(argumentos)
+
+    actual = ejecutar(opciones.filtro, opciones.repeticiones, opciones.tiempo_minimo)
+    if opciones.guardar:
+        with open(opciones.guardar, 'w', encoding='utf-8') as archivo:
+            json.dump(actual, archivo, indent=1)
+
+    if opciones.comparar:
+        with open(opciones.comparar, encoding='utf-8') as archivo:
+            base = json.load(archivo)
+        filas = comparar(actual, base, opciones.alfa, opciones.umbral)
+        for fila in filas:
+            marca = 'REGRESION' if fila['regresion'] else ''
+            print(f"{fila['nombre']:40s} x{fila['razon']:7.3f}  p={fila['p']:.2g}  {marca}")
+        return 1 if any(fila['regresion'] for fila in filas) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import os
+import sys
+
+#los módulos se importan por nombre, igual que en benchmarks/rendimiento.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Módulos'))
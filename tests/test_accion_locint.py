@@ -0,0 +1,145 @@
+import warnings
+import itertools
+import numpy as np
+import pytest
+import sympy as sp
+from scipy import integrate
+from accion_locint import Accion_LocInt
+from funcion_test_main import FuncionTestCartesiana
+
+x, y, z = sp.symbols('x y z')
+
+
+def test_gauss_coincide_con_nquad():
+    T = sp.exp(-x**2 - y**2)
+    f = sp.cos(x) * (1 + y**2)
+    limites = [[-1, 2], [0, 1.5]]
+    referencia, _ = Accion_LocInt(T, f, 2, limites, metodo='nquad')
+    valor, error = Accion_LocInt(T, f, 2, limites)
+    assert valor == pytest.approx(referencia, rel=1e-9)
+    assert error < 1e-6
+
+
+def test_gauss_en_tres_dimensiones():
+    valor, _ = Accion_LocInt(x * y * z, sp.exp(x + y + z), 3, [[0, 1]] * 3)
+    assert valor == pytest.approx(1.0, rel=1e-9) #(int_0^1 t e^t dt)^3 = 1
+
+
+def test_qmc_coincide_con_nquad():
+    T = sp.exp(-x**2 - y**2)
+    f = sp.cos(x) * (1 + y**2)
+    limites = [[-1, 2], [0, 1.5]]
+    referencia, _ = integrate.nquad(lambda a, b: np.exp(-a**2 - b**2) * np.cos(a) * (1 + b**2),
+                                    limites)
+    valor, error = Accion_LocInt(T, f, 2, limites, metodo='qmc')
+    assert valor == pytest.approx(referencia, abs=max(10 * error, 1e-6))
+
+
+def test_funcion_python_que_no_acepta_arreglos():
+    T = lambda a, b: float(a + b) #falla con arreglos, se vectoriza con np.vectorize
+    valor, _ = Accion_LocInt(T, x * y, 2, [[0, 1], [0, 1]], variables=[x, y])
+    assert valor == pytest.approx(1 / 3)
+
+
+@pytest.mark.parametrize('metodo', ['gauss', 'qmc', 'nquad'])
+def test_funcion_test_constante(metodo):
+    valor, _ = Accion_LocInt(lambda a: a * a, 1, 1, [[0, 1]], metodo=metodo)
+    assert valor == pytest.approx(1 / 3, rel=1e-6)
+
+
+def test_limites_funcion_usan_nquad():
+    #triángulo 0 <= y <= x <= 1
+    valor, _ = Accion_LocInt(x, y, 2, [lambda x_: [0, x_], [0, 1]], variables=[y, x])
+    assert valor == pytest.approx(1 / 8)
+
+
+def test_metodo_desconocido():
+    with pytest.raises(ValueError):
+        Accion_LocInt(x, 1, 1, [[0, 1]], metodo='trapecio')
+
+
+def _nquad_por_octantes(g, limites, x0):
+    #nquad converge bien si la singularidad queda en una esquina de cada subcaja
+    total = 0.0
+    for cajas in np.ndindex(*[2] * len(x0)):
+        sub = [[lim[0], c] if i == 0 else [c, lim[1]] for lim, c, i in zip(limites, x0, cajas)]
+        total += integrate.nquad(g, sub, opts={'epsabs': 1e-10})[0]
+    return total
+
+
+def test_duffy_en_dos_dimensiones():
+    ft = FuncionTestCartesiana([0.3, -0.2])
+    limites = [[-1, 1], [-1, 1]]
+    valor, _ = Accion_LocInt(ft.simbolico(), sp.exp(x), 2, limites, singularidades=ft.x0)
+    referencia = _nquad_por_octantes(lambda a, b: np.exp(a) / np.hypot(a - 0.3, b + 0.2),
+                                     limites, ft.x0)
+    assert valor == pytest.approx(referencia, rel=1e-9)
+
+
+def test_duffy_valor_analitico():
+    #integral de 1/r sobre [-1, 1]^2 = 8 ln(1 + sqrt(2))
+    valor, _ = Accion_LocInt(1 / sp.sqrt(x**2 + y**2), 1, 2, [[-1, 1], [-1, 1]],
+                             singularidades=[0, 0])
+    assert valor == pytest.approx(8 * np.log(1 + np.sqrt(2)), rel=1e-10)
+
+
+def test_duffy_en_tres_dimensiones():
+    ft = FuncionTestCartesiana([0.25, 0.5, -0.5])
+    limites = [[-1, 1]] * 3
+    valor, _ = Accion_LocInt(ft.simbolico(), 1 + x * y, 3, limites, singularidades=ft.x0)
+    g = lambda a, b, c: (1 + a * b) / np.sqrt((a - 0.25)**2 + (b - 0.5)**2 + (c + 0.5)**2)
+    assert valor == pytest.approx(_nquad_por_octantes(g, limites, ft.x0), rel=1e-8)
+
+
+def _potencial_caja(p, a=-1.0, b=1.0):
+    #integral de 1/|r - p| sobre el cubo [a, b]^3 con p interior, sumando la primitiva F en
+    #las esquinas (d^3F/dxdydz = 1/r)
+    def F(u, v, w):
+        r = np.sqrt(u**2 + v**2 + w**2)
+        return (v * w * np.log(u + r) + u * w * np.log(v + r) + u * v * np.log(w + r)
+                - u**2 / 2 * np.arctan(v * w / (u * r)) - v**2 / 2 * np.arctan(u * w / (v * r))
+                - w**2 / 2 * np.arctan(u * v / (w * r)))
+    return sum((-1) ** (3 - sum(s)) * F(*[(b if si else a) - pi for si, pi in zip(s, p)])
+               for s in itertools.product((0, 1), repeat=3))
+
+
+_PUNTOS = [[0, 0, 0], [0.5, 0.5, 0.5], [-0.5, 0.25, 0.1], [0.3, -0.6, -0.2], [-0.4, -0.4, 0.7]]
+
+
+def test_celdas_regulares_de_varias_singularidades():
+    #1/r con cinco puntos declarados: muchas celdas regulares que se reparten la tolerancia
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        valor, error = Accion_LocInt(1 / sp.sqrt(x**2 + y**2 + z**2), 1, 3, [[-1, 1]] * 3,
+                                     variables=[x, y, z], singularidades=_PUNTOS)
+    exacto = _potencial_caja([0, 0, 0])
+    assert valor == pytest.approx(exacto, rel=1e-13)
+    assert error < 1e-8 * exacto
+
+
+def test_varias_singularidades_valor_analitico():
+    puntos = _PUNTOS
+    T = sum(1 / sp.sqrt((x - p[0])**2 + (y - p[1])**2 + (z - p[2])**2) for p in puntos)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error') #sin divisiones por cero al repartir la tolerancia
+        valor, error = Accion_LocInt(T, 1, 3, [[-1, 1]] * 3, variables=[x, y, z], singularidades=puntos)
+    exacto = sum(_potencial_caja(p) for p in puntos)
+    assert valor == pytest.approx(exacto, rel=1e-9)
+    assert error < 1e-6 * exacto
+
+
+def test_max_niveles_cero():
+    with pytest.raises(ValueError):
+        Accion_LocInt(x**2, 1, 1, [[0, 1]], max_niveles=0)
+
+
+@pytest.mark.parametrize('metodo', ['qmc', 'nquad'])
+def test_singularidades_solo_con_gauss(metodo):
+    with pytest.raises(ValueError):
+        Accion_LocInt(1 / sp.Abs(x), 1, 1, [[-1, 1]], metodo=metodo, singularidades=[0])
+
+
+def test_singularidades_con_limites_funcion():
+    with pytest.raises(ValueError):
+        Accion_LocInt(x, y, 2, [lambda x_: [0, x_], [0, 1]], variables=[y, x],
+                      singularidades=[0, 0])
@@ -0,0 +1,45 @@
+import pytest
+import sympy as sp
+import backend
+
+x, y = sp.symbols('x y')
+a = sp.Symbol('a', positive=True)
+
+
+@pytest.fixture(autouse=True)
+def backend_sympy():
+    anterior = backend._activo, backend._comparar
+    yield
+    backend._activo, backend._comparar = anterior
+
+
+def test_operaciones_con_sympy():
+    backend.usar_backend('sympy')
+    expr = sp.sin(x * y) + a * x**3
+    assert backend.diff(expr, x, 2) == sp.diff(expr, x, 2)
+    assert backend.subs(expr, {x: 1}) == expr.subs(x, 1)
+    assert backend.free_symbols(expr) == {x, y, a}
+    assert float(backend.evaluar(expr, {x: 1, y: 2, a: 3})) == pytest.approx(float(sp.sin(2)) + 3)
+
+
+def test_backend_desconocido():
+    with pytest.raises(ValueError):
+        backend.usar_backend('maxima')
+
+
+def test_symengine_coincide_con_sympy():
+    pytest.importorskip('symengine')
+    backend.usar_backend('symengine')
+    expr = sp.exp(-a * x**2) * sp.cos(y)
+    derivada = backend.diff(expr, x, 2)
+    assert sp.simplify(derivada - sp.diff(expr, x, 2)) == 0
+    assert a in derivada.free_symbols #se conservan los supuestos de los símbolos
+    assert backend.free_symbols(expr) == {x, y, a}
+    #las funciones que SymEngine no conoce se resuelven con SymPy
+    assert backend.diff(sp.Heaviside(x) * x, x) == sp.diff(sp.Heaviside(x) * x, x)
+
+
+def test_modo_comparar_sin_advertencias_en_sympy(recwarn):
+    backend.usar_backend('sympy', comparar=True)
+    backend.diff(sp.sin(x), x)
+    assert not [w for w in recwarn if issubclass(w.category, RuntimeWarning)]
@@ -0,0 +1,63 @@
+import sqlite3
+import sympy as sp
+import backend
+from cache_simbolico import CacheSimbolico, clave_cache
+
+x = sp.Symbol('x')
+
+
+class Contador:
+    def __init__(self):
+        self.llamadas = 0
+
+    def __call__(self, expr):
+        self.llamadas += 1
+        return sp.diff(expr, x)
+
+
+def test_acierto_en_memoria_y_en_disco(tmp_path):
+    ruta = str(tmp_path / 'cache.db')
+    contador = Contador()
+    cache = CacheSimbolico(ruta)
+    assert cache.obtener_o_calcular('diff', contador, x**3) == 3 * x**2
+    assert cache.obtener_o_calcular('diff', contador, x**3) == 3 * x**2
+    assert contador.llamadas == 1
+    #otro proceso (otra instancia) lo encuentra en disco
+    otra = CacheSimbolico(ruta)
+    assert otra.obtener_o_calcular('diff', contador, x**3) == 3 * x**2
+    assert contador.llamadas == 1
+
+
+def test_expulsion_y_total(tmp_path):
+    ruta = str(tmp_path / 'cache.db')
+    cache = CacheSimbolico(ruta, max_bytes=600, max_memoria=0, lote_accesos=1)
+    for n in range(10):
+        cache.obtener_o_calcular('potencia', lambda n: x**n, n)
+    conexion = sqlite3.connect(ruta)
+    claves = {c for c, in conexion.execute('SELECT clave FROM cache')}
+    total, = conexion.execute('SELECT bytes FROM total').fetchone()
+    suma, = conexion.execute('SELECT SUM(tam) FROM cache').fetchone()
+    indices = {n for n, in conexion.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert 0 < total == suma <= 600
+    assert len(claves) < 10
+    assert clave_cache('potencia', 9) in claves
+    assert 'cache_acceso' in indices
+    cache.limpiar()
+    assert conexion.execute('SELECT bytes FROM total').fetchone() == (0,)
+
+
+def test_la_clave_incluye_el_backend(monkeypatch):
+    clave = clave_cache('diff', x**2, x, 1)
+    monkeypatch.setattr(backend, '_activo', type('Otro', (), {'nombre': 'symengine'})())
+    assert clave_cache('diff', x**2, x, 1) != clave
+
+
+def test_las_matrices_se_entregan_copiadas():
+    cache = CacheSimbolico()
+    calcular = lambda: sp.Matrix([x, 1])
+    primera = cache.obtener_o_calcular('matriz', calcular)
+    primera[0] = 7
+    segunda = cache.obtener_o_calcular('matriz', calcular)
+    assert segunda == sp.Matrix([x, 1])
+    segunda[1] = 7
+    assert cache.obtener_o_calcular('matriz', calcular) == sp.Matrix([x, 1])
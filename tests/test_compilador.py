@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+import sympy as sp
+import scipy.special
+from compilador import compilar_expresiones
+from op_dif import OperadoresDiferenciales
+
+x, y, z = sp.symbols('x y z')
+
+
+def test_kernel_coincide_con_lambdify():
+    r = sp.sqrt(x**2 + y**2 + z**2)
+    expresiones = [1 / r, x / r**3, sp.exp(-r) * sp.cos(y)]
+    kernel = compilar_expresiones(expresiones, [x, y, z])
+    puntos = np.random.default_rng(0).uniform(0.5, 2, size=(40, 3))
+    esperado = np.stack([sp.lambdify((x, y, z), e, 'numpy')(*puntos.T) for e in expresiones], axis=1)
+    assert kernel(puntos).shape == (40, 3)
+    assert np.allclose(kernel(puntos), esperado)
+    assert 'sqrt' in kernel.fuente and kernel.fuente.count('sqrt') == 1 #subexpresión común
+
+
+def test_componentes_constantes_se_extienden():
+    kernel = compilar_expresiones(sp.Matrix([x, 2]), [x])
+    assert np.allclose(kernel.evaluar(np.array([1.0, 3.0])), [[1, 2], [3, 2]])
+
+
+def test_simbolos_sin_valor():
+    with pytest.raises(ValueError):
+        compilar_expresiones([x * sp.Symbol('a')], [x])
+
+
+def test_compilar_gradiente():
+    f = x**2 * y + z
+    normal = sp.Matrix([0, 0, 1])
+    salto = sp.Integer(3)
+    regular, singular = OperadoresDiferenciales.Gradiente(f, normal, salto).compilar([x, y, z])
+    puntos = np.array([[1.0, 2.0, 3.0], [-1.0, 0.5, 0.0]])
+    assert np.allclose(regular(puntos), [[4, 1, 1], [-1, 1, 1]])
+    assert np.allclose(singular(puntos), [[0, 0, 3], [0, 0, 3]])
+
+
+def test_compilar_laplaciano():
+    f = x**2 + y**2 + z**2
+    regular, singular = OperadoresDiferenciales.Laplaciano(f, sp.Matrix([1, 0, 0]), x, 2 * y).compilar(
+        [x, y, z])
+    puntos = np.array([[1.0, 2.0, 3.0]])
+    assert np.allclose(regular(puntos), [[6]])
+    assert np.allclose(singular(puntos), [[4, 1]])
+
+
+def test_funciones_especiales_usan_scipy():
+    r = sp.sqrt(x**2 + y**2 + z**2)
+    kernel = compilar_expresiones([sp.erf(r) / r, sp.besselj(0, x) * sp.gamma(y + 3)], [x, y, z])
+    puntos = np.random.default_rng(1).uniform(0.5, 2, size=(10, 3))
+    radio = np.linalg.norm(puntos, axis=1)
+    esperado = np.stack([scipy.special.erf(radio) / radio,
+                         scipy.special.jv(0, puntos[:, 0]) * scipy.special.gamma(puntos[:, 1] + 3)], axis=1)
+    assert np.allclose(kernel(puntos), esperado)
+
+
+def test_funcion_sin_equivalente_numerico():
+    with pytest.raises(ValueError, match='DiracDelta'):
+        compilar_expresiones([sp.DiracDelta(x) + y], [x, y])
@@ -0,0 +1,49 @@
+import pytest
+import sympy as sp
+from deltadirac_1d import DeltaDirac
+
+x = sp.Symbol('x')
+
+
+@pytest.mark.parametrize('f, x_0', [
+    (sp.exp(-x**2) * sp.sin(x), sp.Rational(1, 2)),
+    ((x + 1) / (x**2 + 3), 1), #racional: división de series
+    (sp.sqrt(x), 4),
+    (sp.cos(x) * x**3, sp.Symbol('a')),
+])
+def test_derivadas_hasta_coincide_con_derivada(f, x_0):
+    delta = DeltaDirac(f, x, x_0)
+    acciones = delta.derivadas_hasta(4)
+    assert len(acciones) == 5
+    for k, accion in enumerate(acciones):
+        assert sp.simplify(accion - delta.derivada(k)) == 0
+
+
+def test_accion_es_evaluar():
+    assert DeltaDirac(x**2 + 1, x, 3).accion() == 10
+
+
+def _singulares(distribucion):
+    return {(t.soporte, t.orden): t.coeficiente for t in distribucion.agrupar().singulares}
+
+
+def test_saltos_no_se_cuentan_dos_veces():
+    #(x H(x-1))'' = [[f']] δ(x-1) + [[f]] δ'(x-1), sin parte regular
+    derivada = DeltaDirac.DerivadaDiscontinua(x * sp.Heaviside(x - 1), x, [1])
+    segunda = derivada.derivada_discontinua_n(2, estructurada=True)
+    assert segunda.regular == 0
+    assert _singulares(segunda) == {(1, 0): 1, (1, 1): 1}
+    assert derivada.derivada_discontinua_1(2, 1) == segunda.como_expresion(x)
+    assert not derivada.derivada_discontinua_n(3).has(sp.DiracDelta)
+
+
+def test_varias_discontinuidades():
+    f = sp.Piecewise((0, x < 0), (x**2, x < 1), (3, True))
+    segunda = DeltaDirac.DerivadaDiscontinua(f, x, [0, 1]).derivada_discontinua_n(2, estructurada=True)
+    assert segunda.regular == sp.Piecewise((0, x < 0), (2, x < 1), (0, True))
+    assert _singulares(segunda) == {(0, 0): 0, (0, 1): 0, (1, 0): -2, (1, 1): 2}
+    r = sp.Symbol('r', real=True)
+    segunda = DeltaDirac.DerivadaDiscontinua(sp.Abs(r) + sp.sign(r - 2), r, [0, 2]).derivada_discontinua_n(
+        2, estructurada=True)
+    assert segunda.regular == 0
+    assert _singulares(segunda) == {(0, 0): 2, (0, 1): 0, (2, 0): 0, (2, 1): 2}
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+import sympy as sp
+from derivacion_numerica import derivada_numerica
+from deltadirac_1d import DeltaDirac
+
+x = sp.Symbol('x')
+f = sp.exp(sp.sin(x)) + sp.sin(x)
+
+
+@pytest.mark.parametrize('x_0', [0.3, 5.0, 50.0, 1000.0])
+@pytest.mark.parametrize('n', range(1, 7))
+def test_precision_lejos_del_origen(x_0, n):
+    exacta = float(sp.diff(f, x, n).subs(x, x_0))
+    assert derivada_numerica(f, x, x_0, n) == pytest.approx(exacta, rel=1e-3, abs=1e-6)
+
+
+def test_vectorizada_en_muchos_puntos():
+    puntos = np.linspace(-60, 60, 41)
+    exacta = sp.lambdify(x, sp.diff(f, x, 4), 'numpy')(puntos)
+    assert np.allclose(derivada_numerica(f, x, puntos, 4), exacta, rtol=1e-4, atol=1e-6)
+
+
+def test_no_convergencia_lanza_error():
+    with pytest.raises(ValueError):
+        derivada_numerica(sp.Abs(x), x, 0.0, 2)
+    assert np.isfinite(derivada_numerica(sp.Abs(x), x, 0.0, 2, tolerancia=None))
+
+
+@pytest.mark.parametrize('g, x_0, n', [
+    (sp.log(x + 2), 50.0, 6),
+    (1 / (1 + x**2), 50.0, 4),
+    (1 / (1 + x**2), 50.0, 6),
+    (1 / (1 + x**2), -80.0, 5),
+])
+def test_derivada_pequena_frente_a_f_no_converge(g, x_0, n):
+    #f^(n)(x_0) es mucho menor que f en la plantilla y el redondeo la domina
+    with pytest.raises(ValueError, match='no convergió'):
+        derivada_numerica(g, x, x_0, n)
+
+
+@pytest.mark.parametrize('g', [sp.log(x + 2), 1 / (1 + x**2), sp.exp(sp.cos(x / 3)) * x / 100])
+@pytest.mark.parametrize('x_0', [0.5, 5.0, 50.0, 400.0])
+@pytest.mark.parametrize('n', range(1, 7))
+def test_o_converge_o_lanza_error(g, x_0, n):
+    exacta = float(sp.diff(g, x, n).subs(x, x_0))
+    try:
+        aproximada = derivada_numerica(g, x, x_0, n)
+    except ValueError:
+        return
+    assert aproximada == pytest.approx(exacta, rel=1e-2, abs=1e-10)
+
+
+def test_derivada_nula_con_tolerancia_absoluta():
+    with pytest.raises(ValueError):
+        derivada_numerica(x**3, x, 2.0, 4)
+    assert derivada_numerica(x**3, x, 2.0, 4, tolerancia_absoluta=1e-3) == pytest.approx(0, abs=1e-3)
+
+
+def test_paso_complejo():
+    assert derivada_numerica(f, x, 50.0, 1, metodo='complejo') == pytest.approx(
+        float(sp.diff(f, x).subs(x, 50)), rel=1e-14)
+    with pytest.raises(ValueError):
+        derivada_numerica(f, x, 0.0, 2, metodo='complejo')
+
+
+def test_accion_numerica_de_la_delta():
+    delta = DeltaDirac(f, x, 50.0)
+    assert delta.derivada_numerica(6) == pytest.approx(float(sp.diff(f, x, 6).subs(x, 50)), rel=1e-3)
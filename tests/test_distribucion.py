@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+import sympy as sp
+from distribucion import Distribucion, TerminoSingular
+from malla_superficie import MallaSuperficie
+
+x, y, z = sp.symbols('x y z')
+
+
+def test_aritmetica_y_agrupar():
+    d = Distribucion(x, [TerminoSingular(2, 1), TerminoSingular(3, 1, orden=1)])
+    e = Distribucion(x**2, [TerminoSingular(5, 1)])
+    suma = (2 * d - e).agrupar()
+    assert suma.regular == 2 * x - x**2
+    coeficientes = {(t.soporte, t.orden): t.coeficiente for t in suma.singulares}
+    assert coeficientes == {(1, 0): -1, (1, 1): 6}
+    #los términos originales no cambian al agrupar
+    assert [t.coeficiente for t in d.singulares] == [2, 3]
+    assert (d + 1).regular == x + 1 and (1 + d).singulares == d.singulares
+
+
+def test_como_expresion():
+    t = sp.Symbol('t')
+    d = Distribucion(x, [TerminoSingular(2, 1), TerminoSingular(3, 0, orden=2)])
+    delta = sp.Function('δ')
+    esperado = x + 2 * delta(1) + 3 * sp.Subs(sp.Derivative(delta(t), (t, 2)), t, 0)
+    assert d.como_expresion(t) == esperado
+
+
+def test_accion_puntual_y_regular():
+    #<x + 2 δ(x-1) + 3 δ'(x), x^2> en [0, 2] = 2 + 2 - 0
+    d = Distribucion(x, [TerminoSingular(2, 1), TerminoSingular(3, 0, orden=1)])
+    assert float(d.accion(x**2, x, limites=[[0, 2]], variables=[x])) == pytest.approx(6)
+    #δ'' en 1 sobre x^3: (+1)·6
+    assert Distribucion(0, [TerminoSingular(1, 1, orden=2)]).accion(x**3, x) == 6
+
+
+def test_accion_superficial():
+    malla = MallaSuperficie.desde_nivel(x**2 + y**2 + z**2 - 1, [[-1.5, 1.5]] * 3, resolucion=40)
+    d = Distribucion(0, [TerminoSingular(sp.Integer(2), malla), TerminoSingular(sp.Integer(1), malla, orden=1)])
+    assert d.singulares[0].superficial() and d.singulares[1].superficial()
+    #2·área - integral de d(r^2)/dn = 8 pi - 8 pi
+    assert d.accion(x**2 + y**2 + z**2) == pytest.approx(0, abs=0.05)
+    simbolica = Distribucion(0, [TerminoSingular(sp.Integer(1), sp.Function('δ_s')(x, y, z))])
+    assert simbolica.accion(sp.Integer(1), malla=malla) == pytest.approx(4 * np.pi, rel=1e-2)
+
+
+def test_errores():
+    with pytest.raises(ValueError):
+        Distribucion(x).accion(x)
+    with pytest.raises(ValueError):
+        Distribucion(0, [TerminoSingular(1, 0)]).accion(x)
+    with pytest.raises(ValueError):
+        Distribucion(0, [TerminoSingular(1, sp.Function('δ_s')(x, y, z))]).accion(x, x)
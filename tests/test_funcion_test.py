@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+import sympy as sp
+from funcion_test_main import FuncionTestCartesiana
+
+
+def test_evaluar_lote_coincide_con_evaluar():
+    ft = FuncionTestCartesiana([3, 8, 5])
+    puntos = np.array([[3.0, 1.0, 4.0], [0.0, 0.0, 0.0], [1.5, -2.0, 7.0]])
+    esperado = [float(ft.evaluar(x=p[0], y=p[1], z=p[2])) for p in puntos]
+    assert ft.evaluar_lote(puntos) == pytest.approx(esperado)
+
+
+def test_evaluar_lote_por_bloques_en_memmap(tmp_path):
+    ft = FuncionTestCartesiana([0.5, -0.5])
+    puntos = np.random.default_rng(0).normal(size=(1000, 2))
+    salida = np.lib.format.open_memmap(tmp_path / 'f.npy', mode='w+', dtype=float, shape=(1000,))
+    ft.evaluar_lote(puntos, tam_bloque=64, salida=salida)
+    esperado = 1 / np.hypot(puntos[:, 0] - 0.5, puntos[:, 1] + 0.5)
+    assert np.allclose(salida, esperado)
+
+
+def test_evaluar_lote_unidimensional():
+    ft = FuncionTestCartesiana(2.0)
+    assert ft.evaluar_lote(np.array([0.0, 3.0, 2.5])) == pytest.approx([0.5, 1.0, 2.0])
+
+
+def test_evaluar_lote_forma_incorrecta():
+    with pytest.raises(ValueError):
+        FuncionTestCartesiana([0, 0, 0]).evaluar_lote(np.zeros((4, 2)))
+
+
+def test_evaluar_lote_x0_simbolico():
+    with pytest.raises(ValueError):
+        FuncionTestCartesiana(sp.Symbol('a')).evaluar_lote(np.zeros(3))
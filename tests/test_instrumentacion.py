@@ -0,0 +1,46 @@
+import json
+import sympy as sp
+import backend
+from instrumentacion import Perfil, perfil_activo, medir, instrumentado
+from deltadirac_1d import DeltaDirac
+
+x = sp.Symbol('x')
+
+
+@instrumentado('cuadrado')
+def _cuadrado(expr):
+    return sp.expand(expr**2)
+
+
+def test_sin_perfil_no_se_registra():
+    assert perfil_activo() is None
+    assert _cuadrado(x + 1) == x**2 + 2 * x + 1
+    assert medir('suma', lambda a, b: a + b, 1, 2) == 3
+
+
+def test_registros_y_anidamiento():
+    with Perfil() as externo:
+        _cuadrado(x + 1)
+        with Perfil(contar_operaciones=False) as interno:
+            _cuadrado(x + 1)
+            assert perfil_activo() is interno
+        medir('suma', lambda a, b: a + b, 1, 2, entrada=x + 1)
+    assert perfil_activo() is None
+    assert externo.registros['cuadrado']['llamadas'] == 1
+    assert externo.registros['cuadrado']['ops_entrada'] == 1 #x + 1
+    assert externo.registros['cuadrado']['ops_salida'] == sp.count_ops(x**2 + 2 * x + 1)
+    assert externo.registros['suma']['ops_salida'] == 0 and externo.registros['suma']['crecimiento_max'] is None
+    assert interno.registros['cuadrado']['ops_entrada'] == 0
+
+
+def test_operaciones_instrumentadas(tmp_path):
+    with Perfil() as perfil:
+        DeltaDirac(sp.exp(-x**2), x, 0).derivada(3)
+        backend.diff(sp.sin(x), x, 2)
+    assert {'diff', 'DeltaDirac.derivada'} <= set(perfil.registros)
+    assert perfil.registros['diff']['llamadas'] >= 1
+    reporte = perfil.reporte().splitlines()
+    assert reporte[0].split()[0] == 'operacion' and len(reporte) == len(perfil.registros) + 1
+    ruta = tmp_path / 'perfil.json'
+    perfil.exportar(str(ruta))
+    assert json.loads(ruta.read_text(encoding='utf-8')) == perfil.registros
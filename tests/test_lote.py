@@ -0,0 +1,92 @@
+import os
+import sys
+import json
+import time
+import subprocess
+import multiprocessing as mp
+import pytest
+import sympy as sp
+import lote
+from lote import ejecutar_lote
+
+x = sp.Symbol('x')
+
+
+def _ejecutar(tmp_path, ejercicios, **opciones):
+    entrada, salida = tmp_path / 'entrada.jsonl', tmp_path / 'salida.jsonl'
+    entrada.write_text('\n'.join(json.dumps(e) for e in ejercicios) + '\n', encoding='utf-8')
+    resumen = ejecutar_lote(str(entrada), str(salida), **opciones)
+    registros = [json.loads(linea) for linea in salida.read_text(encoding='utf-8').splitlines()]
+    return resumen, sorted(registros, key=lambda r: r['indice'])
+
+
+def test_derivada_discontinua(tmp_path):
+    ejercicio = {'id': 'xH', 'operacion': 'derivada_discontinua', 'funcion': 'x*Heaviside(x - 1)',
+                 'discontinuidades': ['1'], 'n': 2}
+    resumen, (registro,) = _ejecutar(tmp_path, [ejercicio], procesos=1)
+    delta = sp.Function('δ')
+    esperado = delta(1) + sp.Subs(sp.Derivative(delta(x), x), x, 1)
+    assert resumen['ok'] == 1
+    assert registro['resultado'] == str(esperado)
+
+
+def _lento(ejercicio, timeout_interno):
+    if timeout_interno is None: #el intento simbólico no termina a tiempo
+        time.sleep(30)
+    return 1.5, 'numerico'
+
+
+def _sin_memoria(ejercicio, timeout_interno):
+    if timeout_interno is None:
+        raise MemoryError
+    return 2, 'simbolico'
+
+
+def _roto(ejercicio, timeout_interno):
+    raise ValueError('siempre falla')
+
+
+@pytest.fixture
+def operaciones(monkeypatch):
+    #los procesos del lote se crean con fork y heredan estas operaciones
+    if 'fork' not in mp.get_all_start_methods():
+        pytest.skip('se necesita fork')
+    for nombre, operacion in [('lento', _lento), ('sin_memoria', _sin_memoria), ('roto', _roto)]:
+        monkeypatch.setitem(lote._OPERACIONES, nombre, operacion)
+
+
+def test_reintento_tras_timeout_y_memoria(tmp_path, operaciones):
+    ejercicios = [{'operacion': 'lento'}, {'operacion': 'sin_memoria'},
+                  {'operacion': 'accion_delta', 'funcion': 'x**3', 'punto': '2', 'n': 1}]
+    inicio = time.monotonic()
+    resumen, registros = _ejecutar(tmp_path, ejercicios, procesos=3, timeout=1.0)
+    assert time.monotonic() - inicio < 10
+    assert resumen == {'ok': 3, 'timeout': 0, 'memoria': 0, 'error': 0}
+    assert [(r['resultado'], r['metodo'], r['intentos']) for r in registros] == [
+        (1.5, 'numerico', 2), (2, 'simbolico', 2), ('-12', 'simbolico', 1)]
+
+
+def test_errores_no_se_reintentan(tmp_path, operaciones):
+    ejercicios = [{'operacion': 'roto'}, {'operacion': 'desconocida'}, {'operacion': 'lento'}]
+    resumen, registros = _ejecutar(tmp_path, ejercicios, procesos=3, timeout=0.5, reintentos=0)
+    assert resumen == {'ok': 0, 'timeout': 1, 'memoria': 0, 'error': 2}
+    assert [(r['estado'], r['intentos'], r['metodo']) for r in registros] == [
+        ('error', 1, None), ('error', 1, None), ('timeout', 1, None)]
+    assert registros[0]['resultado'] == 'ValueError: siempre falla'
+
+
+def test_operador_solo_se_reintenta_con_respaldo_numerico(tmp_path, operaciones, monkeypatch):
+    monkeypatch.setitem(lote._OPERACIONES, 'gradiente', _lento)
+    ejercicios = [{'operacion': 'gradiente', 'salto': '1'}, {'operacion': 'gradiente'},
+                  {'operacion': 'gradiente', 'punto': ['1', '0', '0']}]
+    resumen, registros = _ejecutar(tmp_path, ejercicios, procesos=3, timeout=0.5)
+    assert resumen == {'ok': 1, 'timeout': 2, 'memoria': 0, 'error': 0}
+    assert [(r['estado'], r['intentos']) for r in registros] == [('timeout', 1), ('timeout', 1), ('ok', 2)]
+
+
+def test_importar_no_carga_sympy():
+    modulos = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Módulos')
+    codigo = 'import sys; sys.path.insert(0, sys.argv[1]); import lote; print("sympy.core" in sys.modules)'
+    salida = subprocess.run([sys.executable, '-c', codigo, modulos], capture_output=True, text=True,
+                            check=True).stdout
+    assert salida.strip() == 'False'
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+import sympy as sp
+import backend
+from malla_superficie import MallaSuperficie
+from op_dif import OperadoresDiferenciales
+
+x, y, z = sp.symbols('x y z')
+caja = [[-1.5, 1.5]] * 3
+
+
+@pytest.fixture(scope='module')
+def esfera():
+    return MallaSuperficie.desde_nivel(x**2 + y**2 + z**2 - 1, caja, resolucion=48)
+
+
+def test_area_y_normales(esfera):
+    assert np.sum(esfera.pesos) == pytest.approx(4 * np.pi, rel=5e-3)
+    assert np.allclose(np.linalg.norm(esfera.puntos, axis=1), 1, atol=2e-2)
+    #la normal apunta hacia donde crece el nivel, hacia afuera
+    assert np.all(np.einsum('qi,qi->q', esfera.normales, esfera.puntos) > 0.99)
+
+
+def test_integrales_de_funciones_test(esfera):
+    resultado = esfera.integrar(np.ones(len(esfera.pesos)), [z**2, x * y, lambda p: p[:, 0]**2])
+    assert resultado == pytest.approx([4 * np.pi / 3, 0, 4 * np.pi / 3], rel=1e-2, abs=1e-3)
+
+
+def test_accion_de_saltos(esfera):
+    #salto escalar: integral vectorial de n phi; salto vectorial: integral de n·[[f]] phi
+    assert esfera.accion_salto(sp.Integer(1), [sp.Integer(1), z])[0] == pytest.approx([0, 0, 0], abs=1e-3)
+    assert esfera.accion_salto(sp.Integer(1), [z])[0] == pytest.approx([0, 0, 4 * np.pi / 3], rel=1e-2, abs=1e-3)
+    assert esfera.accion_salto(sp.Matrix([x, y, z]), [sp.Integer(1)]) == pytest.approx([4 * np.pi], rel=1e-2)
+
+
+def test_valores_en_cache(esfera):
+    primera = esfera.evaluar(x + z)
+    assert esfera.evaluar(x + z) is primera
+
+
+def test_acciones_de_los_operadores(esfera):
+    r = sp.Matrix([x, y, z])
+    normal = OperadoresDiferenciales.vector_normal(x**2 + y**2 + z**2 - 1)
+    divergencia = OperadoresDiferenciales.Divergencia(r, normal, r)
+    assert divergencia.accion_delta_s(esfera, [sp.Integer(1)]) == pytest.approx([4 * np.pi], rel=1e-2)
+    #capa dipolar: -integral de [[f]] dphi/dn con phi = r^2, dphi/dn = 2
+    laplaciano = OperadoresDiferenciales.Laplaciano(sp.Integer(1), normal, sp.Integer(1), sp.Integer(0))
+    assert laplaciano.accion_delta_s(esfera, [x**2 + y**2 + z**2]) == pytest.approx([-8 * np.pi], rel=1e-2)
+
+
+def test_gradiente_de_la_funcion_test_se_deriva_una_vez(esfera, monkeypatch):
+    normal = OperadoresDiferenciales.vector_normal(x**2 + y**2 + z**2 - 1)
+    laplaciano = OperadoresDiferenciales.Laplaciano(sp.Integer(1), normal, sp.Integer(1), sp.Integer(0))
+    derivadas = []
+    diff = backend.diff
+    monkeypatch.setattr(backend, 'diff', lambda *args: derivadas.append(args) or diff(*args))
+    funciones_test = [x**2 + y**2 + z**2, x * z]
+    primera = laplaciano.accion_delta_s(esfera, funciones_test)
+    assert len(derivadas) == 6
+    assert np.allclose(laplaciano.accion_delta_s(esfera, funciones_test), primera)
+    assert len(derivadas) == 6
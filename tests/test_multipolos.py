@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from multipolos import ExpansionMultipolar
+from superposicion import SuperposicionCargas
+from op_electro import OperadoresElectrostaticos
+
+
+@pytest.fixture
+def distribucion():
+    rng = np.random.default_rng(4)
+    return rng.uniform(-0.5, 0.5, size=(100, 3)), rng.normal(size=100)
+
+
+def _lejanos(n, radio, semilla=5):
+    direcciones = np.random.default_rng(semilla).normal(size=(n, 3))
+    return radio * direcciones / np.linalg.norm(direcciones, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize('L', [2, 6, 10])
+def test_potencial_dentro_de_la_cota(distribucion, L):
+    posiciones, q = distribucion
+    expansion = ExpansionMultipolar(posiciones, q, L)
+    puntos = _lejanos(100, 4.0)
+    exacto = SuperposicionCargas(posiciones, q).potencial(puntos)
+    error = np.abs(expansion.potencial(puntos) - exacto)
+    assert np.all(error <= expansion.cota_error(puntos) * (1 + 1e-9) + 1e-14)
+
+
+def test_campo_converge_a_la_suma_directa(distribucion):
+    posiciones, q = distribucion
+    puntos = _lejanos(50, 5.0)
+    exacto = SuperposicionCargas(posiciones, q).campo(puntos)
+    expansion = ExpansionMultipolar(posiciones, q, 12)
+    assert np.allclose(expansion.campo(puntos), exacto, rtol=1e-7, atol=1e-10)
+
+
+def test_puntos_cercanos_por_suma_directa(distribucion):
+    posiciones, q = distribucion
+    expansion = ExpansionMultipolar(posiciones, q, 2)
+    puntos = np.random.default_rng(6).uniform(-0.6, 0.6, size=(20, 3))
+    directo = SuperposicionCargas(posiciones, q)
+    assert np.allclose(expansion.potencial(puntos), directo.potencial(puntos))
+    assert np.all(expansion.cota_error(puntos) == 0)
+
+
+def test_monopolo_y_dipolo():
+    #dos cargas +1 en z = ±d: en el eje lejano phi ~ 2/r + 2 d^2/r^3
+    expansion = ExpansionMultipolar([[0, 0, 0.1], [0, 0, -0.1]], [1.0, 1.0], 2, centro=[0, 0, 0])
+    assert expansion.momentos[0, 0] == pytest.approx(2.0)
+    assert abs(expansion.momentos[1, 0]) < 1e-14
+    r = 10.0
+    assert expansion.potencial([[0, 0, r]])[0] == pytest.approx(2 / r + 2 * 0.01 / r**3, rel=1e-6)
+
+
+def test_expansion_desde_el_potencial(distribucion):
+    posiciones, q = distribucion
+    potencial = OperadoresElectrostaticos.PotencialElectrico.de_cargas(posiciones, q)
+    expansion = potencial.expansion_multipolar(8)
+    puntos = _lejanos(10, 6.0)
+    assert np.allclose(expansion.potencial(puntos), potencial.evaluar(puntos), rtol=1e-6)
@@ -0,0 +1,85 @@
+import os
+import sys
+import json
+import hashlib
+import subprocess
+import numpy as np
+import pytest
+import sympy as sp
+from compilador import compilar_expresiones
+from funcion_test_main import FuncionTestCartesiana
+from op_dif import OperadoresDiferenciales
+from numerico import guardar_kernels, cargar_kernels
+
+x, y, z = sp.symbols('x y z')
+puntos = np.array([[1.0, 2.0, 3.0], [-1.0, 0.5, 0.25]])
+
+
+@pytest.fixture
+def guardados(tmp_path):
+    ruta = str(tmp_path / 'kernels.json')
+    gradiente = OperadoresDiferenciales.Gradiente(x**2 * y + z, sp.Matrix([0, 0, 1]), 3)
+    #Max se imprime con functools.reduce, Abs con abs y erf con scipy.special
+    maximo = compilar_expresiones([sp.Max(x, y) + sp.Abs(z), sp.Piecewise((x, x < 0), (1, True))], [x, y, z])
+    kernels = {'prueba': FuncionTestCartesiana([0.1, 0.2, 0.3]).compilar(),
+               'gradiente': gradiente.compilar([x, y, z]), 'maximo': maximo,
+               'especial': compilar_expresiones([sp.erf(x) * sp.besselj(1, y) + sp.pi], [x, y, z])}
+    guardar_kernels(ruta, kernels)
+    return ruta, kernels
+
+
+def test_ida_y_vuelta(guardados):
+    ruta, kernels = guardados
+    cargados = cargar_kernels(ruta)
+    assert set(cargados) == {'prueba', 'gradiente_regular', 'gradiente_singular', 'maximo', 'especial'}
+    assert np.allclose(cargados['prueba'](puntos), kernels['prueba'](puntos))
+    assert np.allclose(cargados['gradiente_regular'](puntos), kernels['gradiente'][0](puntos))
+    assert np.allclose(cargados['gradiente_singular'](puntos), [[0, 0, 3]] * 2)
+    assert np.allclose(cargados['maximo'](puntos), [[5, 1], [0.75, -1]])
+    assert np.allclose(cargados['especial'](puntos), kernels['especial'](puntos))
+
+
+def test_cargar_no_importa_sympy(guardados):
+    ruta, _ = guardados
+    modulos = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Módulos')
+    codigo = ('import sys; sys.path.insert(0, sys.argv[1]); import numerico; '
+              'k = numerico.cargar_kernels(sys.argv[2]); k["prueba"]([[1.0, 1.0, 1.0]]); '
+              'print("sympy.core" in sys.modules)')
+    salida = subprocess.run([sys.executable, '-c', codigo, modulos, ruta], capture_output=True, text=True,
+                            check=True).stdout
+    assert salida.strip() == 'False'
+
+
+def _reescribir(ruta, fuente, rehacer_hash=True):
+    with open(ruta, encoding='utf-8') as archivo:
+        datos = json.load(archivo)
+    datos['prueba']['fuente'] = fuente
+    if rehacer_hash:
+        datos['prueba']['sha256'] = hashlib.sha256(fuente.encode()).hexdigest()
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo)
+
+
+def test_fuente_modificada_se_rechaza(guardados):
+    ruta, kernels = guardados
+    _reescribir(ruta, kernels['prueba'].fuente.replace('numpy.sqrt', 'numpy.exp'), rehacer_hash=False)
+    with pytest.raises(ValueError, match='hash'):
+        cargar_kernels(ruta)
+
+
+@pytest.mark.parametrize('fuente', [
+    'import os\ndef funcion_test(_v0, _v1, _v2):\n    return (_v0, )\n',
+    'def funcion_test(_v0, _v1, _v2):\n    return (__import__("os").getcwd(), )\n',
+    'def funcion_test(_v0, _v1, _v2):\n    return (numpy.load("datos.npy"), )\n',
+    'def funcion_test(_v0, _v1, _v2):\n    return (numpy.__class__, )\n',
+    'def funcion_test(_v0, _v1, _v2):\n    x = open\n    return (_v0, )\n',
+    'def funcion_test(_v0, _v1, _v2=numpy.nan):\n    return (_v0, )\n',
+    'def otro(_v0, _v1, _v2):\n    return (_v0, )\n',
+    'def funcion_test(_v0, _v1, _v2):\n    return (functools.partial(_v0), )\n',
+    'def funcion_test(_v0, _v1, _v2):\n    return (scipy.io.loadmat(_v0), )\n',
+])
+def test_fuente_no_generada_se_rechaza(guardados, fuente):
+    ruta, _ = guardados
+    _reescribir(ruta, fuente)
+    with pytest.raises(ValueError, match='no es una función generada'):
+        cargar_kernels(ruta)
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from scipy.special import erf
+from poisson import resolver_poisson, verificar_poisson, coordenadas_rejilla
+from op_electro import OperadoresElectrostaticos
+
+n, L, sigma = 48, 2.0, 0.15
+h = L / n
+
+
+@pytest.fixture(scope='module')
+def gaussiana():
+    x, y, z = coordenadas_rejilla((n, n, n), h, origen=(-L / 2,) * 3)
+    r = np.sqrt(x**2 + y**2 + z**2)
+    rho = np.exp(-r**2 / (2 * sigma**2)) / (2 * np.pi * sigma**2) ** 1.5 #carga total 1
+    return r, rho
+
+
+def test_potencial_de_una_gaussiana(gaussiana):
+    r, rho = gaussiana
+    phi, E = resolver_poisson(rho, h)
+    #con epsilon_0 = 1/(4 pi) el potencial exacto es erf(r/(sqrt(2) sigma))/r
+    lejos = r > 2 * sigma
+    exacto = erf(r[lejos] / (np.sqrt(2) * sigma)) / r[lejos]
+    assert np.max(np.abs(phi[lejos] - exacto) / exacto) < 1e-2
+    #campo radial de módulo Q(r)/r^2 en un punto del eje x
+    i, j = 3 * n // 4, n // 2
+    radio = r[i, j, j]
+    esperado = erf(radio / (np.sqrt(2) * sigma)) / radio**2 \
+        - np.sqrt(2 / np.pi) / sigma * np.exp(-radio**2 / (2 * sigma**2)) / radio
+    assert E[0, i, j, j] == pytest.approx(esperado, rel=2e-2)
+    assert abs(E[1, i, j, j]) < 1e-6 * esperado
+    assert verificar_poisson(phi, rho, h) < 5e-2
+
+
+def test_float32(gaussiana):
+    r, rho = gaussiana
+    phi64, _ = resolver_poisson(rho, h)
+    phi32, E32 = resolver_poisson(rho, h, precision=np.float32)
+    assert phi32.dtype == E32.dtype == np.float32
+    assert np.allclose(phi32, phi64, rtol=1e-4, atol=1e-5)
+
+
+def test_modo_periodico():
+    forma, espaciado = (32, 16, 8), (1 / 32, 1 / 16, 1 / 8)
+    x, y, z = coordenadas_rejilla(forma, espaciado)
+    k = 2 * np.pi * np.array([1, 2, 1])
+    rho = 3 + np.sin(k[0] * x) * np.cos(k[1] * y) * np.cos(k[2] * z)
+    phi, E = resolver_poisson(rho, espaciado, 'periodico', epsilon_0=1.0)
+    #la media de la carga se resta y cada modo se divide por |k|^2
+    assert np.allclose(phi, (rho - 3) / np.sum(k**2), atol=1e-12)
+    assert np.allclose(E[0], -k[0] * np.cos(k[0] * x) * np.cos(k[1] * y) * np.cos(k[2] * z) / np.sum(k**2),
+                       atol=1e-12)
+    assert verificar_poisson(phi, rho, espaciado, 1.0, periodico=True) < 5e-2
+
+
+def test_modo_desconocido():
+    with pytest.raises(ValueError):
+        resolver_poisson(np.zeros((4, 4, 4)), 1.0, 'dirichlet')
+
+
+def test_potencial_de_densidad(gaussiana):
+    _, rho = gaussiana
+    potencial, campo = OperadoresElectrostaticos.PotencialElectrico.de_densidad(rho, h)
+    phi, E = resolver_poisson(rho, h)
+    assert np.array_equal(potencial.funcion, phi)
+    assert np.array_equal(campo.vector, E)
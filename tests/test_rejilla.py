@@ -0,0 +1,105 @@
+import os
+import numpy as np
+import pytest
+import scipy.special
+import sympy as sp
+from rejilla import evaluar_rejilla
+from op_electro import OperadoresElectrostaticos
+
+limites = [[0, 1], [-1, 1], [0, 2]]
+forma = (5, 6, 7)
+
+
+def _suma(puntos):
+    return puntos @ np.array([1.0, 10.0, 100.0])
+
+
+class Interrumpida:
+    """
+    Evalúa _suma y falla después de `bloques` bloques, contando los puntos evaluados.
+    """
+
+    def __init__(self, bloques):
+        self.bloques = bloques
+        self.puntos = 0
+
+    def __call__(self, puntos):
+        if self.bloques == 0:
+            raise KeyboardInterrupt
+        self.bloques -= 1
+        self.puntos += len(puntos)
+        return _suma(puntos)
+
+
+def _esperado():
+    ejes = [np.linspace(a, b, n) for (a, b), n in zip(limites, forma)]
+    X, Y, Z = np.meshgrid(*ejes, indexing='ij')
+    return X + 10 * Y + 100 * Z
+
+
+def test_evalua_y_borra_el_progreso(tmp_path):
+    ruta = str(tmp_path / 'salida.npy')
+    resultado = evaluar_rejilla(lambda p: np.stack([_suma(p), -_suma(p)], axis=1), ruta, limites,
+                                forma, componentes=2, puntos_por_bloque=16)
+    assert resultado.shape == forma + (2,)
+    assert np.allclose(resultado[..., 0], _esperado()) and np.allclose(resultado[..., 1], -_esperado())
+    assert os.listdir(tmp_path) == ['salida.npy']
+
+
+def test_reanuda_solo_los_bloques_que_faltan(tmp_path):
+    ruta = str(tmp_path / 'salida.npy')
+    with pytest.raises(KeyboardInterrupt):
+        evaluar_rejilla(Interrumpida(3), ruta, limites, forma, puntos_por_bloque=20, hilos=1,
+                        bloques_por_guardado=1, clave='suma')
+    resto = Interrumpida(100)
+    resultado = evaluar_rejilla(resto, ruta, limites, forma, puntos_por_bloque=20, hilos=1, clave='suma')
+    assert resto.puntos == np.prod(forma) - 3 * 20
+    assert np.allclose(resultado, _esperado())
+
+
+@pytest.mark.parametrize('cambio', [{'limites': [[0, 1], [-1, 1], [0, 3]]}, {'clave': 'otra'},
+                                    {'puntos_por_bloque': 10}])
+def test_no_reanuda_otra_rejilla_u_otra_funcion(tmp_path, cambio):
+    ruta = str(tmp_path / 'salida.npy')
+    opciones = {'limites': limites, 'puntos_por_bloque': 20, 'clave': 'suma'}
+    with pytest.raises(KeyboardInterrupt):
+        evaluar_rejilla(Interrumpida(3), ruta, forma=forma, hilos=1, bloques_por_guardado=1, **opciones)
+    opciones.update(cambio)
+    nueva = Interrumpida(1000)
+    evaluar_rejilla(nueva, ruta, forma=forma, hilos=1, **opciones)
+    assert nueva.puntos == np.prod(forma)
+
+
+def test_potencial_de_otras_cargas_no_reanuda(tmp_path, monkeypatch):
+    ruta = str(tmp_path / 'phi.npy')
+    primero = OperadoresElectrostaticos.PotencialElectrico.de_cargas([[5.0, 0, 0]], [1.0])
+    segundo = OperadoresElectrostaticos.PotencialElectrico.de_cargas([[5.0, 0, 0]], [2.0])
+    llamadas = []
+    original = type(primero.funcion).potencial
+
+    def interrumpir(self, puntos, **opciones):
+        llamadas.append(len(puntos))
+        if len(llamadas) == 2:
+            raise KeyboardInterrupt
+        return original(self, puntos, **opciones)
+
+    monkeypatch.setattr(type(primero.funcion), 'potencial', interrumpir)
+    with pytest.raises(KeyboardInterrupt):
+        primero.evaluar_rejilla(ruta, limites, forma, puntos_por_bloque=20, hilos=1, bloques_por_guardado=1)
+    monkeypatch.setattr(type(primero.funcion), 'potencial', original)
+    phi = segundo.evaluar_rejilla(ruta, limites, forma, puntos_por_bloque=20, hilos=1)
+    ejes = [np.linspace(a, b, n) for (a, b), n in zip(limites, forma)]
+    X, Y, Z = np.meshgrid(*ejes, indexing='ij')
+    assert np.allclose(phi, 2 / np.sqrt((X - 5)**2 + Y**2 + Z**2))
+
+
+def test_potencial_con_funcion_especial(tmp_path):
+    x, y, z = sp.symbols('x y z')
+    r = sp.sqrt(x**2 + y**2 + z**2)
+    ruta = str(tmp_path / 'phi.npy')
+    potencial = OperadoresElectrostaticos.PotencialElectrico(sp.erf(r) / r)
+    phi = potencial.evaluar_rejilla(ruta, limites, forma, puntos_por_bloque=20, hilos=1)
+    ejes = [np.linspace(a, b, n) for (a, b), n in zip(limites, forma)]
+    radio = np.sqrt(sum(eje**2 for eje in np.meshgrid(*ejes, indexing='ij')))
+    assert np.allclose(phi, scipy.special.erf(radio) / radio)
+    assert os.listdir(tmp_path) == ['phi.npy']
@@ -0,0 +1,63 @@
+import os
+import importlib.util
+import numpy as np
+import pytest
+import cache_simbolico
+
+_ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks', 'rendimiento.py')
+_spec = importlib.util.spec_from_file_location('rendimiento', _ruta)
+rendimiento = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(rendimiento)
+
+
+@pytest.fixture(autouse=True)
+def cache_original(monkeypatch):
+    #ejecutar() desactiva la caché global; se restaura al terminar
+    monkeypatch.setattr(cache_simbolico, '_cache', cache_simbolico._cache)
+
+
+def _corrida(medianas, dispersion=0.01, semilla=0):
+    generador = np.random.default_rng(semilla)
+    casos = {}
+    for nombre, mediana in medianas.items():
+        muestras = list(mediana * (1 + dispersion * generador.standard_normal(15)))
+        casos[nombre] = {'muestras': muestras, 'mediana': float(np.median(muestras))}
+    return {'casos': casos}
+
+
+def test_comparar_marca_solo_regresiones_significativas():
+    base = _corrida({'rapido': 1.0, 'igual': 1.0, 'lento': 1.0, 'solo_en_base': 1.0})
+    actual = _corrida({'rapido': 0.5, 'igual': 1.0, 'lento': 1.5, 'sin_base': 1.0}, semilla=1)
+    #2% más lento en todas las muestras: significativo pero por debajo del umbral
+    actual['casos']['igual'] = {'muestras': [m * 1.02 for m in base['casos']['igual']['muestras']],
+                                'mediana': base['casos']['igual']['mediana'] * 1.02}
+    filas = {f['nombre']: f for f in rendimiento.comparar(actual, base)}
+    assert set(filas) == {'rapido', 'igual', 'lento'}
+    assert not filas['rapido']['regresion']
+    assert not filas['igual']['regresion'] and filas['igual']['p'] < 0.01
+    assert filas['lento']['regresion'] and filas['lento']['razon'] == pytest.approx(1.5, rel=0.05)
+
+
+def test_medir():
+    llamadas = []
+    resultado = rendimiento.medir(lambda: llamadas.append(1), repeticiones=4, tiempo_minimo=0)
+    assert len(resultado['muestras']) == 4 and resultado['llamadas'] == 1
+    assert len(llamadas) == 5 #la primera llamada calibra
+    assert min(resultado['muestras']) <= resultado['mediana'] <= max(resultado['muestras'])
+
+
+def test_guardar_y_comparar(tmp_path, capsys):
+    base = str(tmp_path / 'base.json')
+    opciones = ['--filtro', 'derivada_delta/n=2', '--repeticiones', '3', '--tiempo-minimo', '0']
+    assert rendimiento.main(opciones + ['--guardar', base]) == 0
+    capsys.readouterr()
+    #la misma máquina no debería mostrar una regresión del 500%
+    assert rendimiento.main(opciones + ['--comparar', base, '--umbral', '5']) == 0
+    salida = capsys.readouterr().out
+    assert 'derivada_delta/n=2' in salida and 'REGRESION' not in salida
+
+
+def test_todos_los_casos_tienen_nombre_unico():
+    nombres = [nombre for nombre, _ in rendimiento.casos()]
+    assert len(nombres) == len(set(nombres))
+    assert all(callable(funcion) for _, funcion in rendimiento.casos())
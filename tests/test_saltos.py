@@ -0,0 +1,94 @@
+import time
+import pytest
+import sympy as sp
+import saltos
+from saltos import limite_lateral, limite_numerico, calcular_saltos, calcular_salto
+from op_dif import salto_funcion
+
+x, y, z = sp.symbols('x y z')
+
+
+@pytest.mark.parametrize('expr, x0, derecha, izquierda', [
+    (sp.Heaviside(x - 1) * x**2, 1, 1, 0),
+    (sp.Piecewise((x, x < 0), (x + 2, True)), 0, 2, 0),
+    (sp.sign(x) * sp.cos(x), 0, 1, -1),
+    (sp.Abs(x - 2) / (x - 2), 2, 1, -1),
+    (sp.Heaviside((x - 1)**2 * (x - 3)), 1, 0, 0), #el signo no cambia en una raíz doble
+])
+def test_limites_laterales_por_rama(expr, x0, derecha, izquierda):
+    assert limite_lateral(expr, x, x0, '+') == derecha
+    assert limite_lateral(expr, x, x0, '-') == izquierda
+
+
+def test_limite_lateral_sin_rama_usa_sp_limit():
+    assert limite_lateral(sp.sin(x) / x, x, 0, '+') == 1
+    assert limite_lateral(sp.floor(x), x, 1, '-') == 0
+
+
+@pytest.mark.parametrize('expr, x0, dir, limite', [
+    (sp.Mod(x, 1), 1, '-', 1),
+    (sp.atan(1 / x), 0, '+', sp.pi / 2),
+    (sp.atan(1 / x), 0, '-', -sp.pi / 2),
+    (sp.Piecewise((1, x < 0), (2, True)) * sp.Mod(x, 2), 0, '-', 2),
+    (sp.Heaviside(x) * sp.atan(1 / x), 0, '+', sp.pi / 2), #rama elegida pero no continua
+])
+def test_sin_camino_rapido_si_no_es_continua(expr, x0, dir, limite):
+    assert limite_lateral(expr, x, x0, dir) == limite
+
+
+def test_salto_con_rama_simbolica():
+    a = sp.Symbol('a', positive=True)
+    assert sp.simplify(calcular_salto(sp.Heaviside(x - a) * sp.exp(x), x, a) - sp.exp(a)) == 0
+
+
+def test_limite_numerico_con_punto():
+    expr = sp.Heaviside(x) * (y + z**2)
+    with pytest.raises(TimeoutError):
+        limite_numerico(expr, x, 0, '+')
+    assert float(limite_numerico(expr, x, 0, '+', punto={y: 1, z: 2})) == pytest.approx(5)
+
+
+def test_saltos_en_paralelo():
+    tareas = [(sp.Heaviside(x - k) * (k + 1), x, k) for k in range(4)]
+    assert calcular_saltos(tareas, procesos=2) == [1, 2, 3, 4]
+
+
+def _dormir(segundos):
+    time.sleep(segundos)
+    return 'simbolico'
+
+
+def _respaldo(segundos):
+    return 'numerico'
+
+
+def test_pool_plazo_por_tarea():
+    #la tarea colgada no hace que las que esperan detrás de ella se den por vencidas
+    tareas = [(30,), (0.3,), (0.3,), (0,)]
+    inicio = time.monotonic()
+    resultados = saltos._en_pool(_dormir, tareas, _respaldo, timeout=1.0, procesos=1)
+    assert resultados == ['numerico', 'simbolico', 'simbolico', 'simbolico']
+    assert time.monotonic() - inicio < 10
+
+
+def _falla(valor):
+    raise ValueError(valor)
+
+
+def test_pool_propaga_errores():
+    with pytest.raises(ValueError):
+        saltos._en_pool(_falla, [(1,)], _respaldo, timeout=5.0, procesos=1)
+
+
+def test_respaldo_numerico_de_campo_vectorial(monkeypatch):
+    #se fuerza el respaldo haciendo que el cálculo simbólico nunca termine a tiempo
+    monkeypatch.setattr(saltos, 'calcular_salto', lambda *t: time.sleep(30))
+    campo = sp.Matrix([sp.Heaviside(z) * x, sp.Heaviside(z) * y**2, 0])
+    salto = salto_funcion(campo, sp.Matrix([0, 0, 1]), timeout=0.5, procesos=3, punto={x: 2, y: 3, z: 0})
+    assert [float(s) for s in salto] == pytest.approx([2, 9, 0], abs=1e-6)
+
+
+def test_salto_simbolico_de_campo_vectorial_en_punto():
+    campo = sp.Matrix([sp.Heaviside(z) * x, 0, sp.Piecewise((1, z > 0), (y, True))])
+    salto = salto_funcion(campo, sp.Matrix([0, 0, 1]), procesos=1, punto={x: 2, y: 3, z: 0})
+    assert salto == sp.Matrix([2, 0, -2])
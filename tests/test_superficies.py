@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+import sympy as sp
+from superficies import Superficie, Esfera, Plano, Cilindro
+from op_dif import OperadoresDiferenciales
+
+x, y, z = sp.symbols('x y z')
+catalogo = [Esfera(2, (1, 0, -1)), Plano((1, 1, 0), (0, 0, 1), extension=1.5),
+            Cilindro(0.5, (0, 1, 0), (0, 0, 1), 3.0)]
+areas = [16 * np.pi, 9.0, 3 * np.pi]
+
+
+def test_superficie_es_abstracta():
+    with pytest.raises(TypeError):
+        Superficie()
+
+    class Incompleta(Superficie):
+        def nivel_numerico(self, puntos):
+            return np.zeros(len(puntos))
+
+    with pytest.raises(TypeError):
+        Incompleta()
+
+
+@pytest.mark.parametrize('superficie', catalogo)
+def test_numerico_coincide_con_simbolico(superficie):
+    puntos = np.random.default_rng(0).uniform(-2, 2, (20, 3))
+    nivel = sp.lambdify((x, y, z), superficie.nivel, 'numpy')
+    normal = [sp.lambdify((x, y, z), c, 'numpy') for c in superficie.normal]
+    assert np.allclose(superficie.nivel_numerico(puntos), nivel(*puntos.T))
+    #la normal cerrada es unitaria sobre la superficie, donde se compara
+    (u0, u1), (v0, v1) = superficie.rango_parametros
+    U, V = np.meshgrid(np.linspace(u0, u1, 7)[1:-1], np.linspace(v0, v1, 5), indexing='ij')
+    sobre = superficie.parametrizacion(U, V).reshape(-1, 3)
+    assert np.allclose(superficie.nivel_numerico(sobre), 0)
+    simbolica = np.stack([np.broadcast_to(c(*sobre.T), len(sobre)) for c in normal], axis=1)
+    assert np.allclose(superficie.normal_numerica(sobre), simbolica)
+
+
+@pytest.mark.parametrize('superficie, area', list(zip(catalogo, areas)))
+def test_malla(superficie, area):
+    malla = superficie.malla(48)
+    assert malla is superficie.malla(48)
+    assert np.sum(malla.pesos) == pytest.approx(area, rel=5e-3)
+    assert np.allclose(np.linalg.norm(malla.normales, axis=1), 1)
+
+
+def test_operadores_usan_la_normal_cerrada():
+    esfera = catalogo[0]
+    assert OperadoresDiferenciales.vector_normal(esfera) is esfera.normal
+    assert OperadoresDiferenciales.como_malla(esfera) is esfera.malla()
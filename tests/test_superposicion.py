@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from superposicion import SuperposicionCargas
+from op_electro import OperadoresElectrostaticos
+
+
+def _referencia(puntos, posiciones, cargas):
+    d = puntos[:, None, :] - posiciones[None, :, :]
+    r = np.linalg.norm(d, axis=2)
+    return (cargas / r).sum(axis=1), (cargas[None, :, None] * d / r[..., None]**3).sum(axis=1)
+
+
+@pytest.fixture
+def cargas():
+    rng = np.random.default_rng(1)
+    return rng.uniform(-1, 1, size=(300, 3)), rng.normal(size=300)
+
+
+def test_directo_coincide_con_suma_explicita(cargas):
+    posiciones, q = cargas
+    puntos = np.random.default_rng(2).uniform(-2, 2, size=(50, 3))
+    phi, E = _referencia(puntos, posiciones, q)
+    s = SuperposicionCargas(posiciones, q, k=2.0)
+    assert np.allclose(s.potencial(puntos, tam_bloque=7), 2 * phi)
+    assert np.allclose(s.campo(puntos, tam_bloque=7, hilos=3), 2 * E)
+
+
+def test_arbol_aproxima_la_suma_directa(cargas):
+    posiciones, q = cargas
+    puntos = np.random.default_rng(3).uniform(-3, 3, size=(200, 3))
+    s = SuperposicionCargas(posiciones, q)
+    directo = s.potencial(puntos)
+    arbol = s.potencial(puntos, metodo='arbol', theta=0.3)
+    assert np.linalg.norm(arbol - directo) < 1e-2 * np.linalg.norm(directo)
+    campo = s.campo(puntos, metodo='arbol', theta=0.3)
+    assert np.linalg.norm(campo - s.campo(puntos)) < 1e-2 * np.linalg.norm(s.campo(puntos))
+
+
+def test_carga_en_el_punto_de_observacion_no_contribuye():
+    s = SuperposicionCargas([[0, 0, 0], [1, 0, 0]], [1.0, 2.0])
+    assert s.potencial([[0, 0, 0]])[0] == pytest.approx(2.0)
+
+
+def test_errores_de_forma():
+    with pytest.raises(ValueError):
+        SuperposicionCargas([[0, 0, 0], [1, 0, 0]], [1.0])
+    with pytest.raises(ValueError):
+        SuperposicionCargas([[0, 0, 0]], [1.0]).potencial([[0, 0]])
+
+
+def test_potencial_de_cargas_en_op_electro(cargas):
+    posiciones, q = cargas
+    potencial = OperadoresElectrostaticos.PotencialElectrico.de_cargas(posiciones, q)
+    puntos = np.array([[5.0, 0.0, 0.0]])
+    assert potencial.evaluar(puntos) == pytest.approx(_referencia(puntos, posiciones, q)[0])